@@ -33,4 +33,6 @@ assert any(
 pytest_plugins = [
     "tests.fixtures.fixture_user",
     "tests.fixtures.fixture_data",
+    "tests.fixtures.fixture_queries",
+    "tests.fixtures.fixture_workers",
 ]
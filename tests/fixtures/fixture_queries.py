@@ -0,0 +1,40 @@
+import pytest
+
+from core.query_budgets import (
+    PYTEST_SUITE, UPDATE, QueryRecorder, load_budgets, merge_observed,
+    save_budgets,
+)
+
+OBSERVED = {}
+DUPLICATES = {}
+
+
+@pytest.fixture(autouse=True)
+def query_budget():
+    """Запросы клиента к маршрутам с бюджетом в query_budgets.json не
+    делают больше запросов к БД, чем разрешено.
+    """
+    budgets = load_budgets(PYTEST_SUITE)
+    with QueryRecorder() as recorder:
+        yield recorder
+    merge_observed(OBSERVED, recorder)
+    for record in recorder.records:
+        if record.duplicates():
+            DUPLICATES.setdefault(record.route, record)
+    if not UPDATE:
+        message = recorder.failure_message(budgets)
+        if message:
+            pytest.fail(message, pytrace=False)
+
+
+def pytest_sessionfinish(session):
+    if UPDATE and OBSERVED:
+        save_budgets(PYTEST_SUITE, OBSERVED)
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not DUPLICATES:
+        return
+    terminalreporter.section("Повторяющиеся запросы (N+1)")
+    for route in sorted(DUPLICATES):
+        terminalreporter.write_line(DUPLICATES[route].report())
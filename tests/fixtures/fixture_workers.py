@@ -0,0 +1,11 @@
+import pytest
+from django.test import override_settings
+
+
+@pytest.fixture(autouse=True, scope="session")
+def inline_workers():
+    """Фоновые задачи выполняются в процессе тестов: пул процессов
+    открыл бы настоящую базу, а не тестовую.
+    """
+    with override_settings(POST_THUMBNAIL_WORKERS=0):
+        yield
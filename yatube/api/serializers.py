@@ -0,0 +1,123 @@
+from posts.models import Group, Post, User
+
+
+class BadRequest(Exception):
+    """Неверные параметры запроса: ответ 400 с текстом ошибки."""
+
+
+def isoformat(value):
+    return value.isoformat() if value is not None else None
+
+
+def image_url(name):
+    return Post.image.field.storage.url(name) if name else None
+
+
+def zero_if_none(value):
+    # Строки статистики нет у пользователей без постов и подписчиков.
+    return value or 0
+
+
+class Resource:
+    """Представление модели в API: поле ответа -> (поле values(),
+    преобразование значения или None).
+
+    Строки читаются через values() без создания экземпляров моделей,
+    а поля ответа собираются по заранее подготовленному списку.
+    """
+
+    def __init__(self, model, fields):
+        self.model = model
+        self.fields = fields
+
+    def parse_fields(self, value):
+        """Поля из параметра ?fields=a,b; без параметра - все."""
+        if not value:
+            return list(self.fields)
+        names = [name.strip() for name in value.split(",") if name.strip()]
+        unknown = set(names) - set(self.fields)
+        if unknown:
+            raise BadRequest(
+                f"Неизвестные поля: {', '.join(sorted(unknown))}.")
+        return list(dict.fromkeys(names))
+
+    def columns(self, names):
+        return [self.fields[name][0] for name in names]
+
+    def serialize(self, rows, names, embedded=None):
+        """Словари ответа из строк values(); embedded подменяет id
+        связанного объекта его представлением.
+        """
+        embedded = embedded or {}
+        plan = []
+        for name in names:
+            column, convert = self.fields[name]
+            if name in embedded:
+                convert = embedded[name].get
+            plan.append((name, column, convert))
+        return [
+            {
+                name: convert(row[column]) if convert else row[column]
+                for name, column, convert in plan
+            }
+            for row in rows
+        ]
+
+    def in_bulk(self, ids):
+        """Полные представления объектов по id одним запросом."""
+        names = list(self.fields)
+        rows = self.model.objects.filter(pk__in=ids).values(
+            *self.columns(names))
+        return {
+            item["id"]: item for item in self.serialize(rows, names)
+        }
+
+
+POST = Resource(Post, {
+    "id": ("id", None),
+    "text": ("text", None),
+    "pub_date": ("pub_date", isoformat),
+    "updated": ("updated", isoformat),
+    "author": ("author_id", None),
+    "group": ("group_id", None),
+    "image": ("image", image_url),
+})
+AUTHOR = Resource(User, {
+    "id": ("id", None),
+    "username": ("username", None),
+    "first_name": ("first_name", None),
+    "last_name": ("last_name", None),
+    "posts_count": ("stats__posts_count", zero_if_none),
+    "followers_count": ("stats__followers_count", zero_if_none),
+})
+GROUP = Resource(Group, {
+    "id": ("id", None),
+    "slug": ("slug", None),
+    "title": ("title", None),
+    "description": ("description", None),
+    "posts_count": ("posts_count", None),
+})
+# Связи поста, которые ?embed= разворачивает в объекты.
+EMBEDS = {"author": AUTHOR, "group": GROUP}
+
+
+def parse_embed(value):
+    names = [name.strip() for name in (value or "").split(",")
+             if name.strip()]
+    unknown = set(names) - set(EMBEDS)
+    if unknown:
+        raise BadRequest(
+            f"Нельзя встроить: {', '.join(sorted(unknown))}.")
+    return set(names)
+
+
+def serialize_posts(rows, names, embed):
+    """Посты для ответа; авторы и группы из embed читаются одним
+    запросом на каждую связь, сколько бы постов ни было.
+    """
+    embedded = {}
+    for name in embed & set(names):
+        column = POST.fields[name][0]
+        ids = {row[column] for row in rows} - {None}
+        embedded[name] = EMBEDS[name].in_bulk(ids) if ids else {}
+    return POST.serialize(rows, names, embedded)
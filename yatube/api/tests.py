@@ -0,0 +1,148 @@
+from datetime import datetime
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+from posts.paginators import AFTER, make_cursor
+
+SLUG = "testslug"
+AUTHOR_USERNAME = "Abraham"
+GROUP_TITLE = "Тестовая группа"
+GROUP_DESCRIPTION = "Тестовое описание"
+POSTS_COUNT = 7
+POST_LIST_URL = reverse("api:post_list")
+GROUP_POSTS_URL = reverse("api:group_posts", args=[SLUG])
+USER_POSTS_URL = reverse("api:user_posts", args=[AUTHOR_USERNAME])
+EXPORT_URL = reverse("api:export_posts")
+
+
+class ApiTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username=AUTHOR_USERNAME, first_name="Авраам")
+        cls.other = User.objects.create_user(username="Isaac")
+        cls.group = Group.objects.create(
+            title=GROUP_TITLE, slug=SLUG, description=GROUP_DESCRIPTION)
+        for i in range(POSTS_COUNT):
+            Post.objects.create(
+                author=cls.user if i % 2 else cls.other,
+                group=cls.group if i % 3 else None,
+                text=f"Текст {i}",
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.guest = Client()
+
+    def get(self, url, params=None, status=200):
+        response = self.guest.get(url, params or {})
+        self.assertEqual(response.status_code, status)
+        self.assertEqual(response["Content-Type"], "application/json")
+        return response.json()
+
+    def test_cursor_pagination_walks_whole_feed(self):
+        """Курсор проходит ленту от нового поста к старому без пропусков
+        и повторов.
+        """
+        ids, url, params = [], POST_LIST_URL, {"limit": 3}
+        while url:
+            data = self.get(url, params)
+            ids += [post["id"] for post in data["results"]]
+            url, params = data["next"], None
+        self.assertEqual(
+            ids, list(Post.objects.values_list("id", flat=True)))
+
+    def test_feeds_are_filtered(self):
+        for url, queryset in [
+            (GROUP_POSTS_URL, self.group.posts.all()),
+            (USER_POSTS_URL, self.user.posts.all()),
+        ]:
+            with self.subTest(url=url):
+                self.assertEqual(
+                    [post["id"] for post in self.get(url)["results"]],
+                    list(queryset.values_list("id", flat=True)))
+
+    def test_sparse_fieldsets(self):
+        post = self.get(POST_LIST_URL, {"fields": "text,author"})[
+            "results"][0]
+        self.assertEqual(set(post), {"text", "author"})
+        self.assertIn(
+            "unknown", self.get(
+                POST_LIST_URL, {"fields": "text,unknown"}, 400)["detail"])
+
+    def test_embedding_is_done_in_bulk(self):
+        """Авторы и группы встраиваются одним запросом на связь, сколько
+        бы постов ни было на странице.
+        """
+        with self.assertNumQueries(3):
+            posts = self.get(
+                POST_LIST_URL, {"embed": "author,group"})["results"]
+        post = Post.objects.select_related("author", "group").filter(
+            group__isnull=False).first()
+        embedded = next(item for item in posts if item["id"] == post.id)
+        self.assertEqual(embedded["author"]["username"], post.author.username)
+        self.assertEqual(embedded["author"]["posts_count"], 3)
+        self.assertEqual(embedded["group"]["slug"], SLUG)
+        self.assertIn(None, [item["group"] for item in posts])
+
+    def test_details(self):
+        post = Post.objects.first()
+        data = self.get(
+            reverse("api:post_detail", args=[post.id]), {"embed": "author"})
+        self.assertEqual(data["text"], post.text)
+        self.assertEqual(data["author"]["id"], post.author_id)
+        self.assertEqual(
+            self.get(reverse("api:group_detail", args=[SLUG]))["title"],
+            GROUP_TITLE)
+        self.assertEqual(
+            self.get(reverse(
+                "api:user_detail", args=[AUTHOR_USERNAME]))["first_name"],
+            "Авраам")
+
+    def test_errors_are_json(self):
+        for url, params, status in [
+            (reverse("api:post_detail", args=[0]), {}, 404),
+            (reverse("api:group_posts", args=["missing"]), {}, 404),
+            (POST_LIST_URL, {"cursor": "broken"}, 400),
+            (POST_LIST_URL, {"cursor": make_cursor(
+                AFTER, datetime(2020, 1, 1), 10 ** 30)}, 400),
+            (POST_LIST_URL, {"limit": 0}, 400),
+            (POST_LIST_URL, {"embed": "text"}, 400),
+        ]:
+            with self.subTest(url=url, params=params):
+                self.assertIn("detail", self.get(url, params, status))
+
+    def test_feed_pages_are_cached_until_change(self):
+        """Повторный запрос ленты отдаётся из кеша без запросов к БД;
+        новый пост меняет ответ.
+        """
+        first = self.get(GROUP_POSTS_URL, {"embed": "author"})
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                self.get(GROUP_POSTS_URL, {"embed": "author"}), first)
+        post = Post.objects.create(
+            author=self.user, group=self.group, text="Свежий пост")
+        results = self.get(GROUP_POSTS_URL, {"embed": "author"})["results"]
+        self.assertEqual(results[0]["id"], post.id)
+
+    def test_unchanged_feed_is_not_modified(self):
+        response = self.guest.get(POST_LIST_URL)
+        self.assertEqual(self.guest.get(
+            POST_LIST_URL, HTTP_IF_NONE_MATCH=response["ETag"],
+        ).status_code, 304)
+
+    def test_export_is_streamed_to_staff_only(self):
+        self.assertEqual(self.guest.get(EXPORT_URL).status_code, 302)
+        self.guest.force_login(
+            User.objects.create_user(username="staff", is_staff=True))
+        response = self.guest.get(EXPORT_URL, {"format": "csv"})
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), POSTS_COUNT + 1)
+        self.assertEqual(
+            self.guest.get(EXPORT_URL, {"since": "вчера"}).status_code, 400)
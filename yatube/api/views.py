@@ -0,0 +1,242 @@
+import hashlib
+import json
+from functools import wraps
+
+from core.routers import use_replicas
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.cache import cache
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.utils.dateparse import parse_date
+from django.views.decorators.http import require_GET
+from posts.caching import (
+    INDEX_SCOPE, author_scope, fragment_version, group_scope,
+)
+from posts.conditions import feed_condition
+from posts.export import CONTENT_TYPES, FORMATS, export_rows
+from posts.models import Group, Post, User
+from posts.paginators import AFTER, decode_cursor, make_cursor, seek_after
+from yatube.settings import (
+    API_CACHE_TIMEOUT, API_MAX_PAGE_SIZE, API_PAGE_SIZE,
+)
+
+from .serializers import (
+    AUTHOR, GROUP, POST, BadRequest, parse_embed, serialize_posts,
+)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+API_FEED_KEY = "api:feed:{}"
+JSON = "application/json"
+
+
+def dumps(data):
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(
+        data, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def json_response(data, status=200):
+    return HttpResponse(
+        dumps(data), status=status, content_type=JSON)
+
+
+def api_view(view):
+    """GET-эндпоинт API: ошибки отдаются в JSON, а не страницей HTML."""
+
+    @require_GET
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except BadRequest as error:
+            return json_response({"detail": str(error)}, status=400)
+        except Http404 as error:
+            return json_response({"detail": str(error)}, status=404)
+
+    return wrapper
+
+
+def cache_feed(scope_of):
+    """Хранит JSON страницы ленты scope_of(**kwargs) в кеше под версией
+    ленты: правка в ленте или в именах авторов и групп меняет ключ.
+
+    Ответ один для всех клиентов, поэтому повторный запрос не ходит
+    в БД. Счётчики встроенных авторов могут отставать на
+    API_CACHE_TIMEOUT.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, **kwargs):
+            raw = "|".join([
+                fragment_version(scope_of(**kwargs)),
+                request.get_full_path(),
+            ])
+            key = API_FEED_KEY.format(hashlib.md5(raw.encode()).hexdigest())
+            content = cache.get(key)
+            if content is not None:
+                return HttpResponse(content, content_type=JSON)
+            response = view(request, **kwargs)
+            if response.status_code == 200:
+                cache.set(key, response.content, API_CACHE_TIMEOUT)
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def page_size(request):
+    value = request.GET.get("limit")
+    if value is None:
+        return API_PAGE_SIZE
+    try:
+        size = int(value)
+    except ValueError:
+        raise BadRequest("limit должен быть целым числом.")
+    if not 1 <= size <= API_MAX_PAGE_SIZE:
+        raise BadRequest(f"limit должен быть от 1 до {API_MAX_PAGE_SIZE}.")
+    return size
+
+
+def feed_response(request, queryset):
+    """Страница ленты по курсору (pub_date, id) от нового к старому.
+
+    Ключ курсора читается всегда, даже если его нет в ?fields=.
+    """
+    names = POST.parse_fields(request.GET.get("fields"))
+    embed = parse_embed(request.GET.get("embed"))
+    limit = page_size(request)
+    queryset = queryset.order_by("-pub_date", "-id")
+    cursor = request.GET.get("cursor")
+    if cursor:
+        decoded = decode_cursor(cursor)
+        if decoded is None or decoded[0] != AFTER:
+            raise BadRequest("Неверный курсор.")
+        queryset = seek_after(queryset, *decoded[1:])
+    columns = {"id", "pub_date", *POST.columns(names)}
+    rows = list(queryset.values(*columns)[:limit + 1])
+    next_url = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        params = request.GET.copy()
+        params["cursor"] = make_cursor(
+            AFTER, rows[-1]["pub_date"], rows[-1]["id"])
+        next_url = f"{request.path}?{params.urlencode()}"
+    return json_response({
+        "results": serialize_posts(rows, names, embed),
+        "next": next_url,
+    })
+
+
+def get_id(queryset, message):
+    pk = queryset.values_list("id", flat=True).first()
+    if pk is None:
+        raise Http404(message)
+    return pk
+
+
+@api_view
+@use_replicas(lambda: INDEX_SCOPE)
+@feed_condition(lambda: INDEX_SCOPE)
+@cache_feed(lambda: INDEX_SCOPE)
+def post_list(request):
+    return feed_response(request, Post.objects.all())
+
+
+@api_view
+@use_replicas(group_scope)
+@feed_condition(group_scope)
+@cache_feed(group_scope)
+def group_posts(request, slug):
+    group_id = get_id(
+        Group.objects.filter(slug=slug), "Группа не найдена.")
+    return feed_response(request, Post.objects.filter(group_id=group_id))
+
+
+@api_view
+@use_replicas(author_scope)
+@feed_condition(author_scope)
+@cache_feed(author_scope)
+def user_posts(request, username):
+    author_id = get_id(
+        User.objects.filter(username=username), "Автор не найден.")
+    return feed_response(request, Post.objects.filter(author_id=author_id))
+
+
+@api_view
+@use_replicas()
+def post_detail(request, post_id):
+    names = POST.parse_fields(request.GET.get("fields"))
+    embed = parse_embed(request.GET.get("embed"))
+    rows = list(Post.objects.filter(pk=post_id).values(*POST.columns(names)))
+    if not rows:
+        raise Http404("Пост не найден.")
+    return json_response(serialize_posts(rows, names, embed)[0])
+
+
+def detail_response(request, resource, queryset, message):
+    names = resource.parse_fields(request.GET.get("fields"))
+    rows = list(queryset.values(*resource.columns(names)))
+    if not rows:
+        raise Http404(message)
+    return json_response(resource.serialize(rows, names)[0])
+
+
+@api_view
+@use_replicas()
+def group_detail(request, slug):
+    return detail_response(
+        request, GROUP, Group.objects.filter(slug=slug),
+        "Группа не найдена.")
+
+
+@api_view
+def user_detail(request, username):
+    return detail_response(
+        request, AUTHOR, User.objects.filter(username=username),
+        "Автор не найден.")
+
+
+def date_param(request, name):
+    value = request.GET.get(name)
+    if not value:
+        return None
+    try:
+        parsed = parse_date(value)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise BadRequest(f"{name} должен быть датой ГГГГ-ММ-ДД.")
+    return parsed
+
+
+@staff_member_required
+@api_view
+def export_posts(request):
+    """Выгрузка постов для аналитики потоком: ответ пишется по мере
+    чтения порций из БД, целиком в памяти не собирается.
+    """
+    output = request.GET.get("format", "ndjson")
+    if output not in FORMATS:
+        raise BadRequest(f"format должен быть одним из: {', '.join(FORMATS)}.")
+    try:
+        after = int(request.GET.get("after", 0))
+    except ValueError:
+        raise BadRequest("after должен быть целым числом.")
+    rows = export_rows(
+        group=request.GET.get("group") or None,
+        author=request.GET.get("author") or None,
+        since=date_param(request, "since"),
+        until=date_param(request, "until"),
+        after=after,
+    )
+    response = StreamingHttpResponse(
+        FORMATS[output](rows), content_type=CONTENT_TYPES[output])
+    response["Content-Disposition"] = (
+        f'attachment; filename="posts.{output}"')
+    return response
@@ -0,0 +1,25 @@
+from django.template import TemplateDoesNotExist
+from django.template.backends import django
+
+from .timing import measure
+
+
+class Template(django.Template):
+    def render(self, context=None, request=None):
+        with measure("tpl"):
+            return super().render(context, request)
+
+
+class DjangoTemplates(django.DjangoTemplates):
+    """Шаблоны Django, рендер которых попадает в метрику tpl
+    Server-Timing.
+    """
+
+    def from_string(self, template_code):
+        return Template(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return Template(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            django.reraise(exc, self)
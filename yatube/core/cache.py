@@ -0,0 +1,109 @@
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+
+from .timing import count, current, measure
+
+MISSING = object()
+# Отметка, которую процесс видел при прошлой проверке; None - файла нет.
+_stamp = {"seen": MISSING}
+_stamp_lock = threading.Lock()
+
+
+def cache_reads():
+    timings = current()
+    if timings is None:
+        return None
+    return timings.counts["cache_hit"] + timings.counts["cache_miss"]
+
+
+class TimedCacheMixin:
+    """Считает попадания и промахи чтений кеша и время обращений
+    для Server-Timing. Подмешивается к любому бэкенду кеша Django.
+    """
+
+    def get(self, key, default=None, version=None):
+        with measure("cache"):
+            value = super().get(key, MISSING, version)
+        if value is MISSING:
+            count("cache_miss")
+            return default
+        count("cache_hit")
+        return value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        reads = cache_reads()
+        with measure("cache"):
+            values = super().get_many(keys, version)
+        # BaseCache.get_many читает по ключу через get(), и тогда
+        # попадания уже посчитаны.
+        if cache_reads() == reads:
+            count("cache_hit", len(values))
+            count("cache_miss", len(keys) - len(values))
+        return values
+
+    def set(self, *args, **kwargs):
+        with measure("cache"):
+            return super().set(*args, **kwargs)
+
+    def add(self, *args, **kwargs):
+        with measure("cache"):
+            return super().add(*args, **kwargs)
+
+    def set_many(self, *args, **kwargs):
+        with measure("cache"):
+            return super().set_many(*args, **kwargs)
+
+    def incr(self, *args, **kwargs):
+        with measure("cache"):
+            return super().incr(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with measure("cache"):
+            return super().delete(*args, **kwargs)
+
+
+class TimedLocMemCache(TimedCacheMixin, LocMemCache):
+    pass
+
+
+def read_stamp():
+    try:
+        return os.stat(settings.CACHE_STAMP_FILE).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def expire_process_caches():
+    """Отмечает кеши всех процессов сайта устаревшими.
+
+    Кеш у каждого процесса свой, поэтому команды, которые меняют данные
+    в обход сайта (импорт, пересчёт счётчиков), не могут сдвинуть версии
+    лент в кеше сайта. Вместо этого они меняют время файла-отметки,
+    а процесс сайта, заметив это, очищает свой кеш целиком.
+    """
+    path = settings.CACHE_STAMP_FILE
+    with open(path, "a"):
+        pass
+    now = time.time_ns()
+    os.utime(path, ns=(now, now))
+    # Свой кеш очищается сразу и по этой отметке второй раз не очистится.
+    with _stamp_lock:
+        _stamp["seen"] = read_stamp()
+    cache.clear()
+
+
+def check_stamp():
+    """Очищает кеш процесса, если после прошлой проверки его отметили
+    устаревшим. Первая проверка только запоминает отметку.
+    """
+    stamp = read_stamp()
+    with _stamp_lock:
+        seen, _stamp["seen"] = _stamp["seen"], stamp
+    if seen is not MISSING and stamp != seen:
+        cache.clear()
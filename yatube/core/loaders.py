@@ -0,0 +1,49 @@
+import os
+
+from django.template import Template
+from django.template.loaders import cached
+
+
+def file_mtime(name):
+    try:
+        return os.stat(name).st_mtime
+    except OSError:
+        return None
+
+
+class CachedLoader(cached.Loader):
+    """Кеширует скомпилированные шаблоны независимо от DEBUG.
+
+    С check_mtime (режим разработки) шаблон компилируется заново, как
+    только меняется его файл, а отсутствие шаблона не запоминается.
+    """
+
+    def __init__(self, engine, loaders, check_mtime=False):
+        super().__init__(engine, loaders)
+        self.check_mtime = check_mtime
+        self.mtimes = {}
+
+    def get_template(self, template_name, skip=None):
+        if not self.check_mtime:
+            return super().get_template(template_name, skip)
+        key = self.cache_key(template_name, skip)
+        cached_template = self.get_template_cache.get(key)
+        if cached_template is not None and (
+                not isinstance(cached_template, Template)
+                or self.is_stale(cached_template)):
+            del self.get_template_cache[key]
+        template = super().get_template(template_name, skip)
+        self.mtimes.setdefault(
+            template.origin.name, file_mtime(template.origin.name))
+        return template
+
+    def is_stale(self, template):
+        name = template.origin.name
+        if file_mtime(name) == self.mtimes.get(name):
+            return False
+        self.mtimes.pop(name, None)
+        return True
+
+    def reset(self):
+        super().reset()
+        self.mtimes.clear()
@@ -0,0 +1,142 @@
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.test import Client, override_settings
+from django.urls import reverse
+from posts.models import Post, User
+from posts.workers import create_executor
+
+# Отличия профиля от настроек default; "tuned" - настройки как есть.
+PROFILES = {
+    "django": {"CONN_MAX_AGE": 0, "PRAGMAS": {}},
+    "tuned": {},
+}
+# Без кеша каждый запрос доходит до БД.
+DUMMY_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"},
+}
+SEED_POSTS = 100
+TEXT = "Пост из замера конкурентной нагрузки."
+
+
+def hammer(client, request, deadline, results):
+    """Повторяет request(client) до deadline, копит (успех, время)."""
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            ok = request(client).status_code < 400
+        except Exception:
+            ok = False
+        results.append((ok, time.perf_counter() - started))
+    connections.close_all()
+
+
+def write(client):
+    return client.post(reverse("posts:post_create"), {"text": TEXT})
+
+
+def read(client):
+    return client.get(reverse("posts:index"))
+
+
+def summary(results, duration):
+    timings = sorted(elapsed for _, elapsed in results)
+    return {
+        "rps": len(results) / duration,
+        "errors": sum(not ok for ok, _ in results),
+        "p50": statistics.median(timings) if timings else 0,
+        "p95": timings[int(len(timings) * 0.95)] if timings else 0,
+    }
+
+
+def run_profile(profile, path, writers, readers, duration):
+    """Нагрузка на свежую базу path в отдельном процессе: писатели
+    создают посты, читатели листают главную, все - через обработчик
+    запросов Django со всеми middleware.
+    """
+    # Соединений в этом процессе ещё не было, поэтому правка настроек
+    # базы подействует на все соединения потоков.
+    settings.DATABASES["default"].update(NAME=path, **PROFILES[profile])
+    with override_settings(CACHES=DUMMY_CACHES, DEBUG=False):
+        call_command("migrate", verbosity=0)
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode")
+            journal_mode = cursor.fetchone()[0]
+        author = User.objects.create_user(username="bench_author")
+        Post.objects.bulk_create(
+            Post(author=author, text=TEXT) for _ in range(SEED_POSTS))
+        clients = []
+        for number in range(writers + readers):
+            client = Client(HTTP_HOST="localhost")
+            client.force_login(User.objects.create_user(
+                username=f"bench_user{number}"))
+            clients.append(client)
+        connections.close_all()
+        write_results, read_results = [], []
+        deadline = time.perf_counter() + duration
+        threads = [
+            threading.Thread(target=hammer, args=(
+                client, write if number < writers else read, deadline,
+                write_results if number < writers else read_results,
+            ))
+            for number, client in enumerate(clients)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    return (
+        journal_mode,
+        summary(write_results, duration),
+        summary(read_results, duration),
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Замеряет пропускную способность SQLite под конкурентной нагрузкой "
+        "писателей и читателей: с настройками Django по умолчанию и с "
+        "WAL, прагмами и долгими соединениями из settings."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--writers", type=int, default=4)
+        parser.add_argument("--readers", type=int, default=8)
+        parser.add_argument(
+            "--duration", type=float, default=10,
+            help="Длительность нагрузки на профиль в секундах.")
+
+    def handle(self, *args, **options):
+        workdir = tempfile.mkdtemp()
+        rows = []
+        try:
+            for profile in PROFILES:
+                # Свежий процесс: ни соединений, ни прагм прошлого профиля.
+                with create_executor(1) as executor:
+                    rows.append((profile, executor.submit(
+                        run_profile, profile, f"{workdir}/{profile}.sqlite3",
+                        options["writers"], options["readers"],
+                        options["duration"],
+                    ).result()))
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+        self.stdout.write(
+            f"{options['writers']} писателей, {options['readers']} "
+            f"читателей, {options['duration']:g} с на профиль")
+        self.stdout.write(
+            f"{'профиль':<8}{'журнал':<8}{'нагрузка':<10}{'зап/с':>8}"
+            f"{'ошибки':>8}{'p50, мс':>9}{'p95, мс':>9}")
+        for profile, (journal_mode, *stats) in rows:
+            for kind, result in zip(("запись", "чтение"), stats):
+                self.stdout.write(
+                    f"{profile:<8}{journal_mode:<8}{kind:<10}"
+                    f"{result['rps']:>8.1f}{result['errors']:>8}"
+                    f"{result['p50'] * 1000:>9.1f}"
+                    f"{result['p95'] * 1000:>9.1f}")
@@ -0,0 +1,60 @@
+import os
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+def copy_database(source, target):
+    """Снимок базы source в файл target.
+
+    Снимок пишется во временный файл и подменяет реплику целиком:
+    читатели видят либо старую копию, либо новую, но не половину.
+    """
+    temporary = f"{target}.tmp"
+    if os.path.exists(temporary):
+        os.remove(temporary)
+    primary = sqlite3.connect(source)
+    replica = sqlite3.connect(temporary)
+    try:
+        primary.backup(replica)
+        # Копия основной базы в WAL; реплику только читают.
+        replica.execute("PRAGMA journal_mode = DELETE")
+    finally:
+        replica.close()
+        primary.close()
+    os.replace(temporary, target)
+
+
+class Command(BaseCommand):
+    help = (
+        "Копирует основную SQLite-базу в файлы реплик REPLICA_DATABASES. "
+        "С --interval повторяет копирование, пока его не остановят."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval", type=float, default=0,
+            help="Пауза между копированиями в секундах.")
+
+    def handle(self, *args, **options):
+        source = settings.DATABASES["default"]["NAME"]
+        targets = [
+            settings.DATABASES[alias]["NAME"]
+            for alias in settings.REPLICA_DATABASES
+        ]
+        if not targets:
+            self.stdout.write("Реплики не настроены: YATUBE_DB_REPLICAS=0.")
+            return
+        while True:
+            started = time.perf_counter()
+            for target in targets:
+                copy_database(source, target)
+            if options["verbosity"] > 0:
+                self.stdout.write(
+                    f"Реплик обновлено: {len(targets)} за "
+                    f"{time.perf_counter() - started:.2f} с.")
+            if not options["interval"]:
+                return
+            time.sleep(options["interval"])
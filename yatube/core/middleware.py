@@ -0,0 +1,249 @@
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import random
+import re
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import SuspiciousFileOperation
+from django.db import connections
+from django.http import FileResponse, HttpResponseNotModified
+from django.urls import Resolver404, resolve
+from django.utils._os import safe_join
+from django.utils.cache import (
+    get_conditional_response, patch_cache_control, patch_vary_headers,
+)
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.static import was_modified_since
+from posts.caching import get_versions
+from yatube.settings import (
+    PAGE_CACHE_MAX_AGE, PAGE_CACHE_NAMESPACES, PAGE_CACHE_TIMEOUT,
+    REPLICA_STICKY_SECONDS, SERVER_TIMING_LOG, SERVER_TIMING_SAMPLE_RATE,
+    STATIC_MAX_AGE,
+)
+
+from .cache import check_stamp
+from .routers import PRIMARY_COOKIE
+from .timing import RequestTimings, activate, sql_timer
+
+PAGE_KEY = "pages:{}"
+# Единственные параметры запроса, которые меняют страницу ленты.
+# Кортеж: из него собирается ключ кеша, и порядок не должен зависеть
+# от PYTHONHASHSEED процесса.
+PAGE_PARAMS = ("page", "cursor")
+# Заранее сжатые копии статики в порядке предпочтения.
+STATIC_ENCODINGS = [("br", ".br"), ("gzip", ".gz")]
+# Имя с хешем содержимого от ManifestStaticFilesStorage: name.0123abcd4567.ext
+HASHED_NAME = re.compile(r"\.[0-9a-f]{12}(\.[^./]+)?$")
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+timing_logger = logging.getLogger("yatube.timing")
+
+
+def page_key(request):
+    page = "\x1f".join(
+        [request.path] + [request.GET.get(name, "") for name in PAGE_PARAMS])
+    return PAGE_KEY.format(hashlib.md5(page.encode()).hexdigest())
+
+
+def is_cached_route(request):
+    if request.method not in ("GET", "HEAD"):
+        return False
+    if not set(request.GET).issubset(PAGE_PARAMS):
+        return False
+    try:
+        match = resolve(request.path_info)
+    except Resolver404:
+        return False
+    return match.namespace in PAGE_CACHE_NAMESPACES
+
+
+def is_fresh(versions):
+    scopes = list(versions)
+    return get_versions(scopes) == [versions[scope] for scope in scopes]
+
+
+def is_storable(response):
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+    )
+
+
+class AnonymousPageCacheMiddleware:
+    """Отдаёт гостям целые страницы из кеша, минуя сессии, авторизацию
+    и шаблоны.
+
+    Гость - запрос без сессионной куки к маршрутам PAGE_CACHE_NAMESPACES.
+    Со страницей хранятся версии лент, которые view записал
+    в request.page_versions: правка в ленте меняет её версию, и все
+    страницы с этой лентой перестают отдаваться из кеша.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not is_cached_route(request):
+            return self.get_response(request)
+        if settings.SESSION_COOKIE_NAME in request.COOKIES:
+            response = self.get_response(request)
+            patch_cache_control(response, private=True)
+            patch_vary_headers(response, ["Cookie"])
+            return response
+        key = page_key(request)
+        cached = cache.get(key)
+        if cached is not None and is_fresh(cached[0]):
+            response = cached[1]
+            return get_conditional_response(
+                request,
+                etag=response.get("ETag"),
+                last_modified=parse_http_date_safe(
+                    response.get("Last-Modified")),
+                response=response,
+            )
+        response = self.get_response(request)
+        patch_vary_headers(response, ["Cookie"])
+        if not is_storable(response):
+            return response
+        patch_cache_control(response, public=True, max_age=PAGE_CACHE_MAX_AGE)
+        cache.set(
+            key,
+            (getattr(request, "page_versions", {}), response),
+            PAGE_CACHE_TIMEOUT,
+        )
+        return response
+
+
+def accepted_encodings(request):
+    encodings = set()
+    for item in request.META.get("HTTP_ACCEPT_ENCODING", "").split(","):
+        encoding, _, params = item.strip().partition(";")
+        if params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00"):
+            encodings.add(encoding.strip().lower())
+    return encodings
+
+
+def serve_static(request, name):
+    """Файл из STATIC_ROOT или None, если такого нет."""
+    try:
+        path = safe_join(settings.STATIC_ROOT, name)
+    except SuspiciousFileOperation:
+        return None
+    if not os.path.isfile(path):
+        return None
+    content_type, _ = mimetypes.guess_type(path)
+    served, encoding = path, None
+    accepted = accepted_encodings(request)
+    for candidate, suffix in STATIC_ENCODINGS:
+        if candidate in accepted and os.path.isfile(path + suffix):
+            served, encoding = path + suffix, candidate
+            break
+    stat = os.stat(served)
+    if not was_modified_since(
+            request.META.get("HTTP_IF_MODIFIED_SINCE"),
+            stat.st_mtime, stat.st_size):
+        response = HttpResponseNotModified()
+    else:
+        response = FileResponse(
+            open(served, "rb"),
+            content_type=content_type or "application/octet-stream")
+        response["Last-Modified"] = http_date(stat.st_mtime)
+        if encoding:
+            response["Content-Encoding"] = encoding
+    patch_vary_headers(response, ["Accept-Encoding"])
+    if HASHED_NAME.search(name):
+        response["Cache-Control"] = IMMUTABLE
+    else:
+        patch_cache_control(response, public=True, max_age=STATIC_MAX_AGE)
+    return response
+
+
+class StaticFilesMiddleware:
+    """Раздаёт собранную collectstatic статику без внешнего веб-сервера.
+
+    Сжатую копию файла выбирает по Accept-Encoding; файлы с хешем
+    содержимого в имени клиенты и прокси кешируют навсегда. В режиме
+    DEBUG runserver отдаёт статику сам, до этого middleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if (request.method in ("GET", "HEAD")
+                and request.path.startswith(settings.STATIC_URL)):
+            response = serve_static(
+                request, request.path[len(settings.STATIC_URL):])
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+
+class ReadPrimaryAfterWriteMiddleware:
+    """После запроса, который мог что-то записать, пользователь
+    REPLICA_STICKY_SECONDS читает с основной базы: за это время правка
+    успевает дойти до реплик.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.method not in ("GET", "HEAD", "OPTIONS", "TRACE"):
+            response.set_cookie(
+                PRIMARY_COOKIE, "1", max_age=REPLICA_STICKY_SECONDS,
+                httponly=True, samesite="Lax")
+        return response
+
+
+class CacheStampMiddleware:
+    """Перед запросом очищает кеш процесса, если команда отметила его
+    устаревшим: см. core.cache.expire_process_caches. Проверка - один
+    stat файла-отметки.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        check_stamp()
+        return self.get_response(request)
+
+
+class ServerTimingMiddleware:
+    """Для доли SERVER_TIMING_SAMPLE_RATE запросов отдаёт в заголовке
+    Server-Timing, сколько заняли SQL, рендер шаблонов, кеш и миниатюры,
+    и при SERVER_TIMING_LOG пишет то же строкой JSON в лог yatube.timing.
+
+    Запросы вне выборки проходят без обёрток: замер стоит только
+    выбранным.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= SERVER_TIMING_SAMPLE_RATE:
+            return self.get_response(request)
+        with ExitStack() as stack:
+            timings = stack.enter_context(activate(RequestTimings()))
+            for alias in connections:
+                stack.enter_context(
+                    connections[alias].execute_wrapper(sql_timer))
+            response = self.get_response(request)
+        response["Server-Timing"] = timings.header()
+        if SERVER_TIMING_LOG:
+            timing_logger.info(json.dumps({
+                "method": request.method,
+                "path": request.path,
+                "status": response.status_code,
+                **timings.as_dict(),
+            }))
+        return response
@@ -0,0 +1,243 @@
+"""Бюджеты запросов к БД для тестов: сколько запросов может сделать
+один запрос клиента к маршруту.
+
+Бюджеты хранятся в query_budgets.json рядом с manage.py: у каждого
+набора тестов свой раздел, в нём ключ - метод, маршрут и кто смотрит
+(GET posts:index guest). QUERY_BUDGETS_UPDATE=1 вместо проверки
+записывает в раздел набора наблюдаемый максимум за прогон, в том числе
+меньший прежнего бюджета. Обновлять бюджеты нужно прогоном всего набора.
+"""
+import json
+import os
+import sys
+from collections import Counter, defaultdict
+from contextlib import ExitStack
+from http.cookies import SimpleCookie
+
+from django.conf import settings
+from django.core.signals import request_finished, request_started
+from django.db import connections
+from django.template.base import Node
+from django.urls import Resolver404, resolve
+
+BUDGETS_PATH = os.path.join(settings.BASE_DIR, "query_budgets.json")
+UPDATE = os.getenv("QUERY_BUDGETS_UPDATE") == "1"
+RENDER_ANNOTATED = Node.render_annotated.__code__
+SQL_PREVIEW = 200
+# Модули, через которые запросы только проходят: строка из них ничего
+# не говорит о том, откуда запрос.
+PASS_THROUGH = {
+    os.path.join(os.path.dirname(__file__), name)
+    for name in ("middleware.py", "query_budgets.py", "timing.py")
+}
+# Разделы query_budgets.json.
+DJANGO_SUITE = "django"
+PYTEST_SUITE = "pytest"
+
+
+def read_budgets(path):
+    try:
+        with open(path, encoding="utf-8") as source:
+            return json.load(source)
+    except FileNotFoundError:
+        return {}
+
+
+def load_budgets(suite, path=BUDGETS_PATH):
+    return read_budgets(path).get(suite, {})
+
+
+def save_budgets(suite, observed, path=BUDGETS_PATH):
+    """Записывает наблюдаемые числа запросов бюджетами набора suite.
+
+    Бюджеты запросов, которых не было в прогоне, остаются прежними.
+    """
+    budgets = read_budgets(path)
+    section = budgets.get(suite, {})
+    section.update(observed)
+    budgets[suite] = dict(sorted(section.items()))
+    with open(path, "w", encoding="utf-8") as output:
+        json.dump(dict(sorted(budgets.items())), output, indent=2)
+        output.write("\n")
+
+
+def viewer(environ):
+    """guest или user: вошедшему пользователю страница стоит дороже на
+    чтение сессии и пользователя.
+    """
+    cookies = SimpleCookie(environ.get("HTTP_COOKIE", ""))
+    return "user" if settings.SESSION_COOKIE_NAME in cookies else "guest"
+
+
+def query_location():
+    """Строка шаблона, из которой выполняется запрос, а если запрос не
+    из шаблона - ближайшая строка кода проекта, кроме middleware и
+    обёрток запросов.
+    """
+    frame = sys._getframe(2)
+    fallback = None
+    while frame is not None:
+        if frame.f_code is RENDER_ANNOTATED:
+            node = frame.f_locals["self"]
+            token = getattr(node, "token", None)
+            origin = getattr(node, "origin", None)
+            if token is not None and origin is not None:
+                return f"{origin.template_name}:{token.lineno}"
+        filename = frame.f_code.co_filename
+        if (fallback is None and filename.startswith(settings.BASE_DIR)
+                and filename not in PASS_THROUGH):
+            fallback = (
+                f"{os.path.relpath(filename, settings.BASE_DIR)}:"
+                f"{frame.f_lineno}")
+        frame = frame.f_back
+    return fallback or "?"
+
+
+class RequestRecord:
+    def __init__(self, route, method, path, viewer="guest"):
+        self.route = route
+        self.method = method
+        self.path = path
+        self.key = f"{method} {route} {viewer}"
+        self.queries = []
+
+    def duplicates(self):
+        """Одинаковые с точностью до параметров запросы - подпись N+1:
+        SQL -> (сколько раз, откуда).
+        """
+        counts = Counter(sql for sql, _ in self.queries)
+        locations = defaultdict(set)
+        for sql, location in self.queries:
+            if counts[sql] > 1:
+                locations[sql].add(location)
+        return {
+            sql: (counts[sql], sorted(locations[sql]))
+            for sql in locations
+        }
+
+    def report(self):
+        lines = [
+            f"{self.method} {self.path} ({self.key}): "
+            f"запросов к БД {len(self.queries)}"]
+        for sql, (times, locations) in self.duplicates().items():
+            lines.append(f"  {times}x {sql[:SQL_PREVIEW]}")
+            lines.extend(f"     из {location}" for location in locations)
+        return "\n".join(lines)
+
+
+class QueryRecorder:
+    """Записывает запросы к БД, сделанные во время запросов клиента,
+    по маршрутам. Запросы самих тестов (подготовка данных) не в счёт.
+    """
+
+    def __init__(self):
+        self.records = []
+        self.current = None
+        self.stack = ExitStack()
+
+    def __enter__(self):
+        request_started.connect(self.started)
+        request_finished.connect(self.finished)
+        self.stack.callback(request_started.disconnect, self.started)
+        self.stack.callback(request_finished.disconnect, self.finished)
+        for alias in connections:
+            self.stack.enter_context(
+                connections[alias].execute_wrapper(self.record))
+        return self
+
+    def __exit__(self, *exc_info):
+        self.current = None
+        self.stack.close()
+
+    def started(self, sender, environ=None, **kwargs):
+        self.current = None
+        if environ is None:
+            return
+        path = environ.get("PATH_INFO", "")
+        try:
+            route = resolve(path).view_name
+        except Resolver404:
+            return
+        self.current = RequestRecord(
+            route, environ.get("REQUEST_METHOD", "GET"), path,
+            viewer(environ))
+        self.records.append(self.current)
+
+    def finished(self, sender, **kwargs):
+        self.current = None
+
+    def record(self, execute, sql, params, many, context):
+        if self.current is not None:
+            self.current.queries.append((sql, query_location()))
+        return execute(sql, params, many, context)
+
+    def observed(self):
+        """Ключ бюджета -> наибольшее число запросов за один запрос
+        клиента.
+        """
+        maxima = {}
+        for record in self.records:
+            maxima[record.key] = max(
+                maxima.get(record.key, 0), len(record.queries))
+        return maxima
+
+    def overruns(self, budgets):
+        """Записи запросов, превысивших свой бюджет."""
+        return [
+            record for record in self.records
+            if record.key in budgets
+            and len(record.queries) > budgets[record.key]
+        ]
+
+    def failure_message(self, budgets):
+        overruns = self.overruns(budgets)
+        if not overruns:
+            return None
+        return "\n".join(
+            f"Бюджет {record.key}: не больше {budgets[record.key]} "
+            f"запросов к БД.\n"
+            f"{record.report()}"
+            for record in overruns)
+
+
+def merge_observed(observed, recorder):
+    for key, queries in recorder.observed().items():
+        observed[key] = max(observed.get(key, 0), queries)
+
+
+# Наблюдения всего прогона manage.py test: классы тестов делят маршруты.
+OBSERVED = {}
+
+
+class QueryBudgetMixin:
+    """Для TestCase: запросы клиента к маршрутам с бюджетом в
+    query_budgets.json не делают больше запросов к БД, чем разрешено.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.query_budgets = load_budgets(DJANGO_SUITE)
+
+    @classmethod
+    def tearDownClass(cls):
+        # Каждый класс записывает наблюдения прогона на данный момент,
+        # последний - итог всего прогона.
+        if UPDATE and OBSERVED:
+            save_budgets(DJANGO_SUITE, OBSERVED)
+        super().tearDownClass()
+
+    def _pre_setup(self):
+        # Не setUp: тесты переопределяют его, не вызывая super().
+        super()._pre_setup()
+        self.query_recorder = QueryRecorder().__enter__()
+        self.addCleanup(self.check_query_budgets)
+
+    def check_query_budgets(self):
+        recorder = self.query_recorder
+        recorder.__exit__(None, None, None)
+        merge_observed(OBSERVED, recorder)
+        if not UPDATE:
+            message = recorder.failure_message(self.query_budgets)
+            if message:
+                self.fail(message)
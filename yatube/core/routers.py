@@ -0,0 +1,80 @@
+import random
+import threading
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from posts.caching import NAMES_SCOPE, modified_within
+from yatube.settings import REPLICA_STICKY_SECONDS
+
+# Кука, с которой пользователь читает с основной базы после своей записи.
+PRIMARY_COOKIE = "read_primary"
+# Модели этих приложений можно читать с реплик: сессии, пользователи
+# и служебные таблицы всегда читаются с основной базы.
+REPLICA_APP_LABELS = {"posts"}
+
+_state = threading.local()
+
+
+@contextmanager
+def replica_reads():
+    """Чтения моделей REPLICA_APP_LABELS внутри блока уходят на реплики."""
+    previous = getattr(_state, "replica_reads", False)
+    _state.replica_reads = True
+    try:
+        yield
+    finally:
+        _state.replica_reads = previous
+
+
+def use_replicas(scope_of=None):
+    """Читает данные view с реплик, если пользователь недавно ничего
+    не записывал: иначе он мог бы не увидеть свою правку, пока она
+    не дошла до реплики.
+
+    Лента scope_of(**kwargs), которую правили за последние
+    REPLICA_STICKY_SECONDS, читается с основной базы: версия ленты уже
+    новая, а реплика могла ещё не получить правку, и страница из неё
+    попала бы в кеши фрагментов и страниц и в ETag как свежая. Без
+    scope_of читаются с реплик данные, которые нигде не кешируются.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if PRIMARY_COOKIE in request.COOKIES or (
+                    scope_of is not None and modified_within(
+                        [scope_of(**kwargs), NAMES_SCOPE],
+                        REPLICA_STICKY_SECONDS)):
+                return view(request, *args, **kwargs)
+            with replica_reads():
+                return view(request, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+class ReplicaRouter:
+    """Пишет в основную базу, читает с реплик REPLICA_DATABASES внутри
+    replica_reads().
+
+    Реплики - копии основной базы, поэтому связи между объектами из
+    разных баз допустимы, а миграции применяются только к основной.
+    """
+
+    def db_for_read(self, model, **hints):
+        if (getattr(_state, "replica_reads", False)
+                and settings.REPLICA_DATABASES
+                and model._meta.app_label in REPLICA_APP_LABELS):
+            return random.choice(settings.REPLICA_DATABASES)
+        return "default"
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == "default"
@@ -0,0 +1,17 @@
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+
+
+class TestRunner(DiscoverRunner):
+    """Запускает тесты с фоновыми задачами прямо в процессе тестов: пул
+    процессов открыл бы настоящую базу, а не тестовую.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.inline_workers = override_settings(POST_THUMBNAIL_WORKERS=0)
+        self.inline_workers.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.inline_workers.disable()
+        super().teardown_test_environment(**kwargs)
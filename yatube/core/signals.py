@@ -0,0 +1,15 @@
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+@receiver(connection_created)
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """Выполняет прагмы из ключа PRAGMAS настроек базы.
+
+    Прагмы идут мимо курсоров Django: они не попадают в журнал запросов
+    и не сбивают счёт запросов в тестах.
+    """
+    if connection.vendor != "sqlite":
+        return
+    for name, value in connection.settings_dict.get("PRAGMAS", {}).items():
+        connection.connection.execute(f"PRAGMA {name} = {value}")
@@ -0,0 +1,73 @@
+import gzip
+import io
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE = (
+    ".css", ".js", ".map", ".svg", ".ico", ".txt", ".json", ".xml", ".html",
+)
+# Сжатая копия не нужна, если она почти не меньше исходного файла.
+MIN_RATIO = 0.95
+
+
+def gzip_compress(content):
+    """gzip.compress с mtime=0, чтобы копия не менялась от сборки к сборке:
+    сам gzip.compress принимает mtime только с Python 3.8.
+    """
+    buffer = io.BytesIO()
+    with gzip.GzipFile(
+            fileobj=buffer, mode="wb", compresslevel=9, mtime=0) as file:
+        file.write(content)
+    return buffer.getvalue()
+
+
+def compressors():
+    yield ".gz", gzip_compress
+    if brotli is not None:
+        yield ".br", lambda content: brotli.compress(content, quality=11)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Статика с хешем содержимого в имени и заранее сжатыми копиями
+    рядом: name.gz и, если установлен пакет brotli, name.br.
+    """
+
+    manifest_strict = False
+
+    def stored_name(self, name):
+        # Без collectstatic (тесты, свежий клон) ссылки ведут на исходные
+        # имена, а не падают.
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        hashed_names = {}
+        for name, hashed_name, processed in super().post_process(
+                paths, dry_run, **options):
+            if hashed_name and not isinstance(processed, Exception):
+                hashed_names[name] = hashed_name
+            yield name, hashed_name, processed
+        if dry_run:
+            return
+        for hashed_name in hashed_names.values():
+            if hashed_name.endswith(COMPRESSIBLE):
+                self.compress(hashed_name)
+
+    def compress(self, name):
+        with self.open(name) as source:
+            content = source.read()
+        for suffix, compress in compressors():
+            compressed = compress(content)
+            if len(compressed) >= len(content) * MIN_RATIO:
+                continue
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+            self.save(name + suffix, ContentFile(compressed))
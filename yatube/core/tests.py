@@ -0,0 +1,428 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import time
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.contrib.auth import get_user
+from django.contrib.sessions.backends.db import SessionStore
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections
+from django.template import Context, Engine, TemplateDoesNotExist
+from django.test import (
+    Client, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from posts.caching import (
+    INDEX_SCOPE, NAMES_SCOPE, author_scope, modified_key,
+)
+from posts.models import Post, User
+from yatube.settings import REPLICA_STICKY_SECONDS
+
+from core.cache import check_stamp, expire_process_caches
+from core.middleware import ReadPrimaryAfterWriteMiddleware
+from core.query_budgets import QueryRecorder, load_budgets, save_budgets
+from core.routers import PRIMARY_COOKIE, ReplicaRouter, replica_reads
+from core.storage import brotli
+from core.timing import RequestTimings
+
+CSS_NAME = "css/site.css"
+CSS = b"body { color: black; }\n" * 100
+STATIC_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+STATIC_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+TEMPLATE_NAME = "page.html"
+REPLICA = "replica1"
+AUTHOR_USERNAME = "Abraham"
+POST_TEXT = "Тестовый текст"
+INDEX_URL = reverse("posts:index")
+
+
+@override_settings(
+    STATICFILES_DIRS=[STATIC_DIR], STATIC_ROOT=STATIC_ROOT, DEBUG=False)
+class PrecompressedStaticTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        os.makedirs(os.path.join(STATIC_DIR, "css"))
+        with open(os.path.join(STATIC_DIR, CSS_NAME), "wb") as css:
+            css.write(CSS)
+        call_command("collectstatic", interactive=False, verbosity=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(STATIC_DIR, ignore_errors=True)
+        shutil.rmtree(STATIC_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.url = staticfiles_storage.url(CSS_NAME)
+        self.guest = Client()
+
+    def test_collectstatic_writes_hashed_and_compressed_files(self):
+        """collectstatic пишет файл с хешем в имени и его сжатые копии."""
+        name = staticfiles_storage.stored_name(CSS_NAME)
+        self.assertNotEqual(name, CSS_NAME)
+        self.assertTrue(self.url.endswith(name))
+        suffixes = [".gz", ".br"] if brotli is not None else [".gz"]
+        for suffix in suffixes:
+            with self.subTest(suffix=suffix):
+                self.assertTrue(staticfiles_storage.exists(name + suffix))
+
+    def test_compressed_variant_is_served(self):
+        """Клиенту, который принимает gzip, отдаётся готовая сжатая копия
+        с заголовками для вечного кеша.
+        """
+        response = self.guest.get(self.url, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["Content-Type"], "text/css")
+        self.assertIn("immutable", response["Cache-Control"])
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertEqual(
+            gzip.decompress(b"".join(response.streaming_content)), CSS)
+
+    @skipUnless(brotli, "пакет brotli не установлен")
+    def test_brotli_is_preferred(self):
+        response = self.guest.get(self.url, HTTP_ACCEPT_ENCODING="gzip, br")
+        self.assertEqual(response["Content-Encoding"], "br")
+
+    def test_identity_and_unhashed_names(self):
+        """Без Accept-Encoding отдаётся исходный файл; файл без хеша
+        в имени кешируется ненадолго.
+        """
+        response = self.guest.get(self.url)
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertEqual(b"".join(response.streaming_content), CSS)
+        response = self.guest.get(settings.STATIC_URL + CSS_NAME)
+        self.assertNotIn("immutable", response["Cache-Control"])
+
+    def test_files_outside_static_root_are_not_served(self):
+        response = self.guest.get(settings.STATIC_URL + "../manage.py")
+        self.assertEqual(response.status_code, 404)
+
+
+class CachedLoaderTest(SimpleTestCase):
+    def setUp(self):
+        self.templates_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.templates_dir, TEMPLATE_NAME)
+        self.write("Первая версия")
+
+    def tearDown(self):
+        shutil.rmtree(self.templates_dir, ignore_errors=True)
+
+    def write(self, text):
+        with open(self.path, "w") as template:
+            template.write(text)
+        # Правка в пределах одной секунды могла бы не изменить mtime.
+        mtime = os.stat(self.path).st_mtime + 1
+        os.utime(self.path, (mtime, mtime))
+
+    def render(self, engine):
+        return engine.get_template(TEMPLATE_NAME).render(Context())
+
+    def make_engine(self, check_mtime):
+        return Engine(dirs=[self.templates_dir], loaders=[
+            ("core.loaders.CachedLoader", [
+                "django.template.loaders.filesystem.Loader",
+            ], check_mtime),
+        ])
+
+    def test_templates_are_compiled_once(self):
+        """Без проверки mtime шаблон компилируется один раз."""
+        engine = self.make_engine(check_mtime=False)
+        self.assertIs(
+            engine.get_template(TEMPLATE_NAME),
+            engine.get_template(TEMPLATE_NAME))
+        self.write("Вторая версия")
+        self.assertEqual(self.render(engine), "Первая версия")
+
+    def test_changed_template_is_reloaded(self):
+        """С проверкой mtime правка файла видна без перезапуска, а
+        неизменный шаблон берётся из кеша.
+        """
+        engine = self.make_engine(check_mtime=True)
+        self.assertIs(
+            engine.get_template(TEMPLATE_NAME),
+            engine.get_template(TEMPLATE_NAME))
+        self.write("Вторая версия")
+        self.assertEqual(self.render(engine), "Вторая версия")
+
+    def test_missing_template_is_not_remembered(self):
+        engine = self.make_engine(check_mtime=True)
+        os.remove(self.path)
+        with self.assertRaises(TemplateDoesNotExist):
+            engine.get_template(TEMPLATE_NAME)
+        self.write("Снова на месте")
+        self.assertEqual(self.render(engine), "Снова на месте")
+
+
+# Кеш целых страниц отдал бы повторный запрос гостя, не дойдя до view.
+@mock.patch("core.middleware.PAGE_CACHE_NAMESPACES", ())
+@override_settings(REPLICA_DATABASES=[REPLICA])
+class ReplicaRouterTest(TransactionTestCase):
+    # Реплика - зеркало тестовой базы: она видит только закоммиченные
+    # данные, поэтому тест без общей транзакции.
+    databases = {"default", REPLICA}
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username=AUTHOR_USERNAME)
+        self.post = Post.objects.create(author=self.user, text=POST_TEXT)
+        self.author = Client()
+        self.author.force_login(self.user)
+
+    def age_feeds(self, seconds=REPLICA_STICKY_SECONDS + 5):
+        """Делает вид, что ленты правили seconds секунд назад."""
+        cache.set_many({
+            modified_key(scope): int(time.time()) - seconds
+            for scope in [INDEX_SCOPE, NAMES_SCOPE,
+                          author_scope(AUTHOR_USERNAME)]
+        }, None)
+
+    def replica_queries(self, url):
+        with CaptureQueriesContext(connections[REPLICA]) as queries:
+            self.assertContains(self.author.get(url), POST_TEXT)
+        return len(queries)
+
+    def test_routing(self):
+        """Записи и чтение пользователей идут в основную базу, чтение
+        постов внутри replica_reads - с реплики.
+        """
+        router = ReplicaRouter()
+        self.assertEqual(router.db_for_read(Post), "default")
+        with replica_reads():
+            self.assertEqual(router.db_for_read(Post), REPLICA)
+            self.assertEqual(router.db_for_read(User), "default")
+            self.assertEqual(router.db_for_write(Post), "default")
+        self.assertFalse(router.allow_migrate(REPLICA, "posts"))
+
+    def test_feeds_are_read_from_replica(self):
+        self.age_feeds()
+        for url in [INDEX_URL, reverse("posts:profile",
+                                       args=[AUTHOR_USERNAME])]:
+            with self.subTest(url=url):
+                self.assertGreater(self.replica_queries(url), 0)
+
+    def test_recently_changed_feeds_are_read_from_primary(self):
+        """Ленту, которую только что правили, все читают с основной
+        базы: иначе отставшая реплика попала бы в кеши под новой
+        версией ленты.
+        """
+        self.age_feeds()
+        Post.objects.create(author=self.user, text="Новый пост")
+        self.assertEqual(self.replica_queries(INDEX_URL), 0)
+        self.assertEqual(self.replica_queries(
+            reverse("posts:post_detail", args=[self.post.id])), 0)
+
+    def test_author_reads_primary_after_write(self):
+        """После своей правки автор какое-то время читает с основной
+        базы и сразу видит изменения.
+        """
+        response = self.author.post(
+            reverse("posts:post_edit", args=[self.post.id]),
+            {"text": POST_TEXT})
+        self.assertIn(PRIMARY_COOKIE, response.cookies)
+        self.age_feeds()
+        self.assertEqual(self.replica_queries(INDEX_URL), 0)
+
+
+class SqlitePragmasTest(SimpleTestCase):
+    def test_pragmas_are_applied_to_new_connections(self):
+        """Новое соединение с файлом базы переходит в WAL и получает
+        прагмы из настроек.
+        """
+        workdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, workdir, ignore_errors=True)
+        primary = connections["default"]
+        wrapper = type(primary)({
+            **primary.settings_dict,
+            "NAME": os.path.join(workdir, "db.sqlite3"),
+        }, alias="pragmas")
+        self.addCleanup(wrapper.close)
+        wrapper.ensure_connection()
+        pragmas = settings.DATABASES["default"]["PRAGMAS"]
+        for name, value in [
+            ("journal_mode", "wal"),
+            ("synchronous", 1),
+            ("busy_timeout", pragmas["busy_timeout"]),
+        ]:
+            with self.subTest(pragma=name):
+                self.assertEqual(
+                    wrapper.connection.execute(
+                        f"PRAGMA {name}").fetchone()[0],
+                    value)
+
+
+def server_timing(response):
+    """Заголовок Server-Timing: метрика -> параметры."""
+    metrics = {}
+    for item in response["Server-Timing"].split(", "):
+        name, *params = item.split(";")
+        metrics[name] = dict(param.split("=", 1) for param in params)
+    return metrics
+
+
+@mock.patch("core.middleware.PAGE_CACHE_NAMESPACES", ())
+@mock.patch("core.middleware.SERVER_TIMING_SAMPLE_RATE", 1)
+class ServerTimingTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=AUTHOR_USERNAME)
+        Post.objects.create(author=cls.user, text=POST_TEXT)
+
+    def setUp(self):
+        self.author = Client()
+        self.author.force_login(self.user)
+
+    def test_header_breaks_request_down(self):
+        """SQL, шаблоны и кеш попадают в Server-Timing, счётчик SQL
+        совпадает с числом запросов к базе.
+        """
+        with CaptureQueriesContext(connections["default"]) as queries:
+            response = self.author.get(INDEX_URL)
+        metrics = server_timing(response)
+        self.assertEqual(
+            metrics["sql"]["desc"], f'"queries={len(queries)}"')
+        self.assertEqual(metrics["tpl"]["desc"], '"renders=1"')
+        self.assertIn("misses=", metrics["cache"]["desc"])
+        total = float(metrics["total"]["dur"])
+        self.assertLessEqual(
+            sum(float(metrics[name]["dur"]) for name in ("sql", "tpl")),
+            total)
+
+    def test_unsampled_requests_are_not_measured(self):
+        with mock.patch("core.middleware.SERVER_TIMING_SAMPLE_RATE", 0):
+            response = self.author.get(INDEX_URL)
+        self.assertNotIn("Server-Timing", response)
+
+    def test_log_line(self):
+        with mock.patch("core.middleware.SERVER_TIMING_LOG", True), \
+                self.assertLogs("yatube.timing") as logs:
+            self.author.get(INDEX_URL)
+        line = json.loads(logs.records[0].getMessage())
+        self.assertEqual(line["path"], INDEX_URL)
+        self.assertEqual(line["status"], 200)
+        self.assertGreater(line["sql_count"], 0)
+
+    def test_nested_time_counts_once(self):
+        """Время SQL внутри рендера не входит во время шаблонов."""
+        timings = RequestTimings()
+        with timings.measure("tpl"), timings.measure("sql"):
+            with timings.measure("sql"):
+                sum(range(200000))
+        self.assertEqual(timings.counts["sql"], 1)
+        self.assertLess(timings.durations["tpl"], timings.durations["sql"])
+        self.assertLessEqual(
+            timings.durations["tpl"] + timings.durations["sql"],
+            timings.total())
+
+
+@mock.patch("core.middleware.PAGE_CACHE_NAMESPACES", ())
+class QueryRecorderTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        for number in range(3):
+            Post.objects.create(
+                author=User.objects.create_user(username=f"user{number}"),
+                text=POST_TEXT)
+
+    def test_client_requests_are_recorded_by_route(self):
+        with QueryRecorder() as recorder, CaptureQueriesContext(
+                connections["default"]) as queries:
+            Client().get(INDEX_URL)
+        key = "GET posts:index guest"
+        self.assertEqual(recorder.observed(), {key: len(queries)})
+        self.assertIn(key, recorder.failure_message({key: 0}))
+        self.assertIsNone(recorder.failure_message({key: len(queries)}))
+
+    def test_update_records_lower_budgets(self):
+        """Обновление записывает наблюдаемые числа, в том числе меньше
+        прежних, и не трогает другие разделы.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "budgets.json")
+            save_budgets("django", {"GET posts:index guest": 5}, path)
+            save_budgets("pytest", {"GET posts:index guest": 4}, path)
+            save_budgets("django", {"GET posts:index guest": 1}, path)
+            self.assertEqual(
+                load_budgets("django", path), {"GET posts:index guest": 1})
+            self.assertEqual(
+                load_budgets("pytest", path), {"GET posts:index guest": 4})
+
+    def test_duplicates_point_to_template_line(self):
+        """Повторяющийся запрос из цикла шаблона - подпись N+1 со
+        строкой шаблона, где он выполнен.
+        """
+        engine = Engine(loaders=[("django.template.loaders.locmem.Loader", {
+            TEMPLATE_NAME: (
+                "{% for post in posts %}\n"
+                "{{ post.author.username }}\n"
+                "{% endfor %}"),
+        })])
+        with QueryRecorder() as recorder:
+            recorder.started(None, environ={
+                "PATH_INFO": INDEX_URL, "REQUEST_METHOD": "GET"})
+            engine.get_template(TEMPLATE_NAME).render(
+                Context({"posts": Post.objects.all()}))
+            recorder.finished(None)
+        [(sql, (times, locations))] = recorder.records[0].duplicates().items()
+        self.assertIn("auth_user", sql)
+        self.assertEqual(times, 3)
+        self.assertEqual(locations, [f"{TEMPLATE_NAME}:2"])
+
+    def test_location_skips_middleware(self):
+        """Запрос из кода Django за middleware проекта приписывается
+        не строке middleware, которая передала запрос дальше.
+        """
+        request = RequestFactory().get(INDEX_URL)
+        request.session = SessionStore("0" * 32)
+        with QueryRecorder() as recorder:
+            recorder.started(None, environ={
+                "PATH_INFO": INDEX_URL, "REQUEST_METHOD": "GET"})
+            ReadPrimaryAfterWriteMiddleware(get_user)(request)
+            recorder.finished(None)
+        [(sql, location)] = recorder.records[0].queries
+        self.assertIn("django_session", sql)
+        self.assertTrue(location.startswith("core/tests.py:"), location)
+
+
+class CacheStampTest(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.stamp = os.path.join(directory, "cache.stamp")
+        override = override_settings(CACHE_STAMP_FILE=self.stamp)
+        override.enable()
+        self.addCleanup(override.disable)
+        cache.clear()
+
+    def test_stamp_from_other_process_clears_cache(self):
+        """Процесс очищает кеш, когда другой процесс отметил его
+        устаревшим, и только один раз.
+        """
+        check_stamp()
+        cache.set("key", "old")
+        # Отметка другого процесса: свою expire_process_caches учитывает.
+        with open(self.stamp, "a"):
+            pass
+        os.utime(self.stamp, ns=(1, 1))
+        check_stamp()
+        self.assertIsNone(cache.get("key"))
+        cache.set("key", "new")
+        check_stamp()
+        self.assertEqual(cache.get("key"), "new")
+
+    def test_own_stamp_does_not_clear_cache_twice(self):
+        check_stamp()
+        expire_process_caches()
+        cache.set("key", "primed")
+        check_stamp()
+        self.assertEqual(cache.get("key"), "primed")
@@ -0,0 +1,114 @@
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+_local = threading.local()
+# Метрика -> что считает её счётчик, в порядке вывода. Заголовки HTTP
+# бывают только latin-1, поэтому описания латиницей.
+METRICS = {
+    "sql": "queries",
+    "tpl": "renders",
+    "cache": "calls",
+    "thumb": "calls",
+}
+
+
+class RequestTimings:
+    """Время и счётчики одного запроса по видам работы.
+
+    Время каждой метрики собственное: вложенная работа другого вида
+    (SQL из шаблона, кеш из миниатюр) вычитается и учитывается только
+    в своей метрике, поэтому сумма метрик не больше времени запроса.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.durations = defaultdict(float)
+        self.counts = Counter()
+        self.active = set()
+        self.measured = 0.0
+
+    @contextmanager
+    def measure(self, name):
+        # Повторный вход в ту же метрику (шаблон внутри шаблона) уже
+        # учтён внешним замером.
+        if name in self.active:
+            yield
+            return
+        self.active.add(name)
+        started, measured = time.perf_counter(), self.measured
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started - (
+                self.measured - measured)
+            self.durations[name] += elapsed
+            self.measured += elapsed
+            self.counts[name] += 1
+            self.active.discard(name)
+
+    def total(self):
+        return time.perf_counter() - self.started
+
+    def header(self):
+        """Значение заголовка Server-Timing, длительности в мс."""
+        items = []
+        for name, unit in METRICS.items():
+            if name not in self.counts:
+                continue
+            desc = f"{unit}={self.counts[name]}"
+            if name == "cache":
+                desc = (
+                    f"hits={self.counts['cache_hit']} "
+                    f"misses={self.counts['cache_miss']}")
+            items.append(
+                f'{name};dur={self.durations[name] * 1000:.2f};desc="{desc}"')
+        items.append(f"total;dur={self.total() * 1000:.2f}")
+        return ", ".join(items)
+
+    def as_dict(self):
+        data = {"total_ms": round(self.total() * 1000, 2)}
+        for name in METRICS:
+            data[f"{name}_ms"] = round(self.durations[name] * 1000, 2)
+            data[f"{name}_count"] = self.counts[name]
+        data["cache_hits"] = self.counts["cache_hit"]
+        data["cache_misses"] = self.counts["cache_miss"]
+        return data
+
+
+def current():
+    """Замер текущего запроса или None, если запрос не в выборке."""
+    return getattr(_local, "timings", None)
+
+
+@contextmanager
+def activate(timings):
+    _local.timings = timings
+    try:
+        yield timings
+    finally:
+        _local.timings = None
+
+
+@contextmanager
+def measure(name):
+    """Засчитывает время блока в метрику name, если запрос замеряется."""
+    timings = current()
+    if timings is None:
+        yield
+        return
+    with timings.measure(name):
+        yield
+
+
+def count(name, number=1):
+    timings = current()
+    if timings is not None:
+        timings.counts[name] += number
+
+
+def sql_timer(execute, sql, params, many, context):
+    """execute_wrapper соединения: время SQL запроса в метрику sql."""
+    with measure("sql"):
+        return execute(sql, params, many, context)
@@ -1,6 +1,8 @@
 from django.contrib import admin
+from django.db.models.expressions import RawSQL
+from search.index import match_expression, match_ids_sql
 
-from .models import Group, Post
+from .models import Follow, Group, Post
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -10,6 +12,20 @@ class PostAdmin(admin.ModelAdmin):
     empty_value_display = "-пусто-"
     list_editable = ("group",)
 
+    def get_search_results(self, request, queryset, search_term):
+        """Ищет по полнотекстовому индексу вместо LIKE '%...%'."""
+        match = match_expression(search_term)
+        if match is None:
+            return queryset, False
+        return queryset.filter(
+            pk__in=RawSQL(match_ids_sql(), [match])), False
+
+
+class FollowAdmin(admin.ModelAdmin):
+    list_display = ("pk", "user", "author")
+    search_fields = ("user__username", "author__username")
+
 
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group)
+admin.site.register(Follow, FollowAdmin)
@@ -0,0 +1,184 @@
+import hashlib
+import time
+from urllib.parse import quote
+
+from django.core.cache import cache
+from django.db import transaction
+
+from yatube.settings import (
+    FEED_VERSION_CACHE_TIMEOUT, POST_CARD_CACHE_TIMEOUT,
+    POST_COUNT_CACHE_TIMEOUT,
+)
+
+COUNT_KEY = "posts:count:{}"
+VERSION_KEY = "posts:version:{}"
+MODIFIED_KEY = "posts:modified:{}"
+CARD_KEY = "posts:card:{}:{}"
+INDEX_SCOPE = "index"
+# Версия имён групп и авторов, которые видны во всех лентах.
+NAMES_SCOPE = "names"
+
+
+def group_scope(slug):
+    return f"group:{slug}"
+
+
+def author_scope(username):
+    return f"author:{username}"
+
+
+def post_scopes(username, slug=None):
+    """Ленты, в которых показывается пост автора username из группы slug."""
+    scopes = [INDEX_SCOPE, author_scope(username)]
+    if slug is not None:
+        scopes.append(group_scope(slug))
+    return scopes
+
+
+def count_key(scope):
+    return COUNT_KEY.format(quote(scope))
+
+
+def get_count(scope):
+    return cache.get(count_key(scope))
+
+
+def add_count(scope, count):
+    """Записывает итог ленты, посчитанный при чтении, если его ещё нет:
+    итог, который тем временем сдвинула правка, не затирается.
+    """
+    cache.add(count_key(scope), count, POST_COUNT_CACHE_TIMEOUT)
+
+
+def forget_counts(scopes):
+    cache.delete_many([count_key(scope) for scope in scopes])
+
+
+def adjust_counts(scopes, delta):
+    """Сдвигает закешированные итоги лент; холодные ключи не трогает."""
+    for scope in scopes:
+        try:
+            cache.incr(count_key(scope), delta)
+        except ValueError:
+            pass
+
+
+def version_key(scope):
+    return VERSION_KEY.format(quote(scope))
+
+
+def new_version():
+    # Версия, вытесненная из кеша, не должна начаться заново с единицы
+    # и совпасть с уже закешированными фрагментами.
+    return int(time.time() * 1000)
+
+
+def modified_key(scope):
+    return MODIFIED_KEY.format(quote(scope))
+
+
+def _get_or_add(keys, default):
+    values = cache.get_many(keys)
+    for key in keys:
+        if key not in values:
+            value = default()
+            cache.add(key, value, FEED_VERSION_CACHE_TIMEOUT)
+            # Ключ мог сразу вытесниться, а кеш-заглушка не хранит ничего.
+            values[key] = cache.get(key, value)
+    return [values[key] for key in keys]
+
+
+def get_versions(scopes):
+    return _get_or_add([version_key(scope) for scope in scopes], new_version)
+
+
+def last_modified(scopes):
+    """Время последней правки в лентах scopes, в секундах от эпохи.
+
+    По холодному кешу время неизвестно и считается текущим.
+    """
+    return max(_get_or_add(
+        [modified_key(scope) for scope in scopes],
+        lambda: int(time.time())))
+
+
+def modified_within(scopes, seconds):
+    """Правили ли ленты scopes за последние seconds секунд.
+
+    По холодному кешу время правки неизвестно и считается текущим.
+    """
+    # Время правки округлено вниз до секунды.
+    return time.time() - last_modified(scopes) < seconds + 1
+
+
+def remember_versions(request, scopes):
+    """Запоминает в request версии лент, от которых зависит страница:
+    по ним кеш целых страниц узнаёт, что страница устарела.
+
+    Вызывается до чтения лент из БД.
+    """
+    versions = get_versions(scopes)
+    request.page_versions = dict(zip(scopes, versions))
+    return versions
+
+
+def fragment_version(scope, request=None):
+    """Ключ фрагмента ленты: меняется с каждой правкой в ней."""
+    scopes = [scope, NAMES_SCOPE]
+    if request is not None:
+        version, names = remember_versions(request, scopes)
+    else:
+        version, names = get_versions(scopes)
+    return f"{scope}:{version}:{names}"
+
+
+def _bump(scopes):
+    for scope in scopes:
+        try:
+            cache.incr(version_key(scope))
+        except ValueError:
+            cache.set(
+                version_key(scope), new_version(), FEED_VERSION_CACHE_TIMEOUT)
+    cache.set_many(
+        {modified_key(scope): int(time.time()) for scope in scopes},
+        FEED_VERSION_CACHE_TIMEOUT)
+
+
+def bump_versions(scopes):
+    """Делает устаревшими фрагменты лент scopes.
+
+    Версии сдвигаются сразу и ещё раз после фиксации транзакции: иначе
+    параллельный запрос успел бы закешировать старые данные под новой
+    версией.
+    """
+    scopes = list(scopes)
+    _bump(scopes)
+    transaction.on_commit(lambda: _bump(scopes))
+
+
+def card_key(template_name, post):
+    """Ключ карточки поста: меняется вместе с любыми показанными в ней
+    данными поста, его группы и автора.
+    """
+    group = post.group if post.group_id is not None else None
+    content = "\x1f".join(map(str, (
+        template_name,
+        post.text,
+        post.pub_date.isoformat(),
+        post.image.name,
+        getattr(post, "thumbnail", None),
+        group and group.slug,
+        group and group.title,
+        post.author.username,
+        post.author.get_full_name(),
+    )))
+    return CARD_KEY.format(
+        post.pk, hashlib.md5(content.encode()).hexdigest())
+
+
+def get_cards(keys):
+    return cache.get_many(keys)
+
+
+def set_cards(cards):
+    cache.set_many(cards, POST_CARD_CACHE_TIMEOUT)
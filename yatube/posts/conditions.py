@@ -0,0 +1,73 @@
+import hashlib
+from datetime import datetime
+
+from django.utils import timezone
+from django.views.decorators.http import condition
+
+from .caching import NAMES_SCOPE, author_scope, fragment_version, last_modified
+from .models import Post
+
+
+def make_etag(request, *parts):
+    # Шапка и кнопки страницы зависят от того, кто её смотрит.
+    parts = (*parts, request.user.pk)
+    return hashlib.md5(":".join(map(str, parts)).encode()).hexdigest()
+
+
+def from_timestamp(seconds):
+    return datetime.fromtimestamp(seconds, tz=timezone.utc)
+
+
+def aware(value):
+    # При USE_TZ = False даты из БД - в местном времени без пояса.
+    return value if timezone.is_aware(value) else timezone.make_aware(value)
+
+
+def feed_condition(scope_of):
+    """Отвечает 304 на повторный запрос ленты scope_of(**kwargs), пока
+    в ней ничего не менялось.
+
+    Валидаторы берутся из версий ленты в кеше: ни запроса постов, ни
+    рендера шаблона для ответа 304 не нужно.
+    """
+
+    def etag(request, **kwargs):
+        return make_etag(request, fragment_version(scope_of(**kwargs)))
+
+    def modified(request, **kwargs):
+        return from_timestamp(
+            last_modified([scope_of(**kwargs), NAMES_SCOPE]))
+
+    return condition(etag_func=etag, last_modified_func=modified)
+
+
+def get_post(request, post_id):
+    """Пост страницы post_detail: один запрос и для валидаторов, и для
+    самой страницы.
+    """
+    if not hasattr(request, "_post"):
+        request._post = Post.objects.select_related(
+            "author__stats", "group").filter(pk=post_id).first()
+    return request._post
+
+
+def post_etag(request, post_id):
+    post = get_post(request, post_id)
+    if post is None:
+        return None
+    # Версия ленты автора меняется и со счётчиком его постов.
+    return make_etag(
+        request, post.pk, post.updated.isoformat(),
+        fragment_version(author_scope(post.author.username)))
+
+
+def post_last_modified(request, post_id):
+    post = get_post(request, post_id)
+    if post is None:
+        return None
+    return max(aware(post.updated), from_timestamp(last_modified(
+        [author_scope(post.author.username), NAMES_SCOPE])))
+
+
+post_condition = condition(
+    etag_func=post_etag, last_modified_func=post_last_modified)
@@ -0,0 +1,84 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from yatube.settings import POST_COUNT_CACHE_TIMEOUT
+
+from .caching import INDEX_SCOPE, author_scope, count_key, group_scope
+from .models import AuthorStats, Follow, Group, Post
+
+
+def change_author_count(author_id, delta):
+    updated = AuthorStats.objects.filter(
+        author_id=author_id, posts_count__gte=-delta,
+    ).update(posts_count=F("posts_count") + delta)
+    if not updated and delta > 0:
+        # Первый пост автора: строки счётчика ещё нет.
+        AuthorStats.objects.get_or_create(
+            author_id=author_id,
+            defaults={
+                "posts_count": Post.objects.filter(author_id=author_id).count()
+            },
+        )
+
+
+def change_followers_count(author_id, delta):
+    updated = AuthorStats.objects.filter(
+        author_id=author_id, followers_count__gte=-delta,
+    ).update(followers_count=F("followers_count") + delta)
+    if not updated and delta > 0:
+        AuthorStats.objects.get_or_create(
+            author_id=author_id,
+            defaults={
+                "posts_count": Post.objects.filter(
+                    author_id=author_id).count(),
+                "followers_count": Follow.objects.filter(
+                    author_id=author_id).count(),
+            },
+        )
+
+
+def change_group_count(group_id, delta):
+    if group_id is None:
+        return
+    Group.objects.filter(pk=group_id, posts_count__gte=-delta).update(
+        posts_count=F("posts_count") + delta)
+
+
+def rebuild_counters():
+    """Пересчитывает все счётчики постов и подписчиков."""
+    group_counts = Post.objects.filter(group=OuterRef("pk")).order_by(
+    ).values("group").annotate(total=Count("pk")).values("total")
+    with transaction.atomic():
+        groups = Group.objects.update(posts_count=Coalesce(
+            Subquery(group_counts, output_field=IntegerField()), 0))
+        posts = dict(Post.objects.order_by().values_list(
+            "author").annotate(total=Count("pk")))
+        followers = dict(Follow.objects.order_by().values_list(
+            "author").annotate(total=Count("pk")))
+        AuthorStats.objects.all().delete()
+        authors = AuthorStats.objects.bulk_create(
+            AuthorStats(
+                author_id=author_id,
+                posts_count=posts.get(author_id, 0),
+                followers_count=followers.get(author_id, 0),
+            )
+            for author_id in posts.keys() | followers.keys()
+        )
+    return groups, len(authors)
+
+
+def prime_cached_counts():
+    """Записывает в кеш итоги лент по свежим счётчикам."""
+    counts = {INDEX_SCOPE: Post.objects.count()}
+    counts.update(
+        (group_scope(slug), total)
+        for slug, total in Group.objects.values_list("slug", "posts_count"))
+    counts.update(
+        (author_scope(username), total)
+        for username, total in AuthorStats.objects.values_list(
+            "author__username", "posts_count"))
+    cache.set_many(
+        {count_key(scope): total for scope, total in counts.items()},
+        POST_COUNT_CACHE_TIMEOUT)
@@ -0,0 +1,139 @@
+import random
+from datetime import datetime, timedelta
+from io import BytesIO
+from itertools import accumulate
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from PIL import Image
+from yatube.settings import IMPORT_BATCH_SIZE
+
+from .imports import Importer
+from .models import Post
+
+COLUMNS = ("text", "pub_date", "updated", "author", "group", "image")
+WORDS = (
+    "пост лента группа автор подписка город утро вечер кофе книга фильм "
+    "музыка поезд море горы лес река дождь снег солнце работа отпуск код "
+    "сервер запрос кеш база индекс шаблон страница картинка фото друг "
+    "семья кот собака прогулка новость заметка мысль вопрос ответ идея "
+    "проект релиз ошибка тест замер скорость память очередь реплика"
+).split()
+
+
+def zipf_weights(count, skew):
+    """Накопленные веса рангов 1..count по закону Ципфа: первые группы
+    и авторы получают большую часть постов, как на живом сайте.
+    """
+    return list(accumulate(1 / rank ** skew for rank in range(1, count + 1)))
+
+
+def make_images(count, width, height, seed):
+    """count разных JPEG в хранилище; посты делят их между собой."""
+    names = []
+    for number in range(count):
+        image = Image.effect_noise((width, height), 32 + number).convert(
+            "RGB")
+        buffer = BytesIO()
+        image.save(buffer, "JPEG", quality=85)
+        names.append(default_storage.save(
+            f"posts/dataset-{seed}-{number}.jpg",
+            ContentFile(buffer.getvalue())))
+    return names
+
+
+class DatasetGenerator:
+    """Заполняет базу синтетическими пользователями, группами и постами
+    пачками в одной транзакции, без сигналов на каждый пост.
+
+    Размеры групп и активность авторов распределены по Ципфу с
+    показателем skew, даты публикации растут вместе с id и покрывают
+    последние days дней. Производные данные (счётчики, поиск, ленты
+    подписок) обновляет finish() импорта один раз в конце.
+    """
+
+    def __init__(self, users, groups, skew=1.1, no_group=0.2, days=365,
+                 images=(), image_share=0.0, prefix="gen", seed=0,
+                 batch_size=IMPORT_BATCH_SIZE):
+        self.random = random.Random(seed)
+        self.importer = Importer(batch_size)
+        self.usernames = [f"{prefix}{number}" for number in range(users)]
+        self.slugs = [f"{prefix}-group-{number}" for number in range(groups)]
+        self.author_weights = zipf_weights(users, skew)
+        self.group_weights = zipf_weights(groups, skew)
+        self.no_group = no_group
+        self.days = days
+        self.images = list(images)
+        self.image_share = image_share
+
+    @property
+    def batch_size(self):
+        return self.importer.batch_size
+
+    def create_users_and_groups(self):
+        importer = self.importer
+        for start in range(0, len(self.usernames), self.batch_size):
+            with transaction.atomic():
+                importer.resolve_authors(
+                    set(self.usernames[start:start + self.batch_size]))
+        for start in range(0, len(self.slugs), self.batch_size):
+            with transaction.atomic():
+                importer.resolve_groups({
+                    slug: f"Группа {slug}"
+                    for slug in self.slugs[start:start + self.batch_size]
+                })
+        self.author_ids = [
+            importer.authors[username] for username in self.usernames]
+        self.group_ids = [importer.groups[slug] for slug in self.slugs]
+
+    def make_rows(self, count, pub_date, step):
+        rng = self.random
+        authors = rng.choices(
+            self.author_ids, cum_weights=self.author_weights, k=count)
+        groups = rng.choices(
+            self.group_ids, cum_weights=self.group_weights, k=count,
+        ) if self.group_ids else [None] * count
+        adapt = connection.ops.adapt_datetimefield_value
+        rows = []
+        for author_id, group_id in zip(authors, groups):
+            pub_date += step
+            stamp = adapt(pub_date)
+            rows.append((
+                " ".join(rng.choices(WORDS, k=rng.randint(5, 60))),
+                stamp,
+                stamp,
+                author_id,
+                None if rng.random() < self.no_group else group_id,
+                rng.choice(self.images)
+                if self.images and rng.random() < self.image_share else "",
+            ))
+        return rows, pub_date
+
+    def generate(self, posts):
+        """Создаёт posts постов; возвращает число созданных.
+
+        Посты вставляются executemany без модели: на миллионах строк
+        сборка INSERT через ORM обходится дороже самой вставки.
+        """
+        self.create_users_and_groups()
+        if not posts or not self.author_ids:
+            return 0
+        step = timedelta(days=self.days) / posts
+        pub_date = datetime.now() - timedelta(days=self.days)
+        columns = ", ".join(
+            Post._meta.get_field(name).column for name in COLUMNS)
+        sql = (
+            f"INSERT INTO {Post._meta.db_table} ({columns}) "
+            f"VALUES ({', '.join(['%s'] * len(COLUMNS))})"
+        )
+        for start in range(0, posts, self.batch_size):
+            rows, pub_date = self.make_rows(
+                min(self.batch_size, posts - start), pub_date, step)
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.executemany(sql, rows)
+            self.importer.imported += len(rows)
+        return self.importer.imported
+
+    def finish(self):
+        self.importer.finish()
@@ -0,0 +1,82 @@
+import csv
+import json
+from datetime import date, datetime
+
+from yatube.settings import EXPORT_CHUNK_SIZE
+
+from .models import Post
+
+# Поле выгрузки -> поле values_list(); автор и группа приходят JOIN'ом
+# в том же запросе, что и посты.
+COLUMNS = {
+    "id": "id",
+    "text": "text",
+    "pub_date": "pub_date",
+    "updated": "updated",
+    "author_id": "author_id",
+    "author": "author__username",
+    "group_id": "group_id",
+    "group": "group__slug",
+    "image": "image",
+}
+FIELDS = list(COLUMNS)
+CONTENT_TYPES = {
+    "ndjson": "application/x-ndjson; charset=utf-8",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def export_rows(group=None, author=None, since=None, until=None, after=0,
+                chunk_size=EXPORT_CHUNK_SIZE):
+    """Строки постов по возрастанию id, начиная после id after.
+
+    Посты читаются порциями по chunk_size с условием id > последнего
+    прочитанного: память не растёт с размером таблицы, а прерванную
+    выгрузку можно продолжить с последнего выгруженного id. since
+    и until - даты включительно.
+    """
+    queryset = Post.objects.order_by("pk")
+    if group is not None:
+        queryset = queryset.filter(group__slug=group)
+    if author is not None:
+        queryset = queryset.filter(author__username=author)
+    if since is not None:
+        queryset = queryset.filter(pub_date__date__gte=since)
+    if until is not None:
+        queryset = queryset.filter(pub_date__date__lte=until)
+    queryset = queryset.values_list(*COLUMNS.values())
+    while True:
+        rows = list(queryset.filter(pk__gt=after)[:chunk_size])
+        if not rows:
+            return
+        yield from rows
+        after = rows[-1][0]
+
+
+def plain(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(
+            dict(zip(FIELDS, map(plain, row))), ensure_ascii=False) + "\n"
+
+
+class Echo:
+    """Файл для csv.writer, который возвращает строку вместо записи."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(FIELDS)
+    for row in rows:
+        yield writer.writerow(map(plain, row))
+
+
+FORMATS = {"ndjson": ndjson_lines, "csv": csv_lines}
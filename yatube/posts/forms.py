@@ -1,12 +1,69 @@
 from django import forms
+from django.core.exceptions import ValidationError
+from PIL import Image
+from yatube.settings import (
+    POST_IMAGE_FORMATS, POST_IMAGE_MAX_PIXELS, POST_IMAGE_MAX_SIZE,
+)
 
 from .models import Post
 
 
+class HeaderImageField(forms.ImageField):
+    """Картинка, проверенная по заголовку файла.
+
+    Pillow читает только формат и размеры, а раскодирует картинку уже
+    фоновая обработка после сохранения поста.
+    """
+
+    default_error_messages = {
+        "too_large": "Файл больше %(limit)s МБ.",
+        "too_many_pixels": "Картинка больше %(limit)s мегапикселей.",
+    }
+
+    def to_python(self, data):
+        f = forms.FileField.to_python(self, data)
+        if f is None:
+            return None
+        if f.size > POST_IMAGE_MAX_SIZE:
+            raise ValidationError(
+                self.error_messages["too_large"],
+                code="too_large",
+                params={"limit": POST_IMAGE_MAX_SIZE // 2 ** 20},
+            )
+        if hasattr(data, "temporary_file_path"):
+            source = data.temporary_file_path()
+        else:
+            source = data
+        try:
+            with Image.open(source) as image:
+                image_format, (width, height) = image.format, image.size
+        except Exception as exc:
+            raise ValidationError(
+                self.error_messages["invalid_image"],
+                code="invalid_image",
+            ) from exc
+        if image_format not in POST_IMAGE_FORMATS:
+            raise ValidationError(
+                self.error_messages["invalid_image"],
+                code="invalid_image",
+            )
+        if width * height > POST_IMAGE_MAX_PIXELS:
+            raise ValidationError(
+                self.error_messages["too_many_pixels"],
+                code="too_many_pixels",
+                params={"limit": POST_IMAGE_MAX_PIXELS // 10 ** 6},
+            )
+        f.content_type = Image.MIME.get(image_format)
+        if hasattr(f, "seek") and callable(f.seek):
+            f.seek(0)
+        return f
+
+
 class PostForm(forms.ModelForm):
     class Meta:
         model = Post
         fields = ("text", "group", "image")
+        field_classes = {"image": HeaderImageField}
         labels = {
             "text": "Текст поста",
             "group": "Выберите группу",
@@ -0,0 +1,95 @@
+import tempfile
+
+from django.core.files import File
+from django.utils import timezone
+from PIL import Image, ImageOps
+from sorl.thumbnail import default
+from yatube.settings import POST_IMAGE_MAX_SIDE
+
+from .thumbnails import (
+    expire_image_fragments, generate_thumbnails, image_file,
+)
+
+NORMALIZED_DIR = "posts/normalized/"
+JPEG_QUALITY = 85
+
+
+def is_normalized(name):
+    return name.startswith(NORMALIZED_DIR)
+
+
+def normalize_image(name):
+    """Поворачивает картинку по EXIF, убирает метаданные и уменьшает её
+    до POST_IMAGE_MAX_SIDE по большей стороне, затем переключает посты
+    на новый файл.
+
+    Возвращает имя картинки, которую теперь показывают посты, или None,
+    если пост успел сменить картинку.
+    """
+    from .models import Post
+
+    storage = Post.image.field.storage
+    if not storage.exists(name):
+        # Такую же картинку другого поста уже обработали, и посты с ней
+        # переключены на результат.
+        return None
+    with storage.open(name) as source, Image.open(source) as image:
+        if getattr(image, "is_animated", False):
+            # Анимацию Pillow сохранил бы первым кадром.
+            return name
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((POST_IMAGE_MAX_SIDE, POST_IMAGE_MAX_SIDE))
+        if image.mode in ("RGBA", "LA") or "transparency" in image.info:
+            image_format, options = "PNG", {"optimize": True}
+            image = image.convert("RGBA")
+        else:
+            image_format, options = "JPEG", {
+                "quality": JPEG_QUALITY, "optimize": True}
+            image = image.convert("RGB")
+    with tempfile.TemporaryFile() as output:
+        # EXIF, ICC-профиль и прочие метаданные сохраняются, только если
+        # передать их явно.
+        image.save(output, image_format, **options)
+        output.seek(0)
+        normalized = storage.save(
+            f"{NORMALIZED_DIR}image.{image_format.lower()}", File(output))
+    # UPDATE минует auto_now, а от updated зависят ETag и Last-Modified
+    # страницы поста.
+    if not Post.objects.filter(image=name).update(
+            image=normalized, updated=timezone.now()):
+        release_image(normalized)
+        return None
+    # Такую же картинку могли загрузить снова, пока шла обработка: файл
+    # удаляется, только если на него больше никто не ссылается.
+    release_image(name)
+    return normalized
+
+
+def release_image(name):
+    """Удаляет картинку и её миниатюры, если посты на неё больше не
+    ссылаются.
+    """
+    from .models import Post
+
+    if Post.image.field.storage.is_referenced(name):
+        return
+    default.kvstore.delete(image_file(name))
+    Post.image.field.storage.delete(name)
+
+
+def process_image(name):
+    """Фоновая обработка загруженной картинки поста."""
+    if not is_normalized(name):
+        name = normalize_image(name)
+    if name is not None:
+        generate_thumbnails(name)
+    return name
+
+
+def expire_processed_image(name):
+    """Сбрасывает в кеше сайта ленты и страницы с картинкой, которую
+    обработал воркер: они показывали удалённый оригинал и не знали
+    о миниатюрах.
+    """
+    if name is not None:
+        expire_image_fragments(name)
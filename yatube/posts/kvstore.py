@@ -0,0 +1,100 @@
+import threading
+import time
+from collections import OrderedDict
+
+from sorl.thumbnail.conf import settings
+from sorl.thumbnail.kvstores.cached_db_kvstore import KVStore
+from sorl.thumbnail.models import KVStore as KVStoreModel
+from yatube.settings import THUMBNAIL_LRU_SIZE, THUMBNAIL_LRU_TIMEOUT
+
+
+class LRUKVStore(KVStore):
+    """Хранилище sorl-thumbnail с LRU-кешем процесса перед кешем Django
+    и БД.
+
+    Ключи миниатюр зависят от имени картинки и параметров, и значение
+    устаревает, только когда картинку удаляют. Удаление в другом процессе
+    сбрасывает только БД и кеш того процесса, поэтому запись живёт
+    THUMBNAIL_LRU_TIMEOUT секунд в LRU и THUMBNAIL_CACHE_TIMEOUT в кеше.
+    В LRU попадают только найденные значения: миниатюру, которой ещё нет,
+    может в любой момент создать воркер.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _recall(self, keys):
+        with self._lock:
+            now = time.monotonic()
+            found = {}
+            for key in keys:
+                if key not in self._lru:
+                    continue
+                value, expires = self._lru[key]
+                if expires <= now:
+                    del self._lru[key]
+                    continue
+                self._lru.move_to_end(key)
+                found[key] = value
+            return found
+
+    def _remember(self, values):
+        expires = time.monotonic() + THUMBNAIL_LRU_TIMEOUT
+        with self._lock:
+            for key, value in values.items():
+                self._lru[key] = (value, expires)
+                self._lru.move_to_end(key)
+            while len(self._lru) > THUMBNAIL_LRU_SIZE:
+                self._lru.popitem(last=False)
+
+    def _forget(self, keys):
+        with self._lock:
+            for key in keys:
+                self._lru.pop(key, None)
+
+    def get_many_raw(self, keys):
+        """Значения найденных ключей: из LRU, затем одним запросом к кешу
+        и одним к БД. Промахи нигде не запоминаются.
+        """
+        found = self._recall(keys)
+        missing = [key for key in keys if key not in found]
+        if not missing:
+            return found
+        cached = {
+            key: value
+            for key, value in self.cache.get_many(missing).items()
+            if isinstance(value, str)
+        }
+        missing = [key for key in missing if key not in cached]
+        stored = dict(KVStoreModel.objects.filter(
+            key__in=missing).values_list("key", "value")) if missing else {}
+        if stored:
+            self.cache.set_many(stored, settings.THUMBNAIL_CACHE_TIMEOUT)
+        cached.update(stored)
+        self._remember(cached)
+        found.update(cached)
+        return found
+
+    def clear(self, delete_thumbnails=False):
+        super().clear(delete_thumbnails)
+        with self._lock:
+            self._lru.clear()
+
+    def _get_raw(self, key):
+        found = self._recall([key])
+        if key in found:
+            return found[key]
+        value = super()._get_raw(key)
+        if value is not None:
+            self._remember({key: value})
+        return value
+
+    def _set_raw(self, key, value):
+        super()._set_raw(key, value)
+        self._remember({key: value})
+
+    def _delete_raw(self, *keys):
+        super()._delete_raw(*keys)
+        self._forget(keys)
@@ -0,0 +1,105 @@
+import statistics
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+from django.db import connection
+from django.template import engines
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from posts.models import AuthorStats, Group, Post, User
+from yatube.settings import POSTS_ON_PAGE
+
+# Без кеша фрагментов и карточек каждый проход рендерит страницу целиком.
+DUMMY_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"},
+}
+TEXT = "Синтетический пост для замера рендера шаблонов. " * 8
+
+
+def synthetic_posts(count):
+    """Несохранённые посты с авторами и группами: рендер не ходит в БД."""
+    groups = [
+        Group(id=i, title=f"Группа {i}", slug=f"group-{i}",
+              description="Описание")
+        for i in range(1, 4)
+    ]
+    authors = []
+    for i in range(1, 6):
+        author = User(
+            id=i, username=f"author{i}", first_name="Имя", last_name=str(i))
+        author.stats = AuthorStats(author=author, posts_count=count)
+        authors.append(author)
+    now = datetime.now()
+    return [
+        Post(
+            id=i,
+            text=TEXT,
+            pub_date=now - timedelta(minutes=i),
+            updated=now - timedelta(minutes=i),
+            author=authors[i % len(authors)],
+            group=groups[i % len(groups)],
+        )
+        for i in range(1, count + 1)
+    ]
+
+
+def contexts(posts):
+    page = Paginator(posts, POSTS_ON_PAGE).page(1)
+    post = posts[0]
+    return {
+        "posts/index.html": {"page_obj": page, "feed_version": "bench"},
+        "posts/group_list.html": {
+            "group": post.group, "page_obj": page, "feed_version": "bench"},
+        "posts/profile.html": {
+            "author": post.author, "page_obj": page, "feed_version": "bench"},
+        "posts/post_detail.html": {"post": post},
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Замеряет рендер шаблонов лент и страницы поста на синтетических "
+        "данных: первый рендер (с компиляцией), медиану повторных, пик "
+        "памяти и запросы к БД."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--repeat", type=int, default=200,
+            help="Число повторных рендеров каждого шаблона.")
+        parser.add_argument(
+            "--posts", type=int, default=POSTS_ON_PAGE * 5,
+            help="Число постов в ленте.")
+
+    def handle(self, *args, **options):
+        request = RequestFactory().get("/")
+        request.user = AnonymousUser()
+        engine = engines["django"]
+        self.stdout.write(
+            f"{'шаблон':<24}{'первый, мс':>12}{'медиана, мс':>13}"
+            f"{'пик, КБ':>10}{'запросы':>9}")
+        with override_settings(CACHES=DUMMY_CACHES):
+            for name, context in contexts(
+                    synthetic_posts(options["posts"])).items():
+                started = time.perf_counter()
+                engine.get_template(name).render(context, request)
+                first = time.perf_counter() - started
+                timings = []
+                for _ in range(options["repeat"]):
+                    started = time.perf_counter()
+                    engine.get_template(name).render(context, request)
+                    timings.append(time.perf_counter() - started)
+                tracemalloc.start()
+                with CaptureQueriesContext(connection) as queries:
+                    engine.get_template(name).render(context, request)
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                self.stdout.write(
+                    f"{name.split('/')[-1]:<24}{first * 1000:>12.2f}"
+                    f"{statistics.median(timings) * 1000:>13.2f}"
+                    f"{peak / 1024:>10.0f}{len(queries):>9}")
@@ -0,0 +1,155 @@
+import os
+import resource
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+from django import forms
+from django.core.files import File
+from django.core.handlers.wsgi import WSGIRequest
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import override_settings
+from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
+from PIL import Image
+
+from posts.forms import HeaderImageField
+from posts.images import process_image
+from posts.models import Post, User
+from posts.workers import create_executor
+
+DEFAULT_HANDLERS = [
+    "django.core.files.uploadhandler.MemoryFileUploadHandler",
+    "django.core.files.uploadhandler.TemporaryFileUploadHandler",
+]
+BOUNDED_HANDLERS = ["posts.uploads.BoundedUploadHandler"]
+BENCH_USERNAME = "bench_upload"
+
+
+class DefaultImageForm(forms.Form):
+    image = forms.ImageField()
+
+
+class HeaderImageForm(forms.Form):
+    image = HeaderImageField()
+
+
+MODES = {
+    "django": (DEFAULT_HANDLERS, DefaultImageForm),
+    "bounded": (BOUNDED_HANDLERS, HeaderImageForm),
+}
+
+
+def max_rss():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def make_image(path, width, height):
+    """Шумная фотография: JPEG её почти не сжимает."""
+    Image.effect_noise((width, height), 64).convert("RGB").save(
+        path, "JPEG", quality=95)
+    return os.path.getsize(path)
+
+
+def make_body(path, image_path):
+    with open(image_path, "rb") as image, open(path, "wb") as body:
+        body.write(encode_multipart(BOUNDARY, {"image": image}))
+
+
+def measure_request(path, mode):
+    """Разбор multipart-тела и проверка формы, как в запросе."""
+    handlers, form_class = MODES[mode]
+    with open(path, "rb") as body, override_settings(
+            FILE_UPLOAD_HANDLERS=handlers):
+        request = WSGIRequest({
+            "REQUEST_METHOD": "POST",
+            "CONTENT_TYPE": MULTIPART_CONTENT,
+            "CONTENT_LENGTH": str(os.path.getsize(path)),
+            "wsgi.input": body,
+        })
+        rss = max_rss()
+        tracemalloc.start()
+        started = time.perf_counter()
+        form = form_class(request.POST, request.FILES)
+        valid = form.is_valid()
+        elapsed = time.perf_counter() - started
+        traced = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    if not valid:
+        raise ValueError(form.errors.as_text())
+    return elapsed, traced, max_rss() - rss
+
+
+def measure_processing(path):
+    """Фоновая обработка сохранённой картинки; всё, что она записала
+    в БД, откатывается.
+    """
+    media_root = tempfile.mkdtemp()
+    try:
+        with override_settings(MEDIA_ROOT=media_root), \
+                transaction.atomic():
+            with open(path, "rb") as image:
+                post = Post.objects.create(
+                    author=User.objects.create_user(username=BENCH_USERNAME),
+                    image=File(image, name="photo.jpg"),
+                )
+            rss = max_rss()
+            tracemalloc.start()
+            started = time.perf_counter()
+            process_image(post.image.name)
+            elapsed = time.perf_counter() - started
+            traced = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            transaction.set_rollback(True)
+    finally:
+        shutil.rmtree(media_root, ignore_errors=True)
+    return elapsed, traced, max_rss() - rss
+
+
+def in_fresh_process(func, *args):
+    # Пик RSS процесса только растёт, поэтому каждый замер - в новом.
+    with create_executor(1) as executor:
+        return executor.submit(func, *args).result()
+
+
+def megabytes(size):
+    return f"{size / 2 ** 20:.1f} МБ"
+
+
+class Command(BaseCommand):
+    help = (
+        "Замеряет время и пик памяти на одну загрузку картинки: разбор "
+        "запроса с обработчиками Django и с ограниченным обработчиком, "
+        "затем фоновую обработку."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--width", type=int, default=4032)
+        parser.add_argument("--height", type=int, default=3024)
+
+    def handle(self, *args, **options):
+        workdir = tempfile.mkdtemp()
+        try:
+            image_path = os.path.join(workdir, "photo.jpg")
+            path = os.path.join(workdir, "body")
+            size = make_image(image_path, options["width"], options["height"])
+            make_body(path, image_path)
+            self.stdout.write(
+                f"JPEG {options['width']}x{options['height']}, "
+                f"{megabytes(size)}")
+            rows = [
+                (f"запрос, {mode}",
+                 in_fresh_process(measure_request, path, mode))
+                for mode in MODES
+            ]
+            rows.append((
+                "фоновая обработка",
+                in_fresh_process(measure_processing, image_path),
+            ))
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+        for title, (elapsed, traced, rss) in rows:
+            self.stdout.write(
+                f"{title:<20} {elapsed * 1000:8.1f} мс  "
+                f"Python: {megabytes(traced):>9}  RSS: +{megabytes(rss)}")
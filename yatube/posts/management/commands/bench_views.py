@@ -0,0 +1,271 @@
+import json
+import random
+import statistics
+import time
+import tracemalloc
+from contextlib import ExitStack
+from io import BytesIO
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Max, Min
+from django.http import HttpRequest
+from django.middleware.csrf import get_token
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import AuthorStats, Group, Post, User
+
+BENCH_USERNAME = "bench_views"
+DUMMY_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"},
+}
+SAMPLE_POSTS = 100
+# Метрики, которые --compare сравнивает с прошлым прогоном.
+COMPARED = ("p50_ms", "p95_ms", "p99_ms", "queries", "alloc_kb")
+
+
+def percentile(timings, share):
+    """Значение с рангом share в отсортированном списке."""
+    return timings[min(len(timings) - 1, int(len(timings) * share))]
+
+
+class Site:
+    """Запросы к сайту через WSGIHandler, как от сервера приложений:
+    со всеми middleware, сигналами запроса и проверкой CSRF.
+    """
+
+    def __init__(self, user=None):
+        self.handler = WSGIHandler()
+        request = HttpRequest()
+        self.csrf_token = get_token(request)
+        cookies = {settings.CSRF_COOKIE_NAME: request.META["CSRF_COOKIE"]}
+        if user is not None:
+            client = Client()
+            client.force_login(user)
+            cookies.update(
+                (name, morsel.value)
+                for name, morsel in client.cookies.items())
+        self.cookie = "; ".join(
+            f"{name}={value}" for name, value in cookies.items())
+
+    def __call__(self, method, path, data=None):
+        body = urlencode(data or {}).encode()
+        environ = {
+            "REQUEST_METHOD": method,
+            "PATH_INFO": path,
+            "QUERY_STRING": "",
+            "SERVER_NAME": "localhost",
+            "SERVER_PORT": "80",
+            "SERVER_PROTOCOL": "HTTP/1.1",
+            "HTTP_HOST": "localhost",
+            "HTTP_COOKIE": self.cookie,
+            "HTTP_X_CSRFTOKEN": self.csrf_token,
+            "CONTENT_TYPE": "application/x-www-form-urlencoded",
+            "CONTENT_LENGTH": str(len(body)),
+            "wsgi.input": BytesIO(body),
+            "wsgi.errors": BytesIO(),
+            "wsgi.url_scheme": "http",
+            "wsgi.version": (1, 0),
+            "wsgi.multithread": False,
+            "wsgi.multiprocess": False,
+            "wsgi.run_once": False,
+        }
+        statuses = []
+        response = self.handler(
+            environ, lambda status, headers: statuses.append(status))
+        try:
+            b"".join(response)
+        finally:
+            response.close()
+        return int(statuses[0].split()[0])
+
+
+def sample_post_ids(count, seed):
+    """До count существующих id постов, разбросанных по всей таблице."""
+    bounds = Post.objects.aggregate(low=Min("id"), high=Max("id"))
+    if bounds["low"] is None:
+        return []
+    rng = random.Random(seed)
+    ids = set()
+    for _ in range(count):
+        pk = Post.objects.filter(
+            pk__gte=rng.randint(bounds["low"], bounds["high"]),
+        ).order_by("pk").values_list("pk", flat=True).first()
+        ids.add(pk)
+    return sorted(ids)
+
+
+def scenarios(author, seed):
+    """Имя вьюхи -> (метод, функция номера запроса -> (путь, данные)).
+
+    Ленты - самой большой группы и самого активного автора, посты для
+    страницы поста берутся по кругу из случайной выборки.
+    """
+    group = Group.objects.order_by("-posts_count").first()
+    top = AuthorStats.objects.select_related("author").exclude(
+        author=author).order_by("-posts_count").first()
+    post_ids = sample_post_ids(SAMPLE_POSTS, seed)
+    if group is None or top is None or not post_ids:
+        raise CommandError(
+            "В базе нет постов, групп или авторов: сначала generate_dataset.")
+    edited = Post.objects.create(author=author, text="Пост для замера")
+    index_url = reverse("posts:index")
+    group_url = reverse("posts:group_list", args=[group.slug])
+    profile_url = reverse("posts:profile", args=[top.author.username])
+    create_url = reverse("posts:post_create")
+    edit_url = reverse("posts:post_edit", args=[edited.id])
+    return {
+        "index": ("GET", lambda number: (index_url, None)),
+        "group_posts": ("GET", lambda number: (group_url, None)),
+        "profile": ("GET", lambda number: (profile_url, None)),
+        "post_detail": ("GET", lambda number: (reverse(
+            "posts:post_detail",
+            args=[post_ids[number % len(post_ids)]]), None)),
+        "post_create": ("POST", lambda number: (
+            create_url, {"text": f"Пост замера {number}"})),
+        "post_edit": ("POST", lambda number: (
+            edit_url, {"text": f"Правка замера {number}"})),
+    }
+
+
+def measure(site, method, request, warmup, repeat, profiled):
+    for number in range(warmup):
+        site(method, *request(number))
+    timings, errors = [], 0
+    for number in range(warmup, warmup + repeat):
+        path, data = request(number)
+        started = time.perf_counter()
+        status = site(method, path, data)
+        timings.append(time.perf_counter() - started)
+        errors += status >= 400
+    # Запросы и память считаются отдельными запросами: их учёт
+    # замедляет обработку и исказил бы время.
+    aliases = ["default", *settings.REPLICA_DATABASES]
+    queries, peaks = [], []
+    for number in range(warmup + repeat, warmup + repeat + profiled):
+        path, data = request(number)
+        with ExitStack() as stack:
+            captured = [
+                stack.enter_context(CaptureQueriesContext(connections[alias]))
+                for alias in aliases
+            ]
+            tracemalloc.start()
+            site(method, path, data)
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+        queries.append(sum(len(context) for context in captured))
+    timings.sort()
+    return {
+        "requests": repeat,
+        "errors": errors,
+        "mean_ms": statistics.mean(timings) * 1000,
+        "p50_ms": percentile(timings, 0.5) * 1000,
+        "p95_ms": percentile(timings, 0.95) * 1000,
+        "p99_ms": percentile(timings, 0.99) * 1000,
+        "queries": statistics.median(queries or [0]),
+        "alloc_kb": statistics.median(peaks or [0]) / 1024,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Замеряет задержку главных вьюх через WSGIHandler на текущей базе: "
+        "p50/p95/p99, запросы к БД и пик памяти Python на запрос. Итог "
+        "пишется в JSON, который можно сравнить с прогоном другого коммита."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--repeat", type=int, default=200,
+            help="Замеряемых запросов на вьюху.")
+        parser.add_argument(
+            "--warmup", type=int, default=20,
+            help="Запросов на вьюху до замера.")
+        parser.add_argument(
+            "--profiled", type=int, default=10,
+            help="Запросов на вьюху для подсчёта запросов к БД и памяти.")
+        parser.add_argument(
+            "--views", nargs="+", metavar="VIEW",
+            help="Только эти вьюхи.")
+        parser.add_argument(
+            "--anonymous", action="store_true",
+            help="Читать ленты и посты без входа на сайт.")
+        parser.add_argument(
+            "--no-cache", action="store_true",
+            help="Отключить кеш Django на время замера.")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--output", help="Файл для итога в JSON.")
+        parser.add_argument(
+            "--compare", help="JSON прошлого прогона для сравнения.")
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options["compare"]:
+            with open(options["compare"], encoding="utf-8") as source:
+                baseline = json.load(source)["views"]
+        dataset = {
+            "posts": Post.objects.count(),
+            "users": User.objects.count(),
+            "groups": Group.objects.count(),
+        }
+        author, _ = User.objects.get_or_create(username=BENCH_USERNAME)
+        caches = DUMMY_CACHES if options["no_cache"] else settings.CACHES
+        results = {}
+        try:
+            with override_settings(DEBUG=False, CACHES=caches):
+                plan = scenarios(author, options["seed"])
+                unknown = set(options["views"] or []) - plan.keys()
+                if unknown:
+                    raise CommandError(
+                        f"Неизвестные вьюхи: {', '.join(sorted(unknown))}.")
+                writer = Site(author)
+                reader = Site(None if options["anonymous"] else author)
+                # Чтение раньше записи: новые посты сбрасывают кеш лент.
+                for name, (method, request) in plan.items():
+                    if options["views"] and name not in options["views"]:
+                        continue
+                    site = reader if method == "GET" else writer
+                    results[name] = measure(
+                        site, method, request, options["warmup"],
+                        options["repeat"], options["profiled"])
+                    self.report(name, results[name], baseline)
+        finally:
+            # Посты замера удаляются вместе с автором.
+            author.delete()
+        if options["output"]:
+            self.save(options, dataset, results)
+
+    def save(self, options, dataset, results):
+        with open(options["output"], "w", encoding="utf-8") as output:
+            json.dump({
+                "dataset": dataset,
+                "options": {
+                    name: options[name] for name in (
+                        "repeat", "warmup", "profiled", "anonymous",
+                        "no_cache", "seed")
+                },
+                "views": results,
+            }, output, ensure_ascii=False, indent=2)
+
+    def report(self, name, result, baseline):
+        line = (
+            f"{name:<12} p50 {result['p50_ms']:7.2f}  "
+            f"p95 {result['p95_ms']:7.2f}  p99 {result['p99_ms']:7.2f} мс  "
+            f"запросы {result['queries']:4g}  "
+            f"память {result['alloc_kb']:7.0f} КБ"
+        )
+        if result["errors"]:
+            line += f"  ошибки {result['errors']}"
+        self.stdout.write(line)
+        if baseline and name in baseline:
+            changes = []
+            for metric in COMPARED:
+                old, new = baseline[name][metric], result[metric]
+                if old:
+                    changes.append(f"{metric} {(new - old) / old:+.0%}")
+            self.stdout.write(f"{'':<12} к прошлому: {', '.join(changes)}")
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from posts.images import release_image
+from posts.models import Post
+from posts.storage import is_content_name
+from posts.thumbnails import generate_thumbnails
+
+
+class Command(BaseCommand):
+    help = (
+        "Переносит картинки постов, сохранённые до хранилища по хешу "
+        "содержимого, под имена по хешу: одинаковые файлы сливаются в один."
+    )
+
+    def handle(self, *args, **options):
+        storage = Post.image.field.storage
+        names = [
+            name for name in Post.objects.exclude(image="").order_by(
+            ).values_list("image", flat=True).distinct()
+            if not is_content_name(name)
+        ]
+        new_names = set()
+        for name in names:
+            if not storage.exists(name):
+                self.stderr.write(f"Нет файла {name}")
+                continue
+            with storage.open(name) as image:
+                new_name = storage.save(name, image)
+            Post.objects.filter(image=name).update(image=new_name)
+            release_image(name)
+            generate_thumbnails(new_name)
+            new_names.add(new_name)
+            if options["verbosity"] > 1:
+                self.stdout.write(f"{name} -> {new_name}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Перенесено картинок: {len(names)}, "
+            f"осталось файлов: {len(new_names)}."))
@@ -0,0 +1,56 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from posts.export import FORMATS, export_rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Выгружает посты в NDJSON или CSV порциями по id: память не растёт "
+        "с числом постов. --after продолжает прерванную выгрузку."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--format", choices=list(FORMATS), default="ndjson")
+        parser.add_argument("--group", help="slug группы.")
+        parser.add_argument("--author", help="Имя пользователя автора.")
+        parser.add_argument(
+            "--since", type=date.fromisoformat,
+            help="Первая дата публикации, ГГГГ-ММ-ДД.")
+        parser.add_argument(
+            "--until", type=date.fromisoformat,
+            help="Последняя дата публикации, ГГГГ-ММ-ДД.")
+        parser.add_argument(
+            "--after", type=int, default=0,
+            help="Выгружать посты с id больше этого.")
+        parser.add_argument(
+            "--output", help="Файл выгрузки; по умолчанию stdout.")
+
+    def handle(self, *args, **options):
+        count, last = 0, options["after"]
+
+        def tracked(rows):
+            nonlocal count, last
+            for row in rows:
+                count, last = count + 1, row[0]
+                yield row
+
+        rows = tracked(export_rows(
+            group=options["group"],
+            author=options["author"],
+            since=options["since"],
+            until=options["until"],
+            after=options["after"],
+        ))
+        lines = FORMATS[options["format"]](rows)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8",
+                      newline="") as output:
+                output.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending="")
+        self.stderr.write(
+            f"Выгружено постов: {count}, последний id: {last}.")
@@ -0,0 +1,88 @@
+import time
+
+from core.cache import expire_process_caches
+from django.core.management.base import BaseCommand
+
+from posts.dataset import DatasetGenerator, make_images
+from posts.images import process_image
+from posts.workers import create_executor
+from yatube.settings import IMPORT_BATCH_SIZE, POST_THUMBNAIL_WORKERS
+
+
+class Command(BaseCommand):
+    help = (
+        "Заполняет базу синтетическими данными для замеров: пользователи, "
+        "группы с размерами по Ципфу и посты пачками INSERT через "
+        "executemany, по транзакции на пачку, затем одним проходом "
+        "обновляет счётчики, поиск и картинки."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--groups", type=int, default=50)
+        parser.add_argument("--posts", type=int, default=100000)
+        parser.add_argument(
+            "--skew", type=float, default=1.1,
+            help="Показатель Ципфа для размеров групп и активности авторов.")
+        parser.add_argument(
+            "--no-group", type=float, default=0.2,
+            help="Доля постов без группы.")
+        parser.add_argument(
+            "--days", type=int, default=365,
+            help="Сколько последних дней покрывают даты публикации.")
+        parser.add_argument(
+            "--images", type=float, default=0,
+            help="Доля постов с картинкой.")
+        parser.add_argument(
+            "--image-variants", type=int, default=10,
+            help="Сколько разных картинок делят посты.")
+        parser.add_argument(
+            "--image-size", type=int, nargs=2, default=(1600, 1200),
+            metavar=("WIDTH", "HEIGHT"))
+        parser.add_argument(
+            "--prefix", default="gen",
+            help="Префикс имён пользователей и slug групп.")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=max(POST_THUMBNAIL_WORKERS, 1),
+            help="Процессов для обработки картинок.",
+        )
+
+    def handle(self, *args, **options):
+        images = []
+        if options["images"] > 0:
+            images = make_images(
+                options["image_variants"], *options["image_size"],
+                seed=options["seed"])
+        generator = DatasetGenerator(
+            users=options["users"],
+            groups=options["groups"],
+            skew=options["skew"],
+            no_group=options["no_group"],
+            days=options["days"],
+            images=images,
+            image_share=options["images"],
+            prefix=options["prefix"],
+            seed=options["seed"],
+            batch_size=options["batch_size"],
+        )
+        started = time.perf_counter()
+        count = generator.generate(options["posts"])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"Создано постов: {count} за {elapsed:.1f} с "
+            f"({count / max(elapsed, 1e-9):.0f} в секунду).")
+        started = time.perf_counter()
+        generator.finish()
+        if images:
+            with create_executor(options["workers"]) as executor:
+                for _ in executor.map(process_image, images):
+                    pass
+        expire_process_caches()
+        self.stdout.write(self.style.SUCCESS(
+            f"Счётчики, поиск и картинки обновлены за "
+            f"{time.perf_counter() - started:.1f} с."))
@@ -0,0 +1,33 @@
+from core.cache import expire_process_caches
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+from posts.thumbnails import generate_thumbnails
+from posts.workers import create_executor
+from yatube.settings import POST_THUMBNAIL_WORKERS
+
+
+class Command(BaseCommand):
+    help = "Создаёт недостающие миниатюры для картинок всех постов."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=max(POST_THUMBNAIL_WORKERS, 1),
+            help="Число параллельных процессов.",
+        )
+
+    def handle(self, *args, **options):
+        names = list(
+            Post.objects.exclude(image="").order_by().values_list(
+                "image", flat=True).distinct())
+        with create_executor(options["workers"]) as executor:
+            for done, name in enumerate(
+                    executor.map(generate_thumbnails, names, chunksize=8),
+                    start=1):
+                if options["verbosity"] > 1:
+                    self.stdout.write(f"[{done}/{len(names)}] {name}")
+        expire_process_caches()
+        self.stdout.write(self.style.SUCCESS(
+            f"Миниатюры готовы для {len(names)} картинок."))
@@ -0,0 +1,19 @@
+from core.cache import expire_process_caches
+from django.core.management.base import BaseCommand
+
+from posts.counters import prime_cached_counts, rebuild_counters
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчитывает счётчики постов авторов и групп "
+        "и итоги лент в кеше."
+    )
+
+    def handle(self, *args, **options):
+        groups, authors = rebuild_counters()
+        # Процессы сайта очистят свои кеши и наберут итоги заново.
+        expire_process_caches()
+        prime_cached_counts()
+        self.stdout.write(self.style.SUCCESS(
+            f"Пересчитаны счётчики: групп {groups}, авторов {authors}."))
@@ -1,6 +1,8 @@
 from django.contrib.auth import get_user_model
 from django.db import models
 
+from .storage import ContentAddressedStorage
+
 User = get_user_model()
 
 
@@ -8,6 +10,8 @@ class Group(models.Model):
     title = models.CharField("Название сообщества", max_length=200)
     slug = models.SlugField("Идентификатор страницы", unique=True)
     description = models.TextField("Описание сообщества")
+    posts_count = models.PositiveIntegerField(
+        "Количество постов", default=0, editable=False)
 
     class Meta:
         verbose_name = "Группа"
@@ -23,6 +27,10 @@ class Post(models.Model):
         auto_now_add=True,
         verbose_name="Дата публикации",
     )
+    updated = models.DateTimeField(
+        auto_now=True,
+        verbose_name="Дата изменения",
+    )
     group = models.ForeignKey(
         Group,
         blank=True,
@@ -40,13 +48,93 @@ class Post(models.Model):
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
-        blank=True
+        storage=ContentAddressedStorage(),
+        blank=True,
+        # По имени файла ищут посты, которые на него ссылаются.
+        db_index=True,
     )  
 
     class Meta:
-        ordering = ("-pub_date",)
+        ordering = ("-pub_date", "-id")
+        indexes = [
+            models.Index(
+                fields=["-pub_date", "-id"], name="post_pub_date_id_idx"),
+            models.Index(
+                fields=["group", "-pub_date", "-id"],
+                name="post_group_pub_date_idx"),
+            models.Index(
+                fields=["author", "-pub_date", "-id"],
+                name="post_author_pub_date_idx"),
+        ]
         verbose_name = "Пост"
         verbose_name_plural = "Посты"
 
     def __str__(self):
         return self.text[:15]
+
+
+class AuthorStats(models.Model):
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        verbose_name="Автор",
+        related_name="stats",
+    )
+    posts_count = models.PositiveIntegerField("Количество постов", default=0)
+    followers_count = models.PositiveIntegerField(
+        "Количество подписчиков", default=0)
+
+    class Meta:
+        verbose_name = "Статистика автора"
+        verbose_name_plural = "Статистика авторов"
+
+    def __str__(self):
+        return f"{self.author}: {self.posts_count}"
+
+
+class Follow(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name="Подписчик",
+        related_name="follower",
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name="Автор",
+        related_name="following",
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "author"], name="unique_follow"),
+        ]
+        verbose_name = "Подписка"
+        verbose_name_plural = "Подписки"
+
+    def __str__(self):
+        return f"{self.user} -> {self.author}"
+
+
+class Timeline(models.Model):
+    """Лента подписок пользователя, собранная при публикации постов."""
+
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        verbose_name="Пользователь",
+        related_name="timeline",
+    )
+    # "id,id,...," - новые первыми; NULL - ленту надо собрать заново.
+    ids = models.TextField("Id постов", null=True)
+
+    class Meta:
+        verbose_name = "Лента подписок"
+        verbose_name_plural = "Ленты подписок"
+
+    def __str__(self):
+        return str(self.user)
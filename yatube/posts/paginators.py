@@ -0,0 +1,203 @@
+import base64
+import binascii
+from datetime import datetime
+
+from django.core.paginator import (
+    EmptyPage, Page, PageNotAnInteger, Paginator,
+)
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from .caching import add_count, get_count
+
+AFTER = "a"
+BEFORE = "b"
+# Наибольший id, который помещается в INTEGER базы.
+MAX_PK = 2 ** 63 - 1
+
+
+def make_cursor(direction, pub_date, pk):
+    raw = f"{direction}|{pub_date.isoformat()}|{pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def encode_cursor(direction, post):
+    return make_cursor(direction, post.pub_date, post.pk)
+
+
+def decode_cursor(cursor):
+    """Возвращает (направление, pub_date, id) или None для битого курсора."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        direction, pub_date, pk = raw.decode().split("|")
+        pub_date, pk = datetime.fromisoformat(pub_date), int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    # Даты в БД без пояса, а id за пределами INTEGER не принимает база.
+    if (direction not in (AFTER, BEFORE) or timezone.is_aware(pub_date)
+            or not 1 <= pk <= MAX_PK):
+        return None
+    return direction, pub_date, pk
+
+
+def seek_after(queryset, pub_date, pk):
+    """Посты ленты, которые идут после поста (pub_date, pk)."""
+    return queryset.filter(
+        Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, id__lt=pk))
+
+
+class KeysetPage(Page):
+    """Страница, выбранная по ключу (pub_date, id) вместо OFFSET.
+
+    Запрос выполняется лениво, при первом обращении к постам страницы.
+    """
+
+    def __init__(self, object_list, paginator, cursor=None):
+        self.paginator = paginator
+        self.number = None
+        self._queryset = object_list
+        self._cursor = cursor
+        self._rows = None
+
+    def __repr__(self):
+        return "<Page (keyset)>"
+
+    @property
+    def object_list(self):
+        self._fetch()
+        return self._rows
+
+    def _fetch(self):
+        if self._rows is not None:
+            return
+        per_page = self.paginator.per_page
+        if self._cursor is None:
+            direction, rows = AFTER, self._seek()
+        else:
+            direction, pub_date, pk = self._cursor
+            rows = self._seek(direction, pub_date, pk)
+            if not rows:
+                direction, rows = AFTER, self._seek()
+                self._cursor = None
+        has_more = len(rows) > per_page
+        rows = rows[:per_page]
+        if direction == AFTER:
+            self._has_next = has_more
+            self._has_previous = self._cursor is not None
+        else:
+            rows.reverse()
+            self._has_next = True
+            self._has_previous = has_more
+        self._rows = rows
+
+    def _seek(self, direction=AFTER, pub_date=None, pk=None):
+        queryset = self._queryset
+        if direction == AFTER:
+            queryset = queryset.order_by("-pub_date", "-id")
+            if pub_date is not None:
+                queryset = seek_after(queryset, pub_date, pk)
+        else:
+            queryset = queryset.order_by("pub_date", "id").filter(
+                Q(pub_date__gt=pub_date) | Q(pub_date=pub_date, id__gt=pk)
+            )
+        return list(queryset[:self.paginator.per_page + 1])
+
+    def has_next(self):
+        self._fetch()
+        return self._has_next
+
+    def has_previous(self):
+        self._fetch()
+        return self._has_previous
+
+    @property
+    def next_cursor(self):
+        if not self.has_next():
+            return None
+        return encode_cursor(AFTER, self.object_list[-1])
+
+    @property
+    def previous_cursor(self):
+        if not self.has_previous():
+            return None
+        return encode_cursor(BEFORE, self.object_list[0])
+
+
+class KeysetPaginator(Paginator):
+    """Пагинатор по курсору: глубокие страницы стоят столько же, сколько
+    первая, потому что не считает записи и не пропускает их через OFFSET.
+    """
+
+    keyset = True
+
+    def get_page(self, cursor):
+        return KeysetPage(self.object_list, self, decode_cursor(cursor))
+
+
+class UncountedPage(Page):
+    """Нумерованная страница, о следующей странице судит по лишней записи."""
+
+    def __init__(self, object_list, number, paginator, has_next):
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+
+    def has_next(self):
+        return self._has_next
+
+
+class CachedCountPaginator(Paginator):
+    """Нумерованный пагинатор, который берёт число постов из кеша.
+
+    Пока кеш холоден, страницы листаются без COUNT(*) в режиме
+    «есть ли следующая». Дошедшая до конца ленты страница знает точный
+    итог и сама прогревает кеш. Без scope итог не кешируется и не
+    считается вовсе.
+    """
+
+    def __init__(self, object_list, per_page, scope):
+        super().__init__(object_list, per_page)
+        self.scope = scope
+
+    @cached_property
+    def count(self):
+        return get_count(self.scope) if self.scope is not None else None
+
+    @property
+    def uncounted(self):
+        return self.count is None
+
+    def validate_number(self, number):
+        if not self.uncounted:
+            return super().validate_number(number)
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger("Номер страницы должен быть целым числом")
+        if number < 1:
+            raise EmptyPage("Номер страницы меньше 1")
+        return number
+
+    def page(self, number):
+        if not self.uncounted:
+            return super().page(number)
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage("На этой странице нет результатов")
+        has_next = len(rows) > self.per_page
+        if not has_next and self.scope is not None:
+            add_count(self.scope, bottom + len(rows))
+        return UncountedPage(
+            rows[:self.per_page], number, self, has_next=has_next)
+
+    def get_page(self, number):
+        if not self.uncounted:
+            return super().get_page(number)
+        try:
+            return self.page(number)
+        except (PageNotAnInteger, EmptyPage):
+            return self.page(1)
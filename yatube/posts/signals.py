@@ -0,0 +1,157 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .caching import (
+    NAMES_SCOPE, adjust_counts, author_scope, bump_versions, forget_counts,
+    group_scope, post_scopes,
+)
+from .counters import (
+    change_author_count, change_followers_count, change_group_count,
+)
+from .images import expire_processed_image, process_image, release_image
+from .models import Follow, Group, Post, User
+from .timelines import expire_timeline, expire_unpopular_author, push_post
+from .workers import submit
+
+
+def group_slug(post):
+    return post.group.slug if post.group_id is not None else None
+
+
+@receiver(pre_save, sender=Post)
+def remember_counted_relations(sender, instance, **kwargs):
+    previous = Post.objects.filter(pk=instance.pk).values_list(
+        "author_id", "group_id", "author__username", "group__slug", "image",
+    ).first() if instance.pk else None
+    instance._counted = previous[:4] if previous else None
+    instance._previous_image = previous[4] if previous else None
+
+
+@receiver(post_save, sender=Post)
+def sync_feeds_on_save(sender, instance, created, raw=False, **kwargs):
+    """Счётчики постов и итоги лент в кеше следят за созданием поста и его
+    переносом между группами и авторами (формы постов, list_editable
+    в админке).
+    """
+    if raw:
+        return
+    scopes = post_scopes(instance.author.username, group_slug(instance))
+    previous = getattr(instance, "_counted", None)
+    if created or previous is None:
+        change_author_count(instance.author_id, 1)
+        change_group_count(instance.group_id, 1)
+        adjust_counts(scopes, 1)
+        bump_versions(scopes)
+        return
+    author_id, group_id, username, slug = previous
+    if author_id != instance.author_id:
+        change_author_count(author_id, -1)
+        change_author_count(instance.author_id, 1)
+    if group_id != instance.group_id:
+        change_group_count(group_id, -1)
+        change_group_count(instance.group_id, 1)
+    previous_scopes = post_scopes(username, slug)
+    adjust_counts(set(previous_scopes) - set(scopes), -1)
+    adjust_counts(set(scopes) - set(previous_scopes), 1)
+    bump_versions(set(scopes) | set(previous_scopes))
+
+
+@receiver(post_save, sender=Post)
+def push_to_timelines(sender, instance, created, raw=False, **kwargs):
+    if raw or not created:
+        return
+    post_id, author_id = instance.pk, instance.author_id
+    transaction.on_commit(lambda: submit(push_post, post_id, author_id))
+
+
+@receiver(post_save, sender=Post)
+def process_post_image(sender, instance, raw=False, **kwargs):
+    # Правка текста и обновление счётчиков картинку не меняют.
+    if raw or not instance.image or instance.image.name == getattr(
+            instance, "_previous_image", None):
+        return
+    name = instance.image.name
+    transaction.on_commit(lambda: submit(
+        process_image, name, then=expire_processed_image))
+
+
+@receiver(post_save, sender=Post)
+def release_replaced_image(sender, instance, raw=False, **kwargs):
+    # Файлы общие для постов с одинаковыми картинками: удаляется только
+    # тот, на который больше никто не ссылается.
+    name = getattr(instance, "_previous_image", None)
+    if raw or not name or name == instance.image.name:
+        return
+    transaction.on_commit(lambda: release_image(name))
+
+
+@receiver(post_delete, sender=Post)
+def release_deleted_image(sender, instance, **kwargs):
+    if not instance.image:
+        return
+    name = instance.image.name
+    transaction.on_commit(lambda: release_image(name))
+
+
+@receiver(post_delete, sender=Post)
+def sync_feeds_on_delete(sender, instance, **kwargs):
+    # При удалении группы посты получают group=NULL одним UPDATE без
+    # сигналов, но вместе с группой исчезает и её счётчик.
+    change_author_count(instance.author_id, -1)
+    change_group_count(instance.group_id, -1)
+    scopes = post_scopes(instance.author.username, group_slug(instance))
+    adjust_counts(scopes, -1)
+    bump_versions(scopes)
+
+
+@receiver(pre_save, sender=Group)
+def remember_group_slug(sender, instance, **kwargs):
+    previous = Group.objects.filter(pk=instance.pk).values_list(
+        "slug", flat=True).first() if instance.pk else None
+    instance._previous_slug = previous
+
+
+@receiver(post_save, sender=Group)
+def expire_group_fragments(sender, instance, **kwargs):
+    # Название и slug группы видны в карточках постов всех лент.
+    scopes = [group_scope(instance.slug)]
+    previous = getattr(instance, "_previous_slug", None)
+    if previous is not None and previous != instance.slug:
+        # Итог ленты по старому адресу больше никто не сдвинет.
+        scopes.append(group_scope(previous))
+        forget_counts(scopes)
+    bump_versions([NAMES_SCOPE, *scopes])
+
+
+@receiver(post_delete, sender=Group)
+def expire_deleted_group(sender, instance, **kwargs):
+    scopes = [group_scope(instance.slug)]
+    forget_counts(scopes)
+    bump_versions([NAMES_SCOPE, *scopes])
+
+
+@receiver(post_save, sender=User)
+def expire_author_fragments(sender, instance, created, update_fields=None,
+                            **kwargs):
+    if created or update_fields == frozenset(["last_login"]):
+        return
+    bump_versions([NAMES_SCOPE])
+
+
+@receiver(post_save, sender=Follow)
+def sync_follow_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw or not created:
+        return
+    change_followers_count(instance.author_id, 1)
+    expire_timeline(instance.user_id)
+    # Число подписчиков и кнопка подписки - на странице автора.
+    bump_versions([author_scope(instance.author.username)])
+
+
+@receiver(post_delete, sender=Follow)
+def sync_follow_on_delete(sender, instance, **kwargs):
+    change_followers_count(instance.author_id, -1)
+    expire_unpopular_author(instance.author_id)
+    expire_timeline(instance.user_id)
+    bump_versions([author_scope(instance.author.username)])
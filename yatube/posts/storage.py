@@ -0,0 +1,62 @@
+import hashlib
+import os
+import re
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+CONTENT_NAME = re.compile(
+    r"(^|/)[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}(\.\w+)?$")
+
+
+def is_content_name(name):
+    return CONTENT_NAME.search(name) is not None
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """Хранит файлы под хешем содержимого: dir/ab/cd/abcd….ext.
+
+    Одинаковые загрузки получают одно имя и один файл на диске, а вместе
+    с ним и один набор миниатюр. Файл удаляется, только когда на него
+    не ссылается ни один пост.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # Имя определяет содержимое, см. _save. FileSystemStorage._save
+        # спрашивает другое имя, когда файл появился параллельно: такой
+        # же файл уже на месте, а повтор с тем же именем длился бы вечно.
+        if is_content_name(name) and os.path.lexists(self.path(name)):
+            raise FileExistsError(name)
+        return name
+
+    def content_name(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        hexdigest = digest.hexdigest()
+        directory, filename = os.path.split(name)
+        return os.path.join(
+            directory, hexdigest[:2], hexdigest[2:4],
+            hexdigest + os.path.splitext(filename)[1].lower())
+
+    def _save(self, name, content):
+        name = self.content_name(name, content)
+        if self.exists(name):
+            return name
+        try:
+            return super()._save(name, content)
+        except FileExistsError:
+            # Такую же загрузку сохранили параллельно.
+            return name
+
+    def is_referenced(self, name):
+        from .models import Post
+
+        return Post.objects.filter(image=name).exists()
+
+    def delete(self, name):
+        if not self.is_referenced(name):
+            super().delete(name)
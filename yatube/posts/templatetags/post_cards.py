@@ -0,0 +1,28 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from posts.caching import card_key, get_cards, set_cards
+from posts.thumbnails import prefetch_thumbnails
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def post_cards(context, posts, template_name):
+    """Возвращает HTML карточек постов: готовые берутся из кеша одним
+    запросом, остальные рендерятся по template_name и кешируются.
+    Миниатюры картинок всех постов запрашиваются заранее одним проходом.
+    """
+    posts = list(posts)
+    prefetch_thumbnails(posts, "card")
+    keys = [(card_key(template_name, post), post) for post in posts]
+    cards = get_cards([key for key, _ in keys])
+    missing = {}
+    card_template = context.template.engine.get_template(template_name)
+    for key, post in keys:
+        if key not in cards:
+            cards[key] = missing[key] = card_template.render(
+                context.new({"post": post}))
+    if missing:
+        set_cards(missing)
+    return [mark_safe(cards[key]) for key, _ in keys]
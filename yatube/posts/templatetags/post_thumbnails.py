@@ -0,0 +1,14 @@
+from django import template
+from sorl.thumbnail import default
+from yatube.settings import POST_THUMBNAILS
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_thumbnail(image, alias):
+    """Готовая миниатюра размера alias из POST_THUMBNAILS или None."""
+    if not image:
+        return None
+    geometry, options = POST_THUMBNAILS[alias]
+    return default.backend.get_ready_thumbnail(image, geometry, **options)
@@ -0,0 +1,119 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.caching import card_key
+from posts.models import Group, Post, User
+
+SLUG = "testslug"
+AUTHOR_USERNAME = "Abraham"
+POST_TEXT = "Тестовый текст"
+GROUP_TITLE = "Тестовая группа"
+NEW_GROUP_TITLE = "Новое название группы"
+GROUP_DESCRIPTION = "Тестовое описание"
+INDEX_URL = reverse("posts:index")
+GROUP_LIST_URL = reverse("posts:group_list", args=[SLUG])
+PROFILE_URL = reverse("posts:profile", args=[AUTHOR_USERNAME])
+INDEX_CARD = "posts/includes/index_card.html"
+CACHED_CARD = "<p>Карточка из кеша</p>"
+
+
+# Кеш целых страниц отдал бы повторный запрос гостя, не дойдя до view.
+@mock.patch("core.middleware.PAGE_CACHE_NAMESPACES", ())
+class FeedFragmentCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=AUTHOR_USERNAME)
+        cls.group = Group.objects.create(
+            title=GROUP_TITLE,
+            slug=SLUG,
+            description=GROUP_DESCRIPTION,
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text=POST_TEXT,
+            group=cls.group,
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest = Client()
+
+    def test_feed_fragment_is_cached(self):
+        """Повторный показ ленты не запрашивает посты."""
+        for url, queries in [
+            [INDEX_URL, 0], [GROUP_LIST_URL, 1], [PROFILE_URL, 1]
+        ]:
+            with self.subTest(url=url):
+                first = self.guest.get(url).content
+                with self.assertNumQueries(queries):
+                    self.assertEqual(self.guest.get(url).content, first)
+
+    def test_new_post_expires_feed_fragments(self):
+        """Новый пост сразу виден во всех своих лентах."""
+        for url in (INDEX_URL, GROUP_LIST_URL, PROFILE_URL):
+            self.guest.get(url)
+        Post.objects.create(
+            author=self.user, text="Свежий пост", group=self.group)
+        for url in (INDEX_URL, GROUP_LIST_URL, PROFILE_URL):
+            with self.subTest(url=url):
+                self.assertContains(self.guest.get(url), "Свежий пост")
+
+    def test_group_rename_expires_feed_fragments(self):
+        """Новое название группы сразу видно в карточках постов."""
+        self.guest.get(INDEX_URL)
+        group = Group.objects.get(pk=self.group.pk)
+        group.title = NEW_GROUP_TITLE
+        group.save()
+        self.assertContains(self.guest.get(INDEX_URL), NEW_GROUP_TITLE)
+
+    def test_authorized_header_is_not_cached(self):
+        """Шапка для авторизованного пользователя не берётся из кеша."""
+        self.guest.get(INDEX_URL)
+        author = Client()
+        author.force_login(self.user)
+        self.assertContains(author.get(INDEX_URL), "Выйти")
+
+
+class PostCardCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=AUTHOR_USERNAME)
+        cls.group = Group.objects.create(
+            title=GROUP_TITLE,
+            slug=SLUG,
+            description=GROUP_DESCRIPTION,
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest = Client()
+        self.post = Post.objects.create(
+            author=self.user,
+            text=POST_TEXT,
+            group=self.group,
+        )
+
+    def test_unchanged_card_is_taken_from_cache(self):
+        """Неизменённый пост не рендерится заново."""
+        self.guest.get(INDEX_URL)
+        cache.set(card_key(INDEX_CARD, self.post), CACHED_CARD)
+        Post.objects.create(author=self.user, text="Свежий пост")
+        self.assertContains(self.guest.get(INDEX_URL), CACHED_CARD)
+
+    def test_card_key_follows_post_group_and_author(self):
+        """Ключ карточки меняется с постом, его группой и автором."""
+        post = Post.objects.select_related("author", "group").get()
+        key = card_key(INDEX_CARD, post)
+        post.text = "Новый текст"
+        self.assertNotEqual(card_key(INDEX_CARD, post), key)
+        key = card_key(INDEX_CARD, post)
+        post.group.title = NEW_GROUP_TITLE
+        self.assertNotEqual(card_key(INDEX_CARD, post), key)
+        key = card_key(INDEX_CARD, post)
+        post.author.first_name = "Авраам"
+        self.assertNotEqual(card_key(INDEX_CARD, post), key)
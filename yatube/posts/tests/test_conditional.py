@@ -0,0 +1,111 @@
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.caching import group_scope, modified_key, version_key
+from posts.models import Group, Post, User
+from yatube.settings import FEED_VERSION_CACHE_TIMEOUT
+
+SLUG = "testslug"
+AUTHOR_USERNAME = "Abraham"
+POST_TEXT = "Тестовый текст"
+GROUP_TITLE = "Тестовая группа"
+GROUP_DESCRIPTION = "Тестовое описание"
+INDEX_URL = reverse("posts:index")
+GROUP_LIST_URL = reverse("posts:group_list", args=[SLUG])
+PROFILE_URL = reverse("posts:profile", args=[AUTHOR_USERNAME])
+
+
+# Кеш целых страниц отдал бы повторный запрос гостя, не дойдя до view.
+@mock.patch("core.middleware.PAGE_CACHE_NAMESPACES", ())
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=AUTHOR_USERNAME)
+        cls.group = Group.objects.create(
+            title=GROUP_TITLE, slug=SLUG, description=GROUP_DESCRIPTION)
+        cls.post = Post.objects.create(
+            author=cls.user, group=cls.group, text=POST_TEXT)
+        cls.POST_DETAIL_URL = reverse(
+            "posts:post_detail", args=[cls.post.id])
+        cls.POST_EDIT_URL = reverse("posts:post_edit", args=[cls.post.id])
+
+    def setUp(self):
+        cache.clear()
+        self.guest = Client()
+        self.author = Client()
+        self.author.force_login(self.user)
+
+    def revalidate(self, client, url, response):
+        return client.get(
+            url,
+            HTTP_IF_NONE_MATCH=response["ETag"],
+            HTTP_IF_MODIFIED_SINCE=response["Last-Modified"],
+        )
+
+    def test_unchanged_feed_is_not_modified(self):
+        """Повторный запрос неизменной ленты получает 304 без запросов
+        к БД.
+        """
+        for url in (INDEX_URL, GROUP_LIST_URL, PROFILE_URL):
+            with self.subTest(url=url):
+                response = self.guest.get(url)
+                with self.assertNumQueries(0):
+                    revalidated = self.revalidate(self.guest, url, response)
+                self.assertEqual(revalidated.status_code, 304)
+                self.assertEqual(revalidated.content, b"")
+
+    def test_changed_feed_is_rendered(self):
+        """Новый пост в ленте меняет её валидаторы."""
+        responses = {
+            url: self.guest.get(url)
+            for url in (INDEX_URL, GROUP_LIST_URL, PROFILE_URL)
+        }
+        Post.objects.create(author=self.user, group=self.group, text="Ещё")
+        for url, response in responses.items():
+            with self.subTest(url=url):
+                self.assertEqual(
+                    self.revalidate(self.guest, url, response).status_code,
+                    200)
+
+    def test_post_detail_is_revalidated_after_edit(self):
+        """Правка поста записывает время изменения и меняет валидаторы
+        его страницы.
+        """
+        response = self.guest.get(self.POST_DETAIL_URL)
+        with self.assertNumQueries(1):
+            revalidated = self.revalidate(
+                self.guest, self.POST_DETAIL_URL, response)
+        self.assertEqual(revalidated.status_code, 304)
+        updated = self.post.updated
+        self.author.post(self.POST_EDIT_URL, {"text": "Новый текст"})
+        self.post.refresh_from_db()
+        self.assertGreater(self.post.updated, updated)
+        self.assertEqual(
+            self.revalidate(
+                self.guest, self.POST_DETAIL_URL, response).status_code,
+            200)
+
+    def test_etag_depends_on_user(self):
+        """Гость и автор не получают страницы друг друга из кеша."""
+        for url in (INDEX_URL, self.POST_DETAIL_URL):
+            with self.subTest(url=url):
+                self.assertNotEqual(
+                    self.guest.get(url)["ETag"], self.author.get(url)["ETag"])
+
+    def test_missing_feed_keys_expire(self):
+        """Ключи валидаторов по адресу несуществующей группы не остаются
+        в кеше навсегда.
+        """
+        missing = reverse("posts:group_list", args=["missing"])
+        self.assertEqual(self.guest.get(missing).status_code, 404)
+        keys = [version_key(group_scope("missing")),
+                modified_key(group_scope("missing"))]
+        self.assertEqual(len(cache.get_many(keys)), 2)
+        later = time.time() + FEED_VERSION_CACHE_TIMEOUT + 1
+        with mock.patch("time.time", return_value=later):
+            self.assertEqual(cache.get_many(keys), {})
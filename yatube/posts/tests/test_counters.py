@@ -0,0 +1,101 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.caching import add_count, get_count, group_scope
+from posts.models import AuthorStats, Group, Post, User
+
+SLUG = "testslug"
+SECOND_SLUG = "slugslug"
+AUTHOR_USERNAME = "Abraham"
+GROUP_TITLE = "Тестовая группа"
+SECOND_GROUP_TITLE = "Вторая тестовая группа"
+GROUP_DESCRIPTION = "Тестовое описание"
+POST_CREATE_URL = reverse("posts:post_create")
+
+
+class PostCountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=AUTHOR_USERNAME)
+        cls.group = Group.objects.create(
+            title=GROUP_TITLE,
+            slug=SLUG,
+            description=GROUP_DESCRIPTION,
+        )
+        cls.group2 = Group.objects.create(
+            title=SECOND_GROUP_TITLE,
+            slug=SECOND_SLUG,
+            description=GROUP_DESCRIPTION,
+        )
+
+    def setUp(self):
+        self.author = Client()
+        self.author.force_login(self.user)
+
+    def assertCounts(self, author, group, group2):
+        self.assertEqual(
+            AuthorStats.objects.get(author=self.user).posts_count, author)
+        self.group.refresh_from_db()
+        self.group2.refresh_from_db()
+        self.assertEqual(self.group.posts_count, group)
+        self.assertEqual(self.group2.posts_count, group2)
+
+    def test_counters_follow_create_edit_and_delete(self):
+        """Счётчики меняются при создании, переносе и удалении поста."""
+        self.author.post(
+            POST_CREATE_URL, {"text": "Первый", "group": self.group.id})
+        self.author.post(POST_CREATE_URL, {"text": "Второй"})
+        self.assertCounts(2, 1, 0)
+        post = Post.objects.get(text="Первый")
+        self.author.post(
+            reverse("posts:post_edit", args=[post.id]),
+            {"text": "Первый", "group": self.group2.id},
+        )
+        self.assertCounts(2, 0, 1)
+        post.refresh_from_db()
+        post.delete()
+        self.assertCounts(1, 0, 0)
+
+    def test_group_deletion_keeps_author_counter(self):
+        """Удаление группы не сбивает счётчик автора."""
+        group = Group.objects.get(slug=SECOND_SLUG)
+        Post.objects.create(author=self.user, text="Текст", group=group)
+        group.delete()
+        self.assertEqual(Post.objects.get().group, None)
+        self.assertEqual(
+            AuthorStats.objects.get(author=self.user).posts_count, 1)
+
+    def test_rebuild_command_fixes_drift(self):
+        """Команда rebuild_post_counters пересчитывает счётчики."""
+        Post.objects.bulk_create(
+            Post(author=self.user, text=f"Текст {i}", group=self.group)
+            for i in range(3))
+        call_command("rebuild_post_counters", stdout=StringIO())
+        self.assertCounts(3, 3, 0)
+
+
+class CachedCountTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.group = Group.objects.create(
+            title=GROUP_TITLE, slug=SLUG, description=GROUP_DESCRIPTION)
+        add_count(group_scope(SLUG), 5)
+
+    def test_scan_does_not_overwrite_count(self):
+        """Итог, посчитанный листанием, не затирает уже известный."""
+        add_count(group_scope(SLUG), 1)
+        self.assertEqual(get_count(group_scope(SLUG)), 5)
+
+    def test_group_slug_change_forgets_count(self):
+        self.group.slug = SECOND_SLUG
+        self.group.save()
+        self.assertIsNone(get_count(group_scope(SLUG)))
+
+    def test_group_deletion_forgets_count(self):
+        self.group.delete()
+        self.assertIsNone(get_count(group_scope(SLUG)))
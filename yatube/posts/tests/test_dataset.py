@@ -0,0 +1,71 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db.models import Sum
+from django.test import TestCase, TransactionTestCase
+
+from posts.models import AuthorStats, Group, Post, User
+from search.index import SearchResults
+
+POSTS_COUNT = 300
+DATASET = ["--users", "20", "--groups", "5", "--posts", str(POSTS_COUNT),
+           "--batch-size", "100"]
+
+
+class GenerateDatasetTest(TestCase):
+    def test_dataset_is_skewed_and_derived_data_is_fresh(self):
+        call_command("generate_dataset", *DATASET, stdout=StringIO())
+        self.assertEqual(Post.objects.count(), POSTS_COUNT)
+        self.assertEqual(User.objects.count(), 20)
+        sizes = list(Group.objects.order_by("slug").values_list(
+            "posts_count", flat=True))
+        self.assertEqual(sizes[0], max(sizes))
+        self.assertGreater(sizes[0], 3 * min(sizes))
+        self.assertEqual(
+            AuthorStats.objects.aggregate(total=Sum("posts_count"))["total"],
+            POSTS_COUNT)
+        dates = list(Post.objects.order_by("id").values_list(
+            "pub_date", flat=True))
+        self.assertEqual(dates, sorted(dates))
+        self.assertEqual(
+            SearchResults("пост").count(),
+            Post.objects.filter(text__contains="пост").count())
+
+    def test_rerun_reuses_users_and_groups(self):
+        for _ in range(2):
+            call_command("generate_dataset", *DATASET, stdout=StringIO())
+        self.assertEqual(User.objects.count(), 20)
+        self.assertEqual(Group.objects.count(), 5)
+        self.assertEqual(Post.objects.count(), 2 * POSTS_COUNT)
+
+
+class BenchViewsTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        call_command("generate_dataset", *DATASET, stdout=StringIO())
+
+    def test_report_covers_views_and_cleans_up(self):
+        fd, path = tempfile.mkstemp(suffix=".json")
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+        call_command(
+            "bench_views", "--repeat", "3", "--warmup", "1",
+            "--profiled", "1", "--output", path, stdout=StringIO())
+        with open(path, encoding="utf-8") as source:
+            report = json.load(source)
+        self.assertEqual(report["dataset"]["posts"], POSTS_COUNT)
+        self.assertEqual(set(report["views"]), {
+            "index", "group_posts", "profile", "post_detail",
+            "post_create", "post_edit",
+        })
+        for name, result in report["views"].items():
+            with self.subTest(view=name):
+                self.assertEqual(result["errors"], 0)
+                self.assertGreater(result["queries"], 0)
+                self.assertLessEqual(result["p50_ms"], result["p99_ms"])
+        self.assertEqual(Post.objects.count(), POSTS_COUNT)
+        self.assertFalse(User.objects.filter(username="bench_views").exists())
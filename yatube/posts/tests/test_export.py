@@ -0,0 +1,64 @@
+import csv
+import json
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from posts.export import export_rows
+from posts.models import Group, Post, User
+
+SLUG = "testslug"
+AUTHOR_USERNAME = "Abraham"
+GROUP_TITLE = "Тестовая группа"
+GROUP_DESCRIPTION = "Тестовое описание"
+
+
+class ExportPostsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=AUTHOR_USERNAME)
+        cls.other = User.objects.create_user(username="Isaac")
+        cls.group = Group.objects.create(
+            title=GROUP_TITLE, slug=SLUG, description=GROUP_DESCRIPTION)
+        cls.posts = [
+            Post.objects.create(
+                author=cls.user if i % 2 else cls.other,
+                group=cls.group if i % 3 else None,
+                text=f"Текст, \"с кавычками\" {i}",
+            )
+            for i in range(5)
+        ]
+
+    def export(self, **options):
+        stdout = StringIO()
+        call_command("export_posts", stdout=stdout, stderr=StringIO(),
+                     **options)
+        return stdout.getvalue()
+
+    def test_ndjson_export_in_chunks(self):
+        """Порции по id дают все посты по порядку, с автором и группой."""
+        self.assertEqual(
+            [row[0] for row in export_rows(chunk_size=2)],
+            [post.id for post in self.posts])
+        rows = [json.loads(line) for line in self.export().splitlines()]
+        self.assertEqual(len(rows), len(self.posts))
+        self.assertEqual(rows[1]["author"], AUTHOR_USERNAME)
+        self.assertEqual(rows[1]["group"], SLUG)
+        self.assertEqual(rows[0]["group"], None)
+        self.assertEqual(rows[0]["text"], self.posts[0].text)
+
+    def test_csv_export_with_filters_and_resume(self):
+        rows = list(csv.DictReader(StringIO(self.export(
+            format="csv", author=AUTHOR_USERNAME, group=SLUG))))
+        self.assertEqual(
+            [int(row["id"]) for row in rows], [self.posts[1].id])
+        self.assertEqual(rows[0]["text"], self.posts[1].text)
+        self.assertEqual(
+            [row[0] for row in export_rows(after=self.posts[3].id)],
+            [self.posts[4].id])
+        today = self.posts[0].pub_date.date()
+        self.assertEqual(self.export(until=today.replace(year=2000)), "")
+        self.assertEqual(
+            len(self.export(since=today).splitlines()), len(self.posts))
@@ -0,0 +1,132 @@
+from unittest import mock
+
+from core.query_budgets import QueryBudgetMixin
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import AuthorStats, Follow, Post, Timeline, User
+from posts.timelines import pack, push_post, timeline_ids, unpack
+
+AUTHOR_USERNAME = "Abraham"
+OTHER_USERNAME = "Isaac"
+FOLLOWER_USERNAME = "Jacob"
+POST_TEXT = "Пост избранного автора"
+OTHER_POST_TEXT = "Пост чужого автора"
+FOLLOW_INDEX_URL = reverse("posts:follow_index")
+FOLLOW_URL = reverse("posts:profile_follow", args=[AUTHOR_USERNAME])
+UNFOLLOW_URL = reverse("posts:profile_unfollow", args=[AUTHOR_USERNAME])
+
+
+class FollowTest(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username=AUTHOR_USERNAME)
+        cls.other = User.objects.create_user(username=OTHER_USERNAME)
+        cls.user = User.objects.create_user(username=FOLLOWER_USERNAME)
+        Post.objects.create(author=cls.author, text=POST_TEXT)
+        Post.objects.create(author=cls.other, text=OTHER_POST_TEXT)
+
+    def setUp(self):
+        cache.clear()
+        self.follower = Client()
+        self.follower.force_login(self.user)
+
+    def followers_count(self):
+        return AuthorStats.objects.get(author=self.author).followers_count
+
+    def test_follow_and_unfollow(self):
+        """Подписка и отписка меняют счётчик подписчиков; на себя
+        подписаться нельзя.
+        """
+        self.follower.post(FOLLOW_URL)
+        self.follower.post(FOLLOW_URL)
+        self.assertEqual(self.followers_count(), 1)
+        self.assertContains(
+            self.follower.get(
+                reverse("posts:profile", args=[AUTHOR_USERNAME])),
+            "Отписаться")
+        self.follower.post(UNFOLLOW_URL)
+        self.assertEqual(self.followers_count(), 0)
+        self.follower.post(
+            reverse("posts:profile_follow", args=[FOLLOWER_USERNAME]))
+        self.assertFalse(Follow.objects.filter(author=self.user).exists())
+        self.assertEqual(self.follower.get(FOLLOW_URL).status_code, 405)
+
+    def test_timeline_shows_followed_authors(self):
+        """В ленте подписок - посты избранных авторов, и только они."""
+        self.follower.post(FOLLOW_URL)
+        response = self.follower.get(FOLLOW_INDEX_URL)
+        self.assertContains(response, POST_TEXT)
+        self.assertNotContains(response, OTHER_POST_TEXT)
+        self.follower.post(UNFOLLOW_URL)
+        self.assertNotContains(
+            self.follower.get(FOLLOW_INDEX_URL), POST_TEXT)
+
+    def test_new_post_is_pushed_into_timelines(self):
+        """Новый пост автора попадает в начало ленты подписчика, а
+        страница ленты не перебирает посты подписок.
+        """
+        Follow.objects.create(user=self.user, author=self.author)
+        self.follower.get(FOLLOW_INDEX_URL)
+        post = Post.objects.create(author=self.author, text="Свежий пост")
+        # В TestCase транзакция не коммитится и on_commit не вызывается.
+        push_post(post.id, post.author_id)
+        self.assertEqual(
+            unpack(Timeline.objects.get(user=self.user).ids)[0], post.id)
+        with self.assertNumQueries(5):
+            response = self.follower.get(FOLLOW_INDEX_URL)
+        self.assertEqual(response.context["page_obj"][0], post)
+
+    def test_popular_authors_are_merged_on_read(self):
+        """Пост популярного автора не раскладывается по лентам, но
+        виден подписчикам.
+        """
+        Follow.objects.create(user=self.user, author=self.author)
+        self.follower.get(FOLLOW_INDEX_URL)
+        with mock.patch("posts.timelines.TIMELINE_FANOUT_LIMIT", 0):
+            post = Post.objects.create(author=self.author, text="Свежий")
+            push_post(post.id, post.author_id)
+            self.assertNotIn(
+                post.id, unpack(Timeline.objects.get(user=self.user).ids))
+            self.assertEqual(timeline_ids(self.user)[0], post.id)
+
+    def test_posts_of_popular_authors_are_merged_by_id(self):
+        """Посты нескольких популярных авторов и ленты сливаются в один
+        список по убыванию id без повторов.
+        """
+        Follow.objects.create(user=self.user, author=self.author)
+        Follow.objects.create(user=self.user, author=self.other)
+        with mock.patch("posts.timelines.TIMELINE_FANOUT_LIMIT", 0):
+            posts = [
+                Post.objects.create(author=author, text="Свежий")
+                for author in (self.author, self.other, self.author)
+            ]
+            Timeline.objects.create(
+                user=self.user, ids=pack([posts[2].id, posts[0].id]))
+            ids = [post.id for post in reversed(posts)]
+            self.assertEqual(timeline_ids(self.user, 3), ids)
+            self.assertEqual(timeline_ids(self.user), sorted(
+                Post.objects.values_list("id", flat=True), reverse=True))
+
+    def test_packed_timeline_is_truncated_by_whole_ids(self):
+        with mock.patch("posts.timelines.MAX_LENGTH", 10):
+            self.assertEqual(unpack(pack([12345, 67890, 11111])), [12345])
+
+    def test_unpack_parses_only_requested_ids(self):
+        self.assertEqual(unpack("5,4,3,2,", 2), [5, 4])
+        self.assertEqual(unpack("5,4,3,1", 5), [5, 4, 3])
+
+    def test_timeline_is_rebuilt_when_author_stops_being_popular(self):
+        """Посты автора, который перестал быть популярным, попадают
+        в ленты подписчиков: их больше не подмешивают при чтении.
+        """
+        Follow.objects.create(user=self.user, author=self.author)
+        Follow.objects.create(user=self.other, author=self.author)
+        with mock.patch("posts.timelines.TIMELINE_FANOUT_LIMIT", 1):
+            self.follower.get(FOLLOW_INDEX_URL)
+            post = Post.objects.create(author=self.author, text="Свежий")
+            push_post(post.id, post.author_id)
+            Follow.objects.get(user=self.other).delete()
+            self.assertEqual(timeline_ids(self.user)[0], post.id)
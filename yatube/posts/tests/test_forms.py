@@ -1,3 +1,4 @@
+from core.query_budgets import QueryBudgetMixin
 from django.test import Client, TestCase
 from django.urls import reverse
 from django import forms
@@ -17,7 +18,7 @@ PROFILE_URL = reverse("posts:profile", args=[AUTHOR_USERNAME])
 POST_CREATE_URL = reverse("posts:post_create")
 
 
-class PostFormTest(TestCase):
+class PostFormTest(QueryBudgetMixin, TestCase):
     @classmethod
     def setUpClass(cls):
         super().setUpClass()
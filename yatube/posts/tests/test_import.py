@@ -0,0 +1,98 @@
+import csv
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import AuthorStats, Group, Post, User
+
+SLUG = "testslug"
+AUTHOR_USERNAME = "Abraham"
+GROUP_TITLE = "Тестовая группа"
+GROUP_DESCRIPTION = "Тестовое описание"
+PUB_DATE = datetime(2001, 2, 3, 4, 5, 6)
+SEARCH_URL = reverse("search:search")
+
+
+class ImportPostsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=AUTHOR_USERNAME)
+        cls.group = Group.objects.create(
+            title=GROUP_TITLE, slug=SLUG, description=GROUP_DESCRIPTION)
+
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.workdir, ignore_errors=True)
+
+    def write(self, name, content):
+        path = os.path.join(self.workdir, name)
+        with open(path, "w", encoding="utf-8") as source:
+            source.write(content)
+        return path
+
+    def import_posts(self, path, **options):
+        call_command("import_posts", path, stdout=StringIO(), **options)
+
+    def test_ndjson_import_keeps_dates_and_refreshes_derived_data(self):
+        """Импорт сохраняет даты, создаёт авторов и группы и обновляет
+        счётчики и поиск.
+        """
+        rows = [
+            {"text": "Старый пост про архив", "author": AUTHOR_USERNAME,
+             "group": SLUG, "pub_date": PUB_DATE.isoformat()},
+            {"text": "Пост нового автора", "author": "legacy",
+             "group": "legacy-group", "group_title": "Старая группа"},
+            {"text": "Ещё пост нового автора", "author": "legacy"},
+        ]
+        self.import_posts(self.write("posts.ndjson", "\n".join(
+            json.dumps(row, ensure_ascii=False) for row in rows)),
+            batch_size=2)
+        post = Post.objects.get(text="Старый пост про архив")
+        self.assertEqual(post.pub_date, PUB_DATE)
+        self.assertEqual(post.updated, PUB_DATE)
+        self.assertEqual(post.group, self.group)
+        legacy = User.objects.get(username="legacy")
+        self.assertFalse(legacy.has_usable_password())
+        self.assertEqual(
+            Group.objects.get(slug="legacy-group").title, "Старая группа")
+        self.assertEqual(AuthorStats.objects.get(author=legacy).posts_count, 2)
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 1)
+        self.assertEqual(
+            list(Client().get(SEARCH_URL, {"q": "архив"}).context[
+                "page_obj"]),
+            [post])
+        self.assertTrue(Post._meta.get_field("pub_date").auto_now_add)
+
+    def test_bad_row_stops_import_after_committed_batches(self):
+        path = self.write("posts.csv", (
+            "text,author,pub_date\n"
+            f"Первый,{AUTHOR_USERNAME},\n"
+            f"Второй,{AUTHOR_USERNAME},вчера\n"))
+        with self.assertRaisesMessage(CommandError, "Запись 2"):
+            self.import_posts(path, batch_size=1)
+        self.assertEqual(
+            list(Post.objects.values_list("text", flat=True)), ["Первый"])
+        self.assertEqual(
+            AuthorStats.objects.get(author=self.user).posts_count, 1)
+
+    def test_broken_csv_stops_import_after_committed_batches(self):
+        """Ошибка разметки CSV останавливает импорт, но уже записанные
+        посты попадают в счётчики.
+        """
+        path = self.write("posts.csv", (
+            "text,author\n"
+            f"Первый,{AUTHOR_USERNAME}\n"
+            f"{'x' * (csv.field_size_limit() + 1)},{AUTHOR_USERNAME}\n"))
+        with self.assertRaises(CommandError):
+            self.import_posts(path, batch_size=1)
+        self.assertEqual(
+            AuthorStats.objects.get(author=self.user).posts_count, 1)
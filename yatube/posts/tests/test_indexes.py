@@ -0,0 +1,57 @@
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+from yatube.settings import POSTS_ON_PAGE
+
+SLUG = "testslug"
+AUTHOR_USERNAME = "Abraham"
+GROUP_TITLE = "Тестовая группа"
+GROUP_DESCRIPTION = "Тестовое описание"
+INDEX_URL = reverse("posts:index")
+GROUP_LIST_URL = reverse("posts:group_list", args=[SLUG])
+PROFILE_URL = reverse("posts:profile", args=[AUTHOR_USERNAME])
+FEED_ORDER = 'ORDER BY "posts_post"."pub_date"'
+
+
+class FeedIndexesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        user = User.objects.create_user(username=AUTHOR_USERNAME)
+        group = Group.objects.create(
+            title=GROUP_TITLE,
+            slug=SLUG,
+            description=GROUP_DESCRIPTION,
+        )
+        Post.objects.bulk_create(
+            Post(author=user, text=f"Текст {i}", group=group)
+            for i in range(POSTS_ON_PAGE * 2))
+
+    def setUp(self):
+        self.guest = Client()
+
+    def feed_queries(self, url, params=None):
+        with CaptureQueriesContext(connection) as context:
+            response = self.guest.get(url, params or {})
+        return response, [
+            query["sql"] for query in context.captured_queries
+            if FEED_ORDER in query["sql"]
+        ]
+
+    def test_feed_queries_do_not_sort_in_temp_btree(self):
+        """Ленты читаются по индексу, без сортировки во временном B-tree."""
+        for url in (INDEX_URL, GROUP_LIST_URL, PROFILE_URL):
+            response, queries = self.feed_queries(url)
+            cursor = response.context["page_obj"].next_cursor
+            queries += self.feed_queries(url, {"cursor": cursor})[1]
+            self.assertTrue(queries)
+            for sql in queries:
+                with self.subTest(url=url, sql=sql):
+                    with connection.cursor() as db:
+                        db.execute(f"EXPLAIN QUERY PLAN {sql}")
+                        plan = " ".join(row[-1] for row in db.fetchall())
+                    self.assertNotIn("TEMP B-TREE", plan)
+                    self.assertIn("USING INDEX post_", plan)
@@ -0,0 +1,104 @@
+import hashlib
+
+from core.middleware import PAGE_KEY, page_key
+from django.core.cache import cache
+from django.test import Client, RequestFactory, TestCase
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+
+SLUG = "testslug"
+OTHER_SLUG = "otherslug"
+AUTHOR_USERNAME = "Abraham"
+POST_TEXT = "Тестовый текст"
+NEW_POST_TEXT = "Свежий пост"
+GROUP_TITLE = "Тестовая группа"
+GROUP_DESCRIPTION = "Тестовое описание"
+INDEX_URL = reverse("posts:index")
+GROUP_LIST_URL = reverse("posts:group_list", args=[SLUG])
+OTHER_GROUP_LIST_URL = reverse("posts:group_list", args=[OTHER_SLUG])
+PROFILE_URL = reverse("posts:profile", args=[AUTHOR_USERNAME])
+ABOUT_URL = reverse("about:author")
+
+
+class AnonymousPageCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=AUTHOR_USERNAME)
+        cls.group = Group.objects.create(
+            title=GROUP_TITLE, slug=SLUG, description=GROUP_DESCRIPTION)
+        cls.other_group = Group.objects.create(
+            title=GROUP_TITLE, slug=OTHER_SLUG, description=GROUP_DESCRIPTION)
+        cls.post = Post.objects.create(
+            author=cls.user, group=cls.group, text=POST_TEXT)
+        cls.POST_DETAIL_URL = reverse(
+            "posts:post_detail", args=[cls.post.id])
+
+    def setUp(self):
+        cache.clear()
+        self.guest = Client()
+        self.author = Client()
+        self.author.force_login(self.user)
+
+    def test_guest_pages_are_cached(self):
+        """Повторный запрос гостя отдаётся из кеша без запросов к БД
+        и разрешает прокси делить страницу между гостями.
+        """
+        urls = [
+            INDEX_URL, GROUP_LIST_URL, PROFILE_URL, self.POST_DETAIL_URL,
+            ABOUT_URL,
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                first = self.guest.get(url)
+                with self.assertNumQueries(0):
+                    second = self.guest.get(url)
+                self.assertEqual(second.content, first.content)
+                self.assertIn("public", second["Cache-Control"])
+                self.assertIn("max-age", second["Cache-Control"])
+                self.assertIn("Cookie", second["Vary"])
+
+    def test_pages_are_cached_by_page_parameter(self):
+        """Страницы ленты с разными page/cursor кешируются отдельно,
+        прочие параметры запроса кеш обходят.
+        """
+        self.guest.get(INDEX_URL)
+        with self.assertNumQueries(1):
+            self.guest.get(INDEX_URL, {"page": 1})
+        response = self.guest.get(INDEX_URL, {"utm": 1})
+        self.assertNotIn("Cache-Control", response)
+
+    def test_page_key_does_not_depend_on_hash_seed(self):
+        """Ключ страницы собирается в порядке page, cursor: у всех
+        процессов сайта он один, какой бы ни была соль хешей.
+        """
+        request = RequestFactory().get(INDEX_URL, {"cursor": "c", "page": 2})
+        page = "\x1f".join([INDEX_URL, "2", "c"])
+        self.assertEqual(page_key(request), PAGE_KEY.format(
+            hashlib.md5(page.encode()).hexdigest()))
+
+    def test_change_purges_only_its_scopes(self):
+        """Новый пост вычищает страницы своих лент, остальные остаются
+        в кеше.
+        """
+        urls = [INDEX_URL, GROUP_LIST_URL, PROFILE_URL, OTHER_GROUP_LIST_URL]
+        for url in urls:
+            self.guest.get(url)
+        Post.objects.create(
+            author=self.user, group=self.group, text=NEW_POST_TEXT)
+        for url in urls[:-1]:
+            with self.subTest(url=url):
+                self.assertContains(self.guest.get(url), NEW_POST_TEXT)
+        with self.assertNumQueries(0):
+            self.guest.get(OTHER_GROUP_LIST_URL)
+
+    def test_authorized_user_bypasses_cache(self):
+        """Авторизованный пользователь не получает страницу гостя и не
+        попадает в общий кеш.
+        """
+        self.guest.get(INDEX_URL)
+        response = self.author.get(INDEX_URL)
+        self.assertContains(response, "Выйти")
+        self.assertIn("private", response["Cache-Control"])
+        self.assertNotContains(self.guest.get(INDEX_URL), "Выйти")
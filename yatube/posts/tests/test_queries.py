@@ -0,0 +1,93 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.counters import prime_cached_counts, rebuild_counters
+from posts.models import Group, Post, User
+from yatube.settings import POSTS_ON_PAGE
+
+SLUG = "testslug"
+SECOND_SLUG = "slugslug"
+AUTHOR_USERNAME = "Abraham"
+GROUP_TITLE = "Тестовая группа"
+SECOND_GROUP_TITLE = "Вторая тестовая группа"
+GROUP_DESCRIPTION = "Тестовое описание"
+INDEX_URL = reverse("posts:index")
+GROUP_LIST_URL = reverse("posts:group_list", args=[SLUG])
+PROFILE_URL = reverse("posts:profile", args=[AUTHOR_USERNAME])
+
+
+class QueryBudgetTest(TestCase):
+    """Число запросов страницы не зависит от числа постов на ней."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username=AUTHOR_USERNAME, first_name="Авраам")
+        groups = [
+            Group.objects.create(
+                title=GROUP_TITLE, slug=SLUG, description=GROUP_DESCRIPTION),
+            Group.objects.create(
+                title=SECOND_GROUP_TITLE,
+                slug=SECOND_SLUG,
+                description=GROUP_DESCRIPTION),
+        ]
+        others = [
+            User.objects.create_user(username=f"user{i}", last_name=f"{i}")
+            for i in range(3)
+        ]
+        Post.objects.bulk_create(
+            Post(
+                author=cls.author if i % 2 else others[i % len(others)],
+                group=groups[i % len(groups)],
+                text=f"Текст {i}",
+            )
+            for i in range(POSTS_ON_PAGE * 4)
+        )
+        cls.post = Post.objects.filter(author=cls.author).first()
+        cls.POST_DETAIL_URL = reverse(
+            "posts:post_detail", args=[cls.post.id])
+
+    def setUp(self):
+        cache.clear()
+        self.guest = Client()
+
+    def test_feed_query_budget(self):
+        """Страницы укладываются в бюджет запросов."""
+        budget = [
+            [INDEX_URL, {}, 1],
+            [INDEX_URL, {"page": 2}, 1],
+            [GROUP_LIST_URL, {}, 2],
+            [GROUP_LIST_URL, {"page": 2}, 2],
+            [PROFILE_URL, {}, 2],
+            [PROFILE_URL, {"page": 2}, 2],
+            [self.POST_DETAIL_URL, {}, 1],
+        ]
+        for url, params, queries in budget:
+            with self.subTest(url=url, params=params):
+                with self.assertNumQueries(queries):
+                    self.guest.get(url, params)
+
+    def test_cursor_page_query_budget(self):
+        """Страница по курсору стоит столько же, сколько первая."""
+        for url, queries in [
+            [INDEX_URL, 1], [GROUP_LIST_URL, 2], [PROFILE_URL, 2]
+        ]:
+            with self.subTest(url=url):
+                cursor = self.guest.get(url).context["page_obj"].next_cursor
+                with self.assertNumQueries(queries):
+                    self.guest.get(url, {"cursor": cursor})
+
+    def test_numbered_pages_read_count_from_cache(self):
+        """Нумерованные страницы не считают посты, пока итог есть в кеше."""
+        rebuild_counters()
+        prime_cached_counts()
+        for url, queries in [
+            [INDEX_URL, 1], [GROUP_LIST_URL, 2], [PROFILE_URL, 2]
+        ]:
+            with self.subTest(url=url):
+                with self.assertNumQueries(queries):
+                    response = self.guest.get(url, {"page": 2})
+                self.assertFalse(
+                    response.context["page_obj"].paginator.uncounted)
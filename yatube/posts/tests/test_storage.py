@@ -0,0 +1,79 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+
+from posts.images import release_image
+from posts.models import Post, User
+
+AUTHOR_USERNAME = "Abraham"
+POST_TEXT = "Тестовый текст"
+SMALL_GIF = (
+    b"\x47\x49\x46\x38\x39\x61\x02\x00"
+    b"\x01\x00\x80\x00\x00\x00\x00\x00"
+    b"\xFF\xFF\xFF\x21\xF9\x04\x00\x00"
+    b"\x00\x00\x00\x2C\x00\x00\x00\x00"
+    b"\x02\x00\x01\x00\x00\x02\x02\x0C"
+    b"\x0A\x00\x3B"
+)
+OTHER_GIF = SMALL_GIF[:-1] + b"\x00\x3B"
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ContentAddressedStorageTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=AUTHOR_USERNAME)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def create_post(self, content, name="small.gif"):
+        return Post.objects.create(
+            author=self.user,
+            text=POST_TEXT,
+            image=SimpleUploadedFile(name, content, "image/gif"),
+        )
+
+    def test_identical_uploads_share_file(self):
+        """Одинаковые загрузки хранятся одним файлом в подкаталогах по
+        хешу содержимого, разные - разными.
+        """
+        first = self.create_post(SMALL_GIF, "first.gif")
+        second = self.create_post(SMALL_GIF, "second.GIF")
+        other = self.create_post(OTHER_GIF)
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertNotEqual(first.image.name, other.image.name)
+        self.assertRegex(
+            first.image.name, r"^posts/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}"
+            r"\.gif$")
+
+    def test_file_is_kept_while_referenced(self):
+        """Файл удаляется вместе с последним ссылающимся на него постом."""
+        first = self.create_post(SMALL_GIF)
+        second = self.create_post(SMALL_GIF)
+        name, storage = first.image.name, first.image.storage
+        first.delete()
+        release_image(name)
+        self.assertTrue(storage.exists(name))
+        second.delete()
+        release_image(name)
+        self.assertFalse(storage.exists(name))
+
+    def test_concurrent_identical_upload_reuses_file(self):
+        """Загрузка, которая не застала такой же файл при проверке, но
+        столкнулась с ним при записи, получает его имя.
+        """
+        name = self.create_post(SMALL_GIF).image.name
+        storage = Post.image.field.storage
+        with mock.patch.object(storage, "exists", return_value=False):
+            saved = storage.save(
+                "posts/again.gif", SimpleUploadedFile("again.gif", SMALL_GIF))
+        self.assertEqual(saved, name)
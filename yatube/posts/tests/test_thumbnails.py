@@ -0,0 +1,115 @@
+import shutil
+import tempfile
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from sorl.thumbnail import default
+from sorl.thumbnail.models import KVStore
+
+from posts.models import Post, User
+from posts.templatetags.post_thumbnails import post_thumbnail
+from posts.thumbnails import generate_thumbnails, prefetch_thumbnails
+
+AUTHOR_USERNAME = "Abraham"
+INDEX_URL = reverse("posts:index")
+POST_TEXT = "Тестовый текст"
+SMALL_GIF = (
+    b"\x47\x49\x46\x38\x39\x61\x02\x00"
+    b"\x01\x00\x80\x00\x00\x00\x00\x00"
+    b"\xFF\xFF\xFF\x21\xF9\x04\x00\x00"
+    b"\x00\x00\x00\x2C\x00\x00\x00\x00"
+    b"\x02\x00\x01\x00\x00\x02\x02\x0C"
+    b"\x0A\x00\x3B"
+)
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class PostThumbnailsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=AUTHOR_USERNAME)
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text=POST_TEXT,
+            image=SimpleUploadedFile("small.gif", SMALL_GIF, "image/gif"),
+        )
+        cls.POST_DETAIL_URL = reverse("posts:post_detail", args=[cls.post.id])
+        cls.other_post = Post.objects.create(
+            author=cls.user,
+            text=POST_TEXT,
+            image=SimpleUploadedFile("other.gif", SMALL_GIF, "image/gif"),
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        default.kvstore.clear()
+        self.guest = Client()
+
+    def test_original_image_is_shown_until_thumbnail_is_ready(self):
+        """Пока миниатюры нет, страница поста показывает оригинал
+        и не создаёт миниатюру сама.
+        """
+        self.assertContains(
+            self.guest.get(self.POST_DETAIL_URL), self.post.image.url)
+        self.assertIsNone(post_thumbnail(self.post.image, "detail"))
+        generate_thumbnails(self.post.image.name)
+        thumbnail = post_thumbnail(self.post.image, "detail")
+        response = self.guest.get(self.POST_DETAIL_URL)
+        self.assertNotContains(response, self.post.image.url)
+        self.assertContains(response, thumbnail.url)
+
+    def test_feed_shows_thumbnail_once_ready(self):
+        """Лента показывает миниатюру, как только воркер её создал."""
+        self.assertContains(self.guest.get(INDEX_URL), self.post.image.url)
+        generate_thumbnails(self.post.image.name)
+        thumbnail = post_thumbnail(self.post.image, "card")
+        response = self.guest.get(INDEX_URL)
+        self.assertNotContains(response, self.post.image.url)
+        self.assertContains(response, thumbnail.url)
+
+    def test_prefetch_is_one_lookup_per_page(self):
+        """Миниатюры страницы читаются из хранилища одним запросом,
+        а повторно - из памяти процесса.
+        """
+        for post in (self.post, self.other_post):
+            generate_thumbnails(post.image.name)
+        # Миниатюры созданы другим процессом: ни в кеше, ни в памяти их нет.
+        cache.clear()
+        default.kvstore._lru.clear()
+        posts = list(Post.objects.all())
+        with self.assertNumQueries(1):
+            prefetch_thumbnails(posts, "card")
+        self.assertTrue(all(post.thumbnail for post in posts))
+        cache.clear()
+        with self.assertNumQueries(0):
+            prefetch_thumbnails(posts, "card")
+
+    def test_process_memory_forgets_thumbnails_deleted_elsewhere(self):
+        """Миниатюра, которую удалил другой процесс, пропадает из памяти
+        и кеша этого процесса, когда истекают их сроки.
+        """
+        generate_thumbnails(self.post.image.name)
+        self.assertIsNotNone(post_thumbnail(self.post.image, "card"))
+        # Другой процесс удалил записи из БД и своего кеша.
+        KVStore.objects.all().delete()
+        self.assertIsNotNone(post_thumbnail(self.post.image, "card"))
+        later = max(
+            settings.THUMBNAIL_LRU_TIMEOUT,
+            settings.THUMBNAIL_CACHE_TIMEOUT) + 1
+        with mock.patch(
+                "posts.kvstore.time.monotonic",
+                return_value=time.monotonic() + later), \
+                mock.patch("time.time", return_value=time.time() + later):
+            self.assertIsNone(post_thumbnail(self.post.image, "card"))
@@ -0,0 +1,166 @@
+import io
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from posts.forms import PostForm
+from posts.images import (
+    is_normalized, normalize_image, process_image, release_image,
+)
+from posts.models import Post, User
+from posts.workers import submit
+
+AUTHOR_USERNAME = "Abraham"
+POST_TEXT = "Тестовый текст"
+EXIF_ORIENTATION = 0x0112
+ROTATED_270 = 6
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def image_bytes(size, image_format="JPEG", exif=None):
+    output = io.BytesIO()
+    options = {"exif": exif} if exif is not None else {}
+    Image.new("RGB", size, "red").save(output, image_format, **options)
+    return output.getvalue()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class PostImageUploadTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=AUTHOR_USERNAME)
+        cls.post = Post.objects.create(author=cls.user, text=POST_TEXT)
+        cls.POST_EDIT_URL = reverse("posts:post_edit", args=[cls.post.id])
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.author = Client()
+        self.author.force_login(self.user)
+
+    def edit_with_image(self, content, name="photo.jpg"):
+        return self.author.post(self.POST_EDIT_URL, {
+            "text": POST_TEXT,
+            "image": SimpleUploadedFile(name, content, "image/jpeg"),
+        })
+
+    def test_upload_is_saved(self):
+        """Картинка из формы редактирования сохраняется в посте."""
+        self.edit_with_image(image_bytes((40, 20)))
+        self.post.refresh_from_db()
+        self.assertTrue(self.post.image)
+        self.assertTrue(self.post.image.storage.exists(self.post.image.name))
+
+    def test_oversized_upload_is_rejected(self):
+        """Файл больше лимита не сохраняется, форма сообщает об ошибке."""
+        with mock.patch("posts.uploads.POST_IMAGE_MAX_SIZE", 100), \
+                mock.patch("posts.forms.POST_IMAGE_MAX_SIZE", 100):
+            response = self.edit_with_image(image_bytes((40, 20)))
+        self.assertTrue(response.context["form"].has_error("image"))
+        self.post.refresh_from_db()
+        self.assertFalse(self.post.image)
+
+    def test_image_is_checked_by_header(self):
+        """Формат и число пикселей проверяются по заголовку файла."""
+        cases = [
+            [b"not an image", "invalid_image"],
+            [image_bytes((40, 20), "BMP"), "invalid_image"],
+            [image_bytes((40, 20)), "too_many_pixels"],
+        ]
+        with mock.patch("posts.forms.POST_IMAGE_MAX_PIXELS", 100):
+            for content, code in cases:
+                with self.subTest(code=code):
+                    form = PostForm({"text": POST_TEXT}, {
+                        "image": SimpleUploadedFile("photo.jpg", content),
+                    })
+                    self.assertTrue(form.has_error("image", code))
+
+    def test_normalize_image(self):
+        """Обработка поворачивает картинку по EXIF, убирает метаданные,
+        уменьшает её и переключает пост на новый файл.
+        """
+        exif = Image.Exif()
+        exif[EXIF_ORIENTATION] = ROTATED_270
+        post = Post.objects.create(
+            author=self.user,
+            text=POST_TEXT,
+            image=SimpleUploadedFile(
+                "photo.jpg", image_bytes((40, 20), exif=exif)),
+        )
+        original, updated = post.image.name, post.updated
+        with mock.patch("posts.images.POST_IMAGE_MAX_SIDE", 10):
+            normalized = normalize_image(original)
+        post.refresh_from_db()
+        self.assertEqual(post.image.name, normalized)
+        # Новое время правки меняет валидаторы страницы поста.
+        self.assertGreater(post.updated, updated)
+        self.assertTrue(is_normalized(normalized))
+        self.assertFalse(post.image.storage.exists(original))
+        with Image.open(post.image) as image:
+            self.assertEqual(image.size, (5, 10))
+            self.assertFalse(image.getexif())
+
+    def test_normalize_keeps_original_uploaded_again(self):
+        """Если ту же картинку загрузили снова, пока шла обработка,
+        оригинал остаётся на диске для нового поста.
+        """
+        content = image_bytes((20, 20))
+        post = Post.objects.create(
+            author=self.user, text=POST_TEXT,
+            image=SimpleUploadedFile("photo.jpg", content))
+        original = post.image.name
+
+        def upload_again(name):
+            if name == original:
+                Post.objects.create(
+                    author=self.user, text=POST_TEXT,
+                    image=SimpleUploadedFile("again.jpg", content))
+            release_image(name)
+
+        with mock.patch("posts.images.release_image", upload_again):
+            normalize_image(original)
+        self.assertTrue(post.image.storage.exists(original))
+        self.assertEqual(Post.objects.filter(image=original).count(), 1)
+
+    def test_image_is_processed_only_when_changed(self):
+        """Обработка картинки запускается, только когда картинка поста
+        новая: правка текста её не повторяет.
+        """
+        with mock.patch("posts.signals.transaction.on_commit",
+                        lambda callback: callback()), \
+                mock.patch("posts.signals.submit") as submit:
+            post = Post.objects.create(
+                author=self.user, text=POST_TEXT,
+                image=SimpleUploadedFile("photo.jpg", image_bytes((5, 5))))
+            first = post.image.name
+            post.text = "Новый текст"
+            post.save()
+            post.image = SimpleUploadedFile("other.jpg", image_bytes((6, 6)))
+            post.save()
+        processed = [
+            call[0][1] for call in submit.call_args_list
+            if call[0][0] is process_image]
+        self.assertEqual(processed, [first, post.image.name])
+
+    def test_worker_result_is_handled_in_parent_process(self):
+        """Итог фоновой задачи обрабатывается в процессе, который её
+        отдал: у воркера свой кеш.
+        """
+        executor = ThreadPoolExecutor(max_workers=1)
+        then = mock.Mock()
+        with override_settings(POST_THUMBNAIL_WORKERS=1), \
+                mock.patch("posts.workers._executor", executor):
+            submit(str.upper, "image.jpg", then=then)
+            executor.shutdown(wait=True)
+        then.assert_called_once_with("IMAGE.JPG")
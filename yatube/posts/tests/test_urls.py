@@ -1,3 +1,4 @@
+from core.query_budgets import QueryBudgetMixin
 from django.test import Client, TestCase
 from django.urls import reverse
 
@@ -17,7 +18,7 @@ FOLLOW_REDIRECT_CREATE_TO_LOGIN = f"{LOGIN_URL}?next={POST_CREATE_URL}"
 PROFILE_URL = reverse("posts:profile", args=[AUTHOR_USERNAME])
 
 
-class URLTests(TestCase):
+class URLTests(QueryBudgetMixin, TestCase):
     @classmethod
     def setUpClass(cls):
         super().setUpClass()
@@ -1,7 +1,14 @@
+from datetime import datetime
+from unittest import mock
+
+from core.query_budgets import QueryBudgetMixin
+from django.core.cache import cache
 from django.test import Client, TestCase
 from django.urls import reverse
+from django.utils import timezone
 
 from posts.models import Group, Post, User
+from posts.paginators import AFTER, make_cursor
 from yatube.settings import POSTS_ON_PAGE
 
 SLUG = "testslug"
@@ -23,7 +30,7 @@ INDEX_URL = reverse("posts:index")
 PROFILE_URL = reverse("posts:profile", args=[AUTHOR_USERNAME])
 
 
-class YatubeViewsTest(TestCase):
+class YatubeViewsTest(QueryBudgetMixin, TestCase):
     @classmethod
     def setUpClass(cls):
         super().setUpClass()
@@ -93,7 +100,9 @@ class YatubeViewsTest(TestCase):
         self.assertNotIn(self.post, response.context["page_obj"])
 
 
-class PaginatorViewsTest(TestCase):
+# Кеш целых страниц отдал бы повторный запрос гостя, не дойдя до view.
+@mock.patch("core.middleware.PAGE_CACHE_NAMESPACES", ())
+class PaginatorViewsTest(QueryBudgetMixin, TestCase):
     @classmethod
     def setUpClass(cls):
         super().setUpClass()
@@ -109,6 +118,7 @@ class PaginatorViewsTest(TestCase):
             for i in range(cls.BATCH_SIZE))
 
     def setUp(self):
+        cache.clear()
         self.guest_client = Client()
 
     def test_page_contains_the_correct_number_of_posts(self):
@@ -125,3 +135,75 @@ class PaginatorViewsTest(TestCase):
         for url, posts_count in set:
             response = self.guest_client.get(url)
             self.assertEqual(len(response.context["page_obj"]), posts_count)
+
+    def test_cursor_pages_walk_the_whole_feed(self):
+        """Курсор ведёт по ленте вперёд и назад без пропусков."""
+        for url in (INDEX_URL, PROFILE_URL, GROUP_LIST_URL):
+            with self.subTest(url=url):
+                first = self.guest_client.get(url).context["page_obj"]
+                self.assertEqual(len(first), POSTS_ON_PAGE)
+                self.assertFalse(first.has_previous())
+                second = self.guest_client.get(
+                    url, {"cursor": first.next_cursor}).context["page_obj"]
+                self.assertEqual(
+                    len(second), self.BATCH_SIZE - POSTS_ON_PAGE)
+                self.assertFalse(second.has_next())
+                self.assertEqual(
+                    {post.pk for post in first} | {post.pk for post in second},
+                    set(Post.objects.values_list("pk", flat=True)))
+                back = self.guest_client.get(
+                    url, {"cursor": second.previous_cursor}
+                ).context["page_obj"]
+                self.assertEqual(list(back), list(first))
+                self.assertFalse(back.has_previous())
+
+    def test_broken_cursor_shows_first_page(self):
+        """Испорченный курсор открывает первую страницу."""
+        response = self.guest_client.get(INDEX_URL, {"cursor": "broken!"})
+        self.assertEqual(
+            len(response.context["page_obj"]), POSTS_ON_PAGE)
+        self.assertFalse(response.context["page_obj"].has_previous())
+
+    def test_out_of_range_cursor_shows_first_page(self):
+        """Курсор с датой в поясе или id, которого не бывает в базе,
+        тоже открывает первую страницу, а не ошибку сервера.
+        """
+        now = datetime(2020, 1, 1, 12, 0)
+        for cursor in [
+            make_cursor(AFTER, now, 10 ** 30),
+            make_cursor(AFTER, now, 0),
+            make_cursor(AFTER, now.replace(
+                tzinfo=timezone.get_fixed_timezone(180)), 1),
+        ]:
+            with self.subTest(cursor=cursor):
+                response = self.guest_client.get(INDEX_URL, {"cursor": cursor})
+                self.assertEqual(response.status_code, 200)
+                self.assertFalse(
+                    response.context["page_obj"].has_previous())
+
+    def test_cold_count_cache_pages_without_count(self):
+        """Без итога в кеше страницы листаются по признаку следующей."""
+        first = self.guest_client.get(
+            INDEX_URL, {"page": 1}).context["page_obj"]
+        self.assertTrue(first.paginator.uncounted)
+        self.assertTrue(first.has_next())
+        last = self.guest_client.get(
+            INDEX_URL, {"page": 2}).context["page_obj"]
+        self.assertFalse(last.has_next())
+        self.assertEqual(
+            self.guest_client.get(
+                INDEX_URL, {"page": 1}).context["page_obj"].paginator.count,
+            self.BATCH_SIZE)
+
+    def test_new_post_adjusts_cached_count(self):
+        """Новый пост увеличивает закешированный итог ленты."""
+        self.guest_client.get(INDEX_URL, {"page": 2})
+        Post.objects.create(
+            author=self.user, text="Ещё один", group=self.group)
+        paginator = self.guest_client.get(
+            GROUP_LIST_URL, {"page": 1}).context["page_obj"].paginator
+        self.assertEqual(
+            self.guest_client.get(
+                INDEX_URL, {"page": 1}).context["page_obj"].paginator.count,
+            self.BATCH_SIZE + 1)
+        self.assertTrue(paginator.uncounted)
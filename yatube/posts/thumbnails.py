@@ -0,0 +1,95 @@
+from core.timing import measure
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as default_settings, settings
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores.base import add_prefix
+from yatube.settings import POST_THUMBNAILS
+
+from .caching import bump_versions, post_scopes
+
+
+class PostThumbnailBackend(ThumbnailBackend):
+    """Бэкенд sorl-thumbnail, который умеет только спросить о готовой
+    миниатюре, не создавая её в запросе.
+    """
+
+    def thumbnail_options(self, source, options):
+        options = dict(options)
+        if settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault("format", self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(settings, attr)
+            if value != getattr(default_settings, attr):
+                options.setdefault(key, value)
+        return options
+
+    def thumbnail_key(self, file_, geometry_string, **options):
+        source = ImageFile(file_)
+        name = self._get_thumbnail_filename(
+            source, geometry_string, self.thumbnail_options(source, options))
+        return add_prefix(ImageFile(name, default.storage).key)
+
+    def get_thumbnail(self, file_, geometry_string, **options):
+        with measure("thumb"):
+            return super().get_thumbnail(file_, geometry_string, **options)
+
+    def get_ready_thumbnail(self, file_, geometry_string, **options):
+        """Готовая миниатюра или None, если воркер ещё не успел."""
+        return self.get_ready_thumbnails(
+            [file_], geometry_string, **options).get(file_.name)
+
+    def get_ready_thumbnails(self, files, geometry_string, **options):
+        """Готовые миниатюры нескольких картинок по их именам: все
+        значения берутся из хранилища одним проходом.
+        """
+        with measure("thumb"):
+            keys = {
+                file_.name: self.thumbnail_key(
+                    file_, geometry_string, **options)
+                for file_ in files
+            }
+            values = default.kvstore.get_many_raw(list(set(keys.values())))
+        return {
+            name: deserialize_image_file(values[key])
+            for name, key in keys.items() if key in values
+        }
+
+
+def prefetch_thumbnails(posts, alias):
+    """Кладёт в post.thumbnail готовую миниатюру размера alias или None."""
+    images = [post.image for post in posts if post.image]
+    geometry, options = POST_THUMBNAILS[alias]
+    thumbnails = default.backend.get_ready_thumbnails(
+        images, geometry, **options) if images else {}
+    for post in posts:
+        post.thumbnail = thumbnails.get(post.image.name)
+
+
+def image_file(name):
+    from .models import Post
+
+    return ImageFile(name, Post.image.field.storage)
+
+
+def generate_thumbnails(name):
+    """Создаёт миниатюры всех размеров из POST_THUMBNAILS для картинки."""
+    source = image_file(name)
+    for geometry, options in POST_THUMBNAILS.values():
+        default.backend.get_thumbnail(source, geometry, **options)
+    expire_image_fragments(name)
+    return name
+
+
+def expire_image_fragments(name):
+    """Ленты с этой картинкой показывали оригинал вместо миниатюры."""
+    from .models import Post
+
+    scopes = set()
+    for username, slug in Post.objects.filter(image=name).values_list(
+            "author__username", "group__slug"):
+        scopes.update(post_scopes(username, slug))
+    if scopes:
+        bump_versions(scopes)
@@ -0,0 +1,143 @@
+import heapq
+from itertools import islice
+
+from django.db.models import F, Value
+from django.db.models.functions import Concat, Substr
+from yatube.settings import (
+    POSTS_ON_PAGE, TIMELINE_FANOUT_LIMIT, TIMELINE_SIZE,
+)
+
+from .models import AuthorStats, Follow, Post, Timeline
+from .paginators import CachedCountPaginator
+
+# Длина упакованной ленты: на пост - id до семи цифр и запятая.
+MAX_LENGTH = TIMELINE_SIZE * 8
+
+
+def pack(ids):
+    return "".join(f"{pk}," for pk in ids)[:MAX_LENGTH]
+
+
+def unpack(packed, limit=TIMELINE_SIZE):
+    """Первые limit id упакованной ленты: дальше строка не разбирается."""
+    parts = packed.split(",", limit)
+    # Лента обрезается по длине, поэтому кусок после последней запятой -
+    # обрывок id или пустая строка.
+    if len(parts) <= limit:
+        parts.pop()
+    return [int(pk) for pk in parts[:limit]]
+
+
+def is_popular(author_id):
+    return AuthorStats.objects.filter(
+        author_id=author_id, followers_count__gt=TIMELINE_FANOUT_LIMIT,
+    ).exists()
+
+
+def popular_authors(user):
+    return Follow.objects.filter(
+        user=user, author__stats__followers_count__gt=TIMELINE_FANOUT_LIMIT,
+    ).values("author")
+
+
+def push_post(post_id, author_id):
+    """Дописывает пост в начало лент всех подписчиков автора одним
+    UPDATE. Посты популярных авторов подмешиваются при чтении.
+
+    Выполняется в фоне: запрос, создавший пост, лент не переписывает.
+    """
+    if is_popular(author_id):
+        return
+    # Несобранные ленты (NULL) соберутся при чтении вместе с постом.
+    Timeline.objects.filter(
+        user__follower__author_id=author_id,
+    ).exclude(ids=None).update(
+        ids=Substr(Concat(Value(f"{post_id},"), F("ids")), 1, MAX_LENGTH))
+
+
+def expire_timeline(user_id):
+    """Подписки изменились: лента соберётся заново при чтении."""
+    Timeline.objects.filter(user_id=user_id).update(ids=None)
+
+
+def expire_unpopular_author(author_id):
+    """Автор, который только что перестал быть популярным: его посты
+    больше не подмешиваются при чтении и не лежат в лентах подписчиков,
+    поэтому их ленты соберутся заново.
+    """
+    Timeline.objects.filter(
+        user__follower__author_id=author_id,
+        user__follower__author__stats__followers_count=TIMELINE_FANOUT_LIMIT,
+    ).update(ids=None)
+
+
+def build_timeline(user):
+    ids = list(Post.objects.filter(
+        author__in=Follow.objects.filter(user=user).values("author"),
+    ).exclude(
+        author__in=popular_authors(user),
+    ).order_by("-id").values_list("id", flat=True)[:TIMELINE_SIZE])
+    Timeline.objects.update_or_create(user=user, defaults={"ids": pack(ids)})
+    return ids
+
+
+def author_post_ids(author_id, limit):
+    return Post.objects.filter(author_id=author_id).order_by(
+        "-id").values_list("id", flat=True)[:limit]
+
+
+def unique(ids):
+    """Убирает повторы из id, отсортированных по убыванию."""
+    last = None
+    for pk in ids:
+        if pk != last:
+            yield pk
+        last = pk
+
+
+def timeline_ids(user, limit=TIMELINE_SIZE):
+    """Первые limit id постов ленты подписок пользователя, новые первыми.
+
+    Посты популярных авторов берутся отдельным запросом на автора:
+    каждый идёт по индексу автора уже в нужном порядке, и списки
+    сливаются без сортировки всех их постов в базе.
+    """
+    limit = min(limit, TIMELINE_SIZE)
+    packed = Timeline.objects.filter(user=user).values_list(
+        "ids", flat=True).first()
+    ids = build_timeline(user) if packed is None else unpack(packed, limit)
+    popular = [
+        author_post_ids(author_id, limit)
+        for author_id in popular_authors(user).values_list(
+            "author", flat=True)
+    ]
+    # Фоновые задачи могли дописать посты в ленту не по порядку.
+    ids = sorted(ids, reverse=True)
+    # Пост мог попасть в ленту дважды: при сборке и при публикации.
+    return list(islice(
+        unique(heapq.merge(ids, *popular, reverse=True)), limit))
+
+
+class TimelineIds:
+    """Id ленты подписок для пагинатора: срез разбирает ленту только до
+    своего конца.
+    """
+
+    def __init__(self, user):
+        self.user = user
+
+    def __getitem__(self, index):
+        return timeline_ids(self.user, index.stop)[index]
+
+
+def timeline_page(user, number):
+    """Страница ленты подписок: id берутся из ленты, посты страницы -
+    одним запросом. Удалённые посты пропускаются. Длина ленты не
+    считается, как у ленты с холодным итогом.
+    """
+    page = CachedCountPaginator(
+        TimelineIds(user), POSTS_ON_PAGE, None).get_page(number)
+    posts = Post.objects.select_related("author", "group").in_bulk(
+        page.object_list)
+    page.object_list = [posts[pk] for pk in page.object_list if pk in posts]
+    return page
@@ -0,0 +1,19 @@
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from yatube.settings import POST_IMAGE_MAX_SIZE
+
+
+class BoundedUploadHandler(TemporaryFileUploadHandler):
+    """Пишет загрузку на диск, а не в память, и не больше
+    POST_IMAGE_MAX_SIZE байт.
+
+    Остаток слишком большого файла читается из запроса и отбрасывается,
+    размер файла остаётся полным: форма отклонит его по размеру.
+    """
+
+    def receive_data_chunk(self, raw_data, start):
+        if start + len(raw_data) <= POST_IMAGE_MAX_SIZE:
+            return super().receive_data_chunk(raw_data, start)
+        if self.file.tell():
+            self.file.seek(0)
+            self.file.truncate()
+        return None
@@ -1,43 +1,95 @@
+from core.routers import use_replicas
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.http import Http404
 from django.shortcuts import get_object_or_404, redirect, render
+from django.views.decorators.http import require_POST
 from yatube.settings import POSTS_ON_PAGE
 
+from .caching import (
+    INDEX_SCOPE, NAMES_SCOPE, author_scope, fragment_version, group_scope,
+    remember_versions,
+)
+from .conditions import feed_condition, get_post, post_condition
 from .forms import PostForm
-from .models import Group, Post, User
+from .models import Follow, Group, Post, User
+from .paginators import CachedCountPaginator, KeysetPaginator
+from .timelines import timeline_page
 
 
-def paginator_view(request, post_list):
-    return Paginator(post_list, POSTS_ON_PAGE).get_page(
-        request.GET.get("page"))
+def paginator_view(request, post_list, scope):
+    """По умолчанию листает ленту курсором (?cursor=...).
+    Нумерованные страницы (?page=N) остаются для небольших выборок,
+    число постов в ленте scope они берут из кеша.
+    """
+    if "page" in request.GET:
+        return CachedCountPaginator(post_list, POSTS_ON_PAGE, scope).get_page(
+            request.GET.get("page"))
+    return KeysetPaginator(post_list, POSTS_ON_PAGE).get_page(
+        request.GET.get("cursor"))
 
 
+@use_replicas(lambda: INDEX_SCOPE)
+@feed_condition(lambda: INDEX_SCOPE)
 def index(request):
     return render(request, "posts/index.html", {
-        "page_obj": paginator_view(request, Post.objects.all())
+        "feed_version": fragment_version(INDEX_SCOPE, request),
+        "page_obj": paginator_view(
+            request,
+            Post.objects.select_related("author", "group"),
+            INDEX_SCOPE,
+        ),
     })
 
 
+@use_replicas(group_scope)
+@feed_condition(group_scope)
 def group_posts(request, slug):
+    feed_version = fragment_version(group_scope(slug), request)
     group = get_object_or_404(Group, slug=slug)
     return render(request, "posts/group_list.html", {
+        "feed_version": feed_version,
         "group": group,
-        "page_obj": paginator_view(request, group.posts.all())
+        "page_obj": paginator_view(
+            request,
+            group.posts.select_related("author"),
+            group_scope(slug),
+        ),
     })
 
 
+@use_replicas(author_scope)
+@feed_condition(author_scope)
 def profile(request, username):
-    user = get_object_or_404(User, username=username)
+    feed_version = fragment_version(author_scope(username), request)
+    user = get_object_or_404(
+        User.objects.select_related("stats"), username=username)
+    following = (
+        request.user.is_authenticated
+        and request.user != user
+        and Follow.objects.filter(user=request.user, author=user).exists()
+    )
     return render(request, "posts/profile.html", {
+        "feed_version": feed_version,
         "author": user,
-        "page_obj": paginator_view(request, user.posts.all()),
+        "following": following,
+        "page_obj": paginator_view(
+            request,
+            user.posts.select_related("group"),
+            author_scope(username),
+        ),
     })
 
 
+# Страница поста читается с основной базы: ленту автора, от версии
+# которой страница зависит в кешах, до чтения поста не узнать.
+@post_condition
 def post_detail(request, post_id):
-    return render(request, "posts/post_detail.html", {
-        "post": get_object_or_404(Post, id=post_id)
-    })
+    post = get_post(request, post_id)
+    if post is None:
+        raise Http404("Пост не найден.")
+    remember_versions(
+        request, [author_scope(post.author.username), NAMES_SCOPE])
+    return render(request, "posts/post_detail.html", {"post": post})
 
 
 @login_required
@@ -70,3 +122,30 @@ def post_edit(request, post_id):
         "is_edit": True,
     }
     return render(request, "posts/create_post.html", context)
+
+
+@login_required
+def follow_index(request):
+    return render(request, "posts/follow.html", {
+        "page_obj": timeline_page(request.user, request.GET.get("page")),
+    })
+
+
+@require_POST
+@login_required
+def profile_follow(request, username):
+    author = get_object_or_404(User, username=username)
+    if author != request.user:
+        Follow.objects.get_or_create(user=request.user, author=author)
+    return redirect("posts:profile", username=username)
+
+
+@require_POST
+@login_required
+def profile_unfollow(request, username):
+    author = get_object_or_404(User, username=username)
+    follow = Follow.objects.filter(user=request.user, author=author).first()
+    if follow is not None:
+        # Через экземпляр, чтобы сработали сигналы счётчиков и лент.
+        follow.delete()
+    return redirect("posts:profile", username=username)
@@ -0,0 +1,58 @@
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+_executor = None
+
+
+def create_executor(workers):
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        # Инициализатор импортируется до настройки Django, поэтому это
+        # сам django.setup, а не функция из приложения.
+        initializer=django.setup,
+    )
+
+
+def log_failure(future):
+    if future.exception() is not None:
+        logger.error(
+            "Фоновая задача не выполнена", exc_info=future.exception())
+
+
+def finish_in_parent(then):
+    def callback(future):
+        if future.exception() is None:
+            try:
+                then(future.result())
+            except Exception:
+                logger.exception("Обработка итога фоновой задачи не удалась")
+    return callback
+
+
+def submit(func, *args, then=None):
+    """Отдаёт func(*args) пулу процессов, минуя запрос.
+
+    then(итог) вызывается в этом процессе, когда задача выполнена: кеш
+    процесса воркера с кешем сайта не общий, и сбрасывать его нужно здесь.
+    """
+    global _executor
+    # Из django.conf при вызове: тесты выключают пул, иначе задачи
+    # в новых процессах открыли бы настоящую базу, а не тестовую.
+    workers = settings.POST_THUMBNAIL_WORKERS
+    if not workers:
+        result = func(*args)
+        if then is not None:
+            then(result)
+        return
+    if _executor is None:
+        _executor = create_executor(workers)
+    future = _executor.submit(func, *args)
+    future.add_done_callback(log_failure)
+    if then is not None:
+        future.add_done_callback(finish_in_parent(then))
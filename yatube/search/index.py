@@ -0,0 +1,112 @@
+import re
+
+from django.db import connection
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from posts.models import Post
+
+TABLE = "search_post"
+HIGHLIGHT_START = "\x02"
+HIGHLIGHT_END = "\x03"
+SNIPPET_TOKENS = 24
+
+
+def index_post(post_id, text):
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLE} WHERE rowid = %s", [post_id])
+        cursor.execute(
+            f"INSERT INTO {TABLE} (rowid, text) VALUES (%s, %s)",
+            [post_id, text])
+
+
+def unindex_post(post_id):
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLE} WHERE rowid = %s", [post_id])
+
+
+def rebuild_index():
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLE}")
+        cursor.execute(
+            f"INSERT INTO {TABLE} (rowid, text) "
+            f"SELECT id, text FROM {Post._meta.db_table}")
+
+
+def index_posts_after(post_id):
+    """Индексирует одним запросом посты с id больше post_id, которых ещё
+    нет в индексе: массовый импорт обходит сигналы.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {TABLE} (rowid, text) "
+            f"SELECT id, text FROM {Post._meta.db_table} WHERE id > %s "
+            f"AND id NOT IN (SELECT rowid FROM {TABLE} WHERE rowid > %s)",
+            [post_id, post_id])
+
+
+def match_expression(query):
+    """Превращает ввод пользователя в безопасное выражение FTS5:
+    все слова обязательны, последнее ищется по префиксу.
+    """
+    words = re.findall(r"\w+", query)
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+def match_ids_sql():
+    return f"SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s"
+
+
+def highlight(snippet):
+    return mark_safe(
+        escape(snippet)
+        .replace(HIGHLIGHT_START, "<mark>")
+        .replace(HIGHLIGHT_END, "</mark>"))
+
+
+class SearchResults:
+    """Ленивый список найденных постов по убыванию релевантности (bm25).
+
+    Paginator берёт у него count() и срез страницы; посты страницы
+    вместе с авторами и группами загружаются одним запросом.
+    """
+
+    def __init__(self, query):
+        self.match = match_expression(query)
+
+    def count(self):
+        if self.match is None:
+            return 0
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT count(*) FROM {TABLE} WHERE {TABLE} MATCH %s",
+                [self.match])
+            return cursor.fetchone()[0]
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, page):
+        if self.match is None:
+            return []
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid, snippet({TABLE}, 0, %s, %s, '…', %s) "
+                f"FROM {TABLE} WHERE {TABLE} MATCH %s "
+                f"ORDER BY rank LIMIT %s OFFSET %s",
+                [HIGHLIGHT_START, HIGHLIGHT_END, SNIPPET_TOKENS, self.match,
+                 page.stop - page.start, page.start])
+            rows = cursor.fetchall()
+        posts = Post.objects.select_related("author", "group").in_bulk(
+            [post_id for post_id, _ in rows])
+        results = []
+        for post_id, snippet in rows:
+            if post_id in posts:
+                post = posts[post_id]
+                post.snippet = highlight(snippet)
+                results.append(post)
+        return results
@@ -0,0 +1,60 @@
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Post, User
+
+AUTHOR_USERNAME = "Abraham"
+SEARCH_URL = reverse("search:search")
+ADMIN_POSTS_URL = reverse("admin:posts_post_changelist")
+
+
+class SearchTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=AUTHOR_USERNAME)
+        cls.post = Post.objects.create(
+            author=cls.user, text="Кот сидел на окне и смотрел на кота")
+        cls.other = Post.objects.create(
+            author=cls.user, text="Собака <b>лаяла</b> на кота")
+        Post.objects.create(author=cls.user, text="Совсем про другое")
+
+    def setUp(self):
+        self.guest = Client()
+
+    def found(self, query):
+        return list(self.guest.get(
+            SEARCH_URL, {"q": query}).context["page_obj"])
+
+    def test_search_ranks_and_highlights(self):
+        """Поиск находит посты по словам и выделяет совпадения."""
+        posts = self.found("кота")
+        self.assertEqual(
+            {post.pk for post in posts}, {self.post.pk, self.other.pk})
+        self.assertIn("<mark>кота</mark>", posts[0].snippet)
+        self.assertEqual(self.found("собака кот"), [self.other])
+        self.assertEqual(self.found("соба"), [self.other])
+        self.assertIn("&lt;b&gt;", self.found("лаяла")[0].snippet)
+
+    def test_index_follows_edit_and_delete(self):
+        """Индекс обновляется при правке и удалении поста."""
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = "Попугай"
+        post.save()
+        self.assertEqual(self.found("попугай"), [post])
+        self.assertEqual(self.found("окне"), [])
+        post.delete()
+        self.assertEqual(self.found("попугай"), [])
+
+    def test_empty_query(self):
+        """Пустой запрос ничего не ищет."""
+        self.assertEqual(self.found("  !!! "), [])
+
+    def test_admin_uses_search_index(self):
+        """Поиск в админке идёт через полнотекстовый индекс."""
+        admin = Client()
+        admin.force_login(User.objects.create_superuser(
+            "admin", "admin@example.com", "password"))
+        response = admin.get(ADMIN_POSTS_URL, {"q": "собака"})
+        self.assertEqual(
+            list(response.context["cl"].result_list), [self.other])
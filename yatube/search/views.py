@@ -0,0 +1,20 @@
+from urllib.parse import urlencode
+
+from django.core.paginator import Paginator
+from django.shortcuts import render
+from posts.thumbnails import prefetch_thumbnails
+from yatube.settings import POSTS_ON_PAGE
+
+from .index import SearchResults
+
+
+def search(request):
+    query = request.GET.get("q", "").strip()
+    page = Paginator(SearchResults(query), POSTS_ON_PAGE).get_page(
+        request.GET.get("page"))
+    prefetch_thumbnails(page.object_list, "card")
+    return render(request, "search/search.html", {
+        "query": query,
+        "page_obj": page,
+        "page_params": urlencode({"q": query}) + "&",
+    })
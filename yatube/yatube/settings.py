@@ -1,4 +1,5 @@
 import os
+import tempfile
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -34,6 +35,8 @@ INSTALLED_APPS = [
     "about.apps.AboutConfig",
     "users.apps.UsersConfig",
     "core.apps.CoreConfig",
+    "search.apps.SearchConfig",
+    "api.apps.ApiConfig",
     "django.contrib.admin",
     "django.contrib.auth",
     "django.contrib.contenttypes",
@@ -44,7 +47,12 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "core.middleware.CacheStampMiddleware",
+    "core.middleware.ServerTimingMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "core.middleware.StaticFilesMiddleware",
+    "core.middleware.AnonymousPageCacheMiddleware",
+    "core.middleware.ReadPrimaryAfterWriteMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -58,10 +66,17 @@ ROOT_URLCONF = "yatube.urls"
 TEMPLATES_DIR = os.path.join(BASE_DIR, "templates")
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "BACKEND": "core.backends.DjangoTemplates",
         "DIRS": [TEMPLATES_DIR],
-        "APP_DIRS": True,
         "OPTIONS": {
+            # Скомпилированные шаблоны кешируются в любом режиме, при DEBUG
+            # шаблон перечитывается после правки файла.
+            "loaders": [
+                ("core.loaders.CachedLoader", [
+                    "django.template.loaders.filesystem.Loader",
+                    "django.template.loaders.app_directories.Loader",
+                ], DEBUG),
+            ],
             "context_processors": [
                 "django.template.context_processors.debug",
                 "django.template.context_processors.request",
@@ -79,13 +94,57 @@ WSGI_APPLICATION = "yatube.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
+# Прагмы SQLite, которые core.signals выполняет на каждом новом
+# соединении (ключ PRAGMAS базы). busy_timeout ждёт освобождения базы
+# вместо ошибки «database is locked», cache_size - в КиБ.
+SQLITE_READ_PRAGMAS = {
+    "busy_timeout": 5000,
+    "cache_size": -64000,
+    "mmap_size": 256 * 2 ** 20,
+    "temp_store": "MEMORY",
+}
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": os.path.join(BASE_DIR, "db.sqlite3"),
+        # Соединение потока переживает запрос: прагмы и кеш страниц
+        # SQLite не пропадают с каждым ответом.
+        "CONN_MAX_AGE": 600,
+        # В WAL читатели не ждут писателя, а писатель - читателей;
+        # synchronous=NORMAL в WAL не теряет целостность при сбое.
+        "PRAGMAS": {
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            **SQLITE_READ_PRAGMAS,
+        },
     }
 }
 
+# Реплики для чтения лент - копии основной базы, которые обновляет
+# команда sync_replicas. YATUBE_DB_REPLICAS=N включает чтение с N реплик.
+REPLICA_DATABASES = [
+    f"replica{number}"
+    for number in range(1, int(os.getenv("YATUBE_DB_REPLICAS", "0")) + 1)
+]
+# Хотя бы одна реплика объявлена всегда, чтобы маршрутизацию можно было
+# проверить тестами; в тестах реплики - зеркала тестовой базы.
+for alias in REPLICA_DATABASES or ["replica1"]:
+    DATABASES[alias] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": os.path.join(BASE_DIR, f"db.{alias}.sqlite3"),
+        # sync_replicas подменяет файл реплики: долгое соединение читало
+        # бы старую копию.
+        "CONN_MAX_AGE": 0,
+        "PRAGMAS": SQLITE_READ_PRAGMAS,
+        "TEST": {"MIRROR": "default"},
+    }
+DATABASE_ROUTERS = ["core.routers.ReplicaRouter"]
+# Сколько секунд после записи пользователь, а после правки в ленте -
+# все её читатели читают с основной базы: больше, чем интервал
+# sync_replicas.
+REPLICA_STICKY_SECONDS = 30
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -126,5 +185,89 @@ LOGIN_URL = "users:login"
 LOGIN_REDIRECT_URL = "posts:index"
 STATIC_URL = "/static/"
 STATICFILES_DIRS = [os.path.join(BASE_DIR, "static")]
+STATIC_ROOT = os.path.join(BASE_DIR, "collected_static")
+# collectstatic пишет имена с хешем содержимого и рядом копии .gz и .br
+# (для .br нужен пакет brotli).
+STATICFILES_STORAGE = "core.storage.CompressedManifestStaticFilesStorage"
+# Срок кеша для статики без хеша в имени: её меняют, не меняя ссылок.
+STATIC_MAX_AGE = 60
 POSTS_ON_PAGE = 10
+POST_CARD_CACHE_TIMEOUT = 60 * 60 * 24
+# Срок версий и времени правки лент в кеше: ключи заводятся и по адресам
+# несуществующих групп и авторов. Истёкшая версия начинается заново с
+# большего числа, и фрагменты ленты один раз рендерятся заново.
+FEED_VERSION_CACHE_TIMEOUT = 60 * 60 * 24
+# Срок итогов лент в кеше: правки сдвигают их сразу, а срок исправляет
+# расхождения, которые правки не видят (UPDATE и DELETE мимо сигналов).
+POST_COUNT_CACHE_TIMEOUT = 60 * 10
+# Постов на странице ленты в JSON API по умолчанию и наибольшее ?limit=.
+API_PAGE_SIZE = 20
+API_MAX_PAGE_SIZE = 100
+API_CACHE_TIMEOUT = 60 * 10
+# Постов в одной порции выгрузки export_posts.
+EXPORT_CHUNK_SIZE = 2000
+# Постов в одной транзакции import_posts.
+IMPORT_BATCH_SIZE = 5000
+# Сколько последних постов хранит лента подписок пользователя.
+TIMELINE_SIZE = 1000
+# Посты авторов, у которых подписчиков больше, не раскладываются по лентам
+# при публикации, а подмешиваются в ленту при чтении.
+TIMELINE_FANOUT_LIMIT = 1000
+# Целые страницы для гостей: маршруты, срок в кеше приложения и max-age
+# для прокси и браузеров, которые об очистке кеша не узнают.
+PAGE_CACHE_NAMESPACES = ("posts", "about")
+PAGE_CACHE_TIMEOUT = 60 * 10
+PAGE_CACHE_MAX_AGE = 60
+# Бэкенд кеша считает попадания и промахи для Server-Timing. Кеш у каждого
+# процесса свой: команды, которые меняют данные в обход сайта, меняют
+# время файла CACHE_STAMP_FILE, и процессы сайта очищают свои кеши.
+CACHES = {
+    "default": {"BACKEND": "core.cache.TimedLocMemCache"},
+}
+CACHE_STAMP_FILE = os.getenv(
+    "YATUBE_CACHE_STAMP",
+    os.path.join(tempfile.gettempdir(), "yatube-cache.stamp"))
+# Доля запросов с заголовком Server-Timing; на полном трафике хватает
+# процента. YATUBE_TIMING_LOG=1 дублирует замеры в лог yatube.timing.
+SERVER_TIMING_SAMPLE_RATE = float(
+    os.getenv("YATUBE_TIMING_SAMPLE_RATE", "1" if DEBUG else "0.01"))
+SERVER_TIMING_LOG = os.getenv("YATUBE_TIMING_LOG") == "1"
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {
+        "yatube.timing": {
+            "handlers": ["console"], "level": "INFO", "propagate": False},
+    },
+}
+THUMBNAIL_BACKEND = "posts.thumbnails.PostThumbnailBackend"
+THUMBNAIL_KVSTORE = "posts.kvstore.LRUKVStore"
+# Сколько записей о миниатюрах держит в памяти каждый процесс.
+THUMBNAIL_LRU_SIZE = 1000
+# Сколько секунд запись живёт в памяти процесса: удаление картинки другим
+# процессом сбрасывает только его собственный кеш и БД.
+THUMBNAIL_LRU_TIMEOUT = 60
+# Кеш Django тоже у каждого процесса свой, поэтому и в нём записи
+# о миниатюрах живут недолго, а не 10 лет по умолчанию sorl-thumbnail.
+THUMBNAIL_CACHE_TIMEOUT = THUMBNAIL_LRU_TIMEOUT
+# Все размеры миниатюр, которые показывают шаблоны: псевдоним -> (геометрия,
+# параметры sorl-thumbnail). Они создаются заранее при сохранении поста.
+POST_THUMBNAILS = {
+    "detail": ("960x339", {"crop": "center", "upscale": True}),
+    "card": ("960x339", {"crop": "center", "upscale": True}),
+}
+# Число процессов, которые обрабатывают картинки постов, создают
+# миниатюры и раскладывают посты по лентам; 0 - делать это прямо
+# в запросе, как в тестах (core.runner.TestRunner).
+POST_THUMBNAIL_WORKERS = 2
+TEST_RUNNER = "core.runner.TestRunner"
+# Загрузки пишутся на диск и обрезаются на POST_IMAGE_MAX_SIZE байтах.
+FILE_UPLOAD_HANDLERS = ["posts.uploads.BoundedUploadHandler"]
+POST_IMAGE_MAX_SIZE = 20 * 2 ** 20
+# Проверяется по заголовку файла, до раскодирования картинки.
+POST_IMAGE_MAX_PIXELS = 50 * 10 ** 6
+POST_IMAGE_FORMATS = ("JPEG", "PNG", "GIF", "WEBP")
+# Большая сторона картинки после фоновой обработки.
+POST_IMAGE_MAX_SIDE = 2560
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
@@ -9,6 +9,8 @@ urlpatterns = [
     path("auth/", include("django.contrib.auth.urls")),
     path("", include("posts.urls", namespace="posts")),
     path("about/", include("about.urls", namespace="about")),
+    path("search/", include("search.urls", namespace="search")),
+    path("api/v1/", include("api.urls", namespace="api")),
 ]
 handler404 = "core.views.page_not_found"
 if settings.DEBUG: